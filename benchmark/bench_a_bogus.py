@@ -0,0 +1,95 @@
+'''a_bogus 签名微基准：对比旧实现（每次签名新建 MiniRacer 上下文）与签名引擎的吞吐量和单次延迟
+
+运行方式：python benchmark/bench_a_bogus.py [签名次数]'''
+import sys
+from os.path import dirname, abspath
+from time import perf_counter
+from statistics import mean, median, quantiles
+from urllib import parse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from py_mini_racer import MiniRacer  # noqa: E402
+from src.config import USER_AGENT  # noqa: E402
+from src.encrypt_params import ABogus  # noqa: E402
+
+
+def old_get_a_bogus(query: dict):
+    '''基线版本 js_port.get_a_bogus 的原样复制'''
+    with open(ABogus.path, 'r', encoding='utf-8') as f:
+        a_bogus_js_code = f.read()
+    a_bogus_ctx = MiniRacer()
+    a_bogus_ctx.eval(a_bogus_js_code)
+    query = parse.unquote(parse.urlencode(query))
+    return a_bogus_ctx.call('generate_a_bogus', query, USER_AGENT)
+
+
+def generate_queries(number: int):
+    return [{
+        'device_platform': 'webapp',
+        'aid': '6383',
+        'channel': 'channel_pc_web',
+        'sec_user_id': 'MS4wLjABAAAA' + str(i).zfill(20),
+        'max_cursor': 1700000000000 - i * 1000,
+        'count': '18',
+        'msToken': 'x' * 107,
+    } for i in range(number)]
+
+
+def measure(name: str, function, queries: list[dict]):
+    latencies = []
+    start = perf_counter()
+    for query in queries:
+        t = perf_counter()
+        function(query)
+        latencies.append(perf_counter() - t)
+    total = perf_counter() - start
+    report(name, len(queries), total, latencies)
+
+
+def measure_batch(name: str, engine: ABogus, queries: list[dict]):
+    start = perf_counter()
+    engine.sign_batch(queries)
+    total = perf_counter() - start
+    report(name, len(queries), total, [total / len(queries)])
+
+
+def measure_concurrent(name: str, engine: ABogus, queries: list[dict], workers: int):
+    latencies = []
+
+    def sign(query):
+        t = perf_counter()
+        engine.sign(query)
+        latencies.append(perf_counter() - t)
+
+    start = perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        list(executor.map(sign, queries))
+    total = perf_counter() - start
+    report(name, len(queries), total, latencies)
+
+
+def report(name: str, number: int, total: float, latencies: list[float]):
+    p99 = quantiles(latencies, n=100)[-1] if len(latencies) >= 2 else latencies[0]
+    print(f'{name:<24}{number / total:>12.1f} 次/秒'
+          f'{mean(latencies) * 1000:>10.3f} ms 平均'
+          f'{median(latencies) * 1000:>10.3f} ms 中位'
+          f'{p99 * 1000:>10.3f} ms p99')
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    queries = generate_queries(number)
+    assert old_get_a_bogus(queries[0]) and ABogus().sign(queries[0])
+
+    measure('旧实现(每次新建上下文)', old_get_a_bogus, queries)
+    engine = ABogus()
+    measure('签名引擎(冷启动)', engine.sign, queries[:1])
+    measure('签名引擎(单线程)', engine.sign, queries)
+    measure_batch('签名引擎(批量)', engine, queries)
+    measure_concurrent('签名引擎(4 线程)', ABogus(pool_size=4), queries, 4)
+
+
+if __name__ == '__main__':
+    main()
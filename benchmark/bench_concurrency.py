@@ -0,0 +1,65 @@
+'''自适应下载并发基准：使用 bench_e2e.py 与本地模拟服务器，
+分别在图集为主与视频为主的账号上，对比固定并发数量（CONCURRENCY_MIN = CONCURRENCY_MAX = CONCURRENCY）与自适应并发的下载速度；
+模拟服务器限制每个连接的带宽并增加响应延迟，使总下载速度取决于同时下载的文件数量；
+最后在服务器按比例返回 429、503（响应内容为空）时检查自适应并发是否降低并发数量上限
+
+运行方式：python benchmark/bench_concurrency.py [--accounts 账号数量] [--bandwidth 每个连接带宽] [--latency 响应延迟]'''
+import sys
+from os.path import dirname, abspath, join as join_path
+from argparse import ArgumentParser
+from json import load
+from subprocess import run
+from tempfile import TemporaryDirectory
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import CONCURRENCY  # noqa: E402
+
+SCENARIOS = {
+    '图集为主': ['--items', '60', '--image-ratio', '1', '--images', '6', '--image-size', str(150 * 1024)],
+    '视频为主': ['--items', '40', '--image-ratio', '0', '--video-size', str(4 * 1024 * 1024)],
+}
+FAILURES = ['--error-rate', '0.1', '--throttle-rate', '0.1']
+MODES = {
+    f'固定 {CONCURRENCY}': ['--set', f'CONCURRENCY_MIN={CONCURRENCY}', '--set', f'CONCURRENCY_MAX={CONCURRENCY}'],
+    '自适应': [],
+}
+
+
+def bench(scenario: list[str], mode: list[str], args, output: str):
+    command = [sys.executable, join_path(ROOT, 'benchmark/bench_e2e.py'), '--mode', 'stages',
+               '--accounts', str(args.accounts), '--bandwidth', str(args.bandwidth), '--latency', str(args.latency),
+               '--output', output, *scenario, *mode]
+    run(command, check=True, capture_output=True)
+    with open(output, encoding='utf-8') as f:
+        return load(f)[-1]['metrics']
+
+
+def main():
+    parser = ArgumentParser(description='自适应下载并发基准')
+    parser.add_argument('--accounts', type=int, default=2)
+    parser.add_argument('--bandwidth', type=int, default=2 * 1024 * 1024, help='每个连接下载带宽（字节/秒）')
+    parser.add_argument('--latency', type=float, default=0.05, help='每次请求响应延迟（秒）')
+    args = parser.parse_args()
+    with TemporaryDirectory() as folder:
+        output = join_path(folder, 'e2e.json')
+        for scenario, scenario_args in SCENARIOS.items():
+            baseline = None
+            for mode, mode_args in MODES.items():
+                metrics = bench(scenario_args, mode_args, args, output)
+                speed = metrics['mb_per_sec']
+                line = (f'{scenario}  {mode:<8}文件 {metrics["files"]:>5}  下载用时 {metrics["elapsed"]["download"]:>7.2f} 秒  '
+                        f'{speed:>8.2f} MB/秒')
+                if baseline:
+                    line += f'  {speed / baseline:.2f}×'
+                baseline = baseline or speed
+                print(line)
+        metrics = bench(SCENARIOS['视频为主'] + FAILURES, MODES['自适应'], args, output)
+        print(f'限速与服务器错误  自适应  429 {metrics["server_throttled"]}  503 {metrics["server_errors"]}  '
+              f'平均并发数量上限 {metrics["concurrency_limit"]}')
+        assert metrics['concurrency_limit'] < CONCURRENCY, '出现 429、503 时并发数量上限没有降低'
+
+
+if __name__ == '__main__':
+    main()
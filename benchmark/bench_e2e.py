@@ -0,0 +1,280 @@
+'''端到端性能基准：在子进程中启动本地模拟服务器（fake_server.py），
+使用 Acquire、Parse、Download 或者完整的 Scheduler 流程获取作品数据并下载文件，
+输出 页/秒、作品/秒、MB/秒、峰值内存、首字节时间（开始运行到服务器发送第一个文件字节的时间），
+并将结果追加保存到 JSON 文件，与相同配置的上一次结果对比；
+scheduler 模式下获取与下载同时进行，页/秒、作品/秒、MB/秒均按总耗时计算
+
+运行方式：
+python benchmark/bench_e2e.py                                   # 完整 Scheduler 流程，签名使用空字符串代替
+python benchmark/bench_e2e.py --mode stages --sign real         # 分别统计获取、提取、下载三个阶段，使用真实签名
+python benchmark/bench_e2e.py --latency 0.05 --bandwidth 5000000 --set STREAM_DOWNLOAD=True
+其他参数见 --help'''
+import sys
+from os import makedirs, walk, devnull
+from os.path import dirname, abspath, join as join_path, getsize, exists
+from argparse import ArgumentParser
+from ast import literal_eval
+from contextlib import redirect_stdout, nullcontext
+from datetime import date, datetime
+from json import dump, load, loads
+from subprocess import Popen, PIPE, run
+from tempfile import TemporaryDirectory
+from time import time, perf_counter
+from urllib.request import urlopen
+
+try:
+    from resource import getrusage, RUSAGE_SELF
+except ImportError:  # Windows
+    getrusage = None
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_server import POST_API, add_arguments  # noqa: E402
+import src.config  # noqa: E402,F401
+from src.config import TEXT_REPLACEMENT  # noqa: E402
+from src.tool import rate_limiter, metrics as run_metrics  # noqa: E402
+from src.download import Acquire, Parse, Download  # noqa: E402
+from src.backup import DownloadRecorder, DownloadItems, DownloadIndex  # noqa: E402
+from src.scheduler import Scheduler  # noqa: E402
+import src.download.acquire as acquire_module  # noqa: E402
+
+
+def parse_arguments():
+    parser = ArgumentParser(description='端到端性能基准')
+    parser.add_argument('--mode', choices=('scheduler', 'stages'), default='scheduler',
+                        help='scheduler：完整 Scheduler 流程；stages：分别统计获取、提取、下载三个阶段')
+    parser.add_argument('--accounts', type=int, default=3, help='账号数量')
+    parser.add_argument('--sign', choices=('stub', 'real'), default='stub', help='a_bogus 签名：stub 为空字符串，real 为真实签名')
+    parser.add_argument('--rate', type=float, default=100, help='请求限速器初始速率与最高速率（次/秒）')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='覆盖 src.config 常量，例如 --set CONCURRENCY=10，可以多次使用')
+    parser.add_argument('--label', default='', help='结果标签，只与相同标签、相同配置的结果对比')
+    parser.add_argument('--output', default=join_path(ROOT, 'benchmark/results/e2e.json'), help='结果文件')
+    parser.add_argument('--verbose', action='store_true', help='显示程序运行输出')
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def start_server(args):
+    '''启动模拟服务器子进程，返回 (子进程, 服务器地址)'''
+    command = [sys.executable, join_path(ROOT, 'benchmark/fake_server.py')]
+    for name in ('items', 'page_size', 'image_ratio', 'images', 'video_size', 'image_size',
+                 'latency', 'bandwidth', 'error_rate', 'throttle_rate', 'seed'):
+        command += [f'--{name.replace("_", "-")}', str(getattr(args, name))]
+    process = Popen(command, stdout=PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+
+def server_stats(base_url: str):
+    with urlopen(f'{base_url}/stats') as response:
+        return loads(response.read())
+
+
+def override_constants(settings: list[str]):
+    '''覆盖已导入的 src 模块中的同名常量'''
+    overrides = {}
+    for item in settings:
+        name, _, value = item.partition('=')
+        overrides[name] = literal_eval(value)
+        for module_name, module in list(sys.modules.items()):
+            if module_name.startswith('src') and hasattr(module, name):
+                setattr(module, name, overrides[name])
+    return overrides
+
+
+def prepare(args, folder: str, base_url: str):
+    '''使用临时文件夹保存断点数据、下载记录、下载索引与作品文件，并生成模拟账号'''
+    makedirs(cache := join_path(folder, 'cache'))
+    DownloadRecorder.path = join_path(cache, 'IDRecorder.txt')
+    DownloadItems.path = join_path(cache, 'ItemsInfo.jsonl')
+    DownloadItems.legacy_path = join_path(cache, 'ItemsInfo.json')
+    DownloadIndex.path = join_path(folder, 'DownloadIndex.db')
+    Acquire.post_api = f'{base_url}{POST_API}'
+    if args.sign == 'stub':
+        acquire_module.get_a_bogus = lambda params: ''
+    rate_limiter.rate = rate_limiter.max_rate = args.rate
+    rate_limiter.burst = rate_limiter.tokens = max(args.rate / 10, 1)
+    return cache, [{
+        'mark': '', 'url': '', 'earliest': '', 'latest': '',
+        'sec_user_id': f'MS4wLjABAAAA{i:04d}',
+        'earliest_date': date(2016, 9, 20),
+        'latest_date': date.today(),
+    } for i in range(args.accounts)]
+
+
+def configure(settings, folder: str, accounts: list[dict]):
+    settings.accounts = accounts
+    settings.cookies = {}
+    settings.save_folder = join_path(folder, 'save')
+    settings.download_videos = True
+    settings.download_images = True
+    settings.name_format = ['create_time', 'id', 'type', 'desc']
+    settings.split = '-'
+    settings.date_format = '%Y-%m-%d'
+    settings.compile_name()
+
+
+def run_scheduler(folder: str, cache: str, accounts: list[dict]):
+    scheduler = Scheduler()
+    scheduler.cleaner.set_rule(TEXT_REPLACEMENT)
+    scheduler.cache_folder = cache
+    configure(scheduler.settings, folder, accounts)
+    scheduler.download_index.open_()
+    start = perf_counter()
+    try:
+        scheduler._deal_accounts()
+    finally:
+        elapsed = perf_counter() - start
+        scheduler.download.close()
+        scheduler.download_index.close()
+    return {'total': elapsed}
+
+
+def run_stages(folder: str, cache: str, accounts: list[dict]):
+    scheduler = Scheduler()
+    scheduler.cleaner.set_rule(TEXT_REPLACEMENT)
+    settings = scheduler.settings
+    configure(settings, folder, accounts)
+    acquirer = Acquire(settings)
+    parse = Parse(scheduler.cleaner, settings)
+    recorder = DownloadRecorder()
+    index = DownloadIndex()
+    index.open_()
+    download = Download(settings, scheduler.cleaner, scheduler.cookie, recorder, index)
+    elapsed = {}
+
+    start = perf_counter()
+    raw = [acquirer.request_items(account['sec_user_id'], account['earliest_date'], show_progress=False)
+           for account in accounts]
+    elapsed['acquire'] = perf_counter() - start
+
+    start = perf_counter()
+    extracted = []
+    for account, items in zip(accounts, raw):
+        parse.extract_account(account, items[0])
+        extracted.append(parse.extract_items(items, account['earliest_date'], account['latest_date']))
+    elapsed['parse'] = perf_counter() - start
+    del raw
+
+    start = perf_counter()
+    recorder.open_()
+    try:
+        for account, items in zip(accounts, extracted):
+            download.download_files(items, account['id'], account['mark'])
+    finally:
+        recorder.close()
+        download.close()
+        index.close()
+    elapsed['download'] = perf_counter() - start
+    elapsed['total'] = sum(elapsed.values())
+    return elapsed
+
+
+def folder_size(folder: str):
+    files = size = 0
+    for root, _, names in walk(folder):
+        for name in names:
+            if not name.endswith(('.part', '.seg')):
+                files += 1
+                size += getsize(join_path(root, name))
+    return files, size
+
+
+def peak_rss():
+    '''本进程峰值内存（MB），不包括模拟服务器子进程'''
+    if getrusage is None:
+        return
+    rss = getrusage(RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def collect(args, elapsed: dict, stats: dict, started: float, folder: str):
+    files, size = folder_size(join_path(folder, 'save'))
+    total = elapsed['total']
+    download_time = elapsed.get('download', total)
+    return {
+        'elapsed': {key: round(value, 3) for key, value in elapsed.items()},
+        'pages': stats['pages'],
+        'items': stats['items'],
+        'files': files,
+        'bytes': size,
+        'pages_per_sec': round(stats['pages'] / elapsed.get('acquire', total), 2),
+        'items_per_sec': round(stats['items'] / elapsed.get('acquire', total), 2),
+        'parse_items_per_sec': round(stats['items'] / elapsed['parse'], 2) if 'parse' in elapsed else None,
+        'mb_per_sec': round(size / 1024 / 1024 / download_time, 2),
+        'ttfb': round(stats['first_byte'] - started, 3) if stats['first_byte'] else None,
+        'first_page': round(stats['first_page'] - started, 3) if stats['first_page'] else None,
+        'peak_rss_mb': peak_rss(),
+        'server_errors': stats['errors'],
+        'server_throttled': stats['throttled'],
+        'concurrency_limit': concurrency_limit(),
+    }
+
+
+def concurrency_limit():
+    '''开始下载文件时自适应并发数量上限的平均值'''
+    return next((round(i['mean'], 2) for i in run_metrics.summary()['histograms']
+                 if i['name'] == 'download_limit' and i['mean'] is not None), None)
+
+
+def git_commit():
+    result = run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def save_result(path: str, result: dict):
+    '''追加保存本次结果，返回相同标签、相同配置的上一次结果'''
+    results = []
+    if exists(path):
+        with open(path, encoding='utf-8') as f:
+            results = load(f)
+    previous = next((i for i in reversed(results)
+                     if i['label'] == result['label'] and i['config'] == result['config']), None)
+    results.append(result)
+    makedirs(dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        dump(results, f, ensure_ascii=False, indent=4)
+    return previous
+
+
+def show(metrics: dict, previous: dict | None):
+    for key, value in metrics.items():
+        line = f'{key:<22}{value}'
+        if previous and isinstance(value, (int, float)) and isinstance(old := previous['metrics'].get(key), (int, float)) and old:
+            line += f'（上次 {old}，{(value - old) / old:+.1%}）'
+        print(line)
+
+
+def main():
+    args = parse_arguments()
+    overrides = override_constants(args.set)
+    process, base_url = start_server(args)
+    try:
+        with TemporaryDirectory() as folder:
+            cache, accounts = prepare(args, folder, base_url)
+            started = time()
+            with nullcontext() if args.verbose else redirect_stdout(open(devnull, 'w', encoding='utf-8')):
+                if args.mode == 'scheduler':
+                    elapsed = run_scheduler(folder, cache, accounts)
+                else:
+                    elapsed = run_stages(folder, cache, accounts)
+            metrics = collect(args, elapsed, server_stats(base_url), started, folder)
+    finally:
+        process.terminate()
+        process.wait()
+
+    config = {key: value for key, value in vars(args).items() if key not in ('label', 'output', 'verbose', 'set')}
+    config['constants'] = overrides
+    result = {
+        'label': args.label,
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'config': config,
+        'metrics': metrics,
+    }
+    show(metrics, save_result(args.output, result))
+
+
+if __name__ == '__main__':
+    main()
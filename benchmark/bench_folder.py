@@ -0,0 +1,119 @@
+'''下载任务生成（开始下载前的跳过判断）基准：在临时文件夹中生成大量已下载文件，
+对比逐个文件调用 exists()/getsize() 的旧实现，与 scandir 文件夹快照索引的新实现；
+可以为每次文件系统调用增加固定延迟，模拟 NAS 等网络存储的访问耗时
+
+运行方式：python benchmark/bench_folder.py [已下载作品数量] [每次文件系统调用延迟（毫秒）]'''
+import sys
+from os import makedirs
+from os.path import dirname, abspath, join as join_path, exists, getsize
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from src.config import Settings, Cookie  # noqa: E402
+from src.tool import Cleaner  # noqa: E402
+from src.backup import DownloadRecorder, DownloadIndex  # noqa: E402
+from src.download import Download  # noqa: E402
+import src.tool.folder as folder_module  # noqa: E402
+import src.download.download as download_module  # noqa: E402
+
+
+class Counter:
+    '''统计文件系统调用次数，并为每次调用增加固定延迟'''
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def wrap(self, function):
+        def inner(*args, **kwargs):
+            self.calls += 1
+            if self.latency:
+                sleep(self.latency)
+            return function(*args, **kwargs)
+        return inner
+
+
+class OldDownload(Download):
+    '''基线版本：每个文件单独调用 exists()，补充索引时单独调用 getsize()；不输出跳过信息'''
+    exists = staticmethod(exists)
+    getsize = staticmethod(getsize)
+
+    def _skip_task(self, task: dict, downloaded: set[tuple[str, int]]):
+        if (task['id'], task['index']) in downloaded or self._record_key(task) in self.download_recorder.records:
+            pass
+        elif self.exists(task['path']):
+            self._add_index(task)
+        else:
+            return False
+        return True
+
+    def _add_index(self, task: dict):
+        self.download_index.add(task['id'], task['index'], task['account'], task['path'],
+                                self.getsize(task['path']), task['width'], task['height'])
+
+    def _create_save_folder(self, id: str, mark: str):
+        folder = join_path(self.settings.save_folder, f'UID{id}_{mark}_发布作品')
+        makedirs(folder, exist_ok=True)
+        return folder
+
+
+def generate_items(number: int):
+    '''合成作品信息：前 number 个作品已下载，另有 number 个新作品'''
+    return [{
+        'id': str(7300000000000000000 + i),
+        'desc': '作品描述',
+        'type': '视频',
+        'downloads': f'https://v.example.com/{i}.mp4',
+        'width': 1080,
+        'height': 1920,
+        'name': str(7300000000000000000 + i),
+    } for i in range(number * 2)]
+
+
+def measure(name: str, download: Download, items: list[dict], counter: Counter):
+    '''首次运行时已下载文件没有索引记录，需要补充到索引中；再次运行时只需要判断新作品文件是否存在'''
+    for round_ in ('首次运行', '再次运行'):
+        counter.calls = 0
+        start = perf_counter()
+        save_folder = download._create_save_folder('42', 'bench')
+        tasks = download._generate_task(items, save_folder, '42')
+        elapsed = perf_counter() - start
+        print(f'{name} {round_:<8}{elapsed * 1000:>10.1f} ms{counter.calls:>10} 次文件系统调用{len(tasks):>10} 个下载任务')
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0
+    items = generate_items(number)
+    with TemporaryDirectory() as root:
+        settings = Settings()
+        settings.save_folder = root
+        folder = join_path(root, 'UID42_bench_发布作品')
+        makedirs(folder)
+        for item in items[:number]:
+            open(join_path(folder, f'{item["name"]}.mp4'), 'wb').close()
+        indexes = [DownloadIndex(join_path(root, f'index_{i}.db')) for i in range(2)]
+        for index in indexes:
+            index.open_()
+        recorder = DownloadRecorder()
+        counter = Counter(latency)
+
+        old = OldDownload(settings, Cleaner(), Cookie(settings), recorder, indexes[0])
+        old.exists = counter.wrap(exists)
+        old.getsize = counter.wrap(getsize)
+        folder_module.exists = counter.wrap(exists)
+        folder_module.getsize = counter.wrap(getsize)
+        folder_module.scandir = counter.wrap(folder_module.scandir)
+        new = Download(settings, Cleaner(), Cookie(settings), recorder, indexes[1])
+        download_module.print = lambda *args, **kwargs: None  # 不输出跳过信息，只比较文件系统访问耗时
+        measure('逐个 exists', old, items, counter)
+        measure('文件夹快照 ', new, items, counter)
+        for download, index in zip((old, new), indexes):
+            download.close()
+            index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+'''文件名生成微基准：对比逐个字段拼接 + 遍历非法字符集合替换的旧实现，
+与编译后的文件名模板 + 日期格式化缓存的新实现；
+另外对比 str.translate 替换表与逐个 str.replace 去除非法字符的耗时
+
+运行方式：python benchmark/bench_name.py [作品数量]'''
+import sys
+from os.path import dirname, abspath
+from datetime import date
+from time import perf_counter
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from src.config import Settings, DESCRIPTION_LENGTH  # noqa: E402
+from src.tool import Cleaner  # noqa: E402
+
+
+def old_filter_name(rule: set, text: str):
+    for i in rule:
+        text = text.replace(i, ' ')
+    return text.strip().strip('.')
+
+
+def generate_items(number: int):
+    '''合成作品信息：描述中包含换行符、斜杠等非法字符，发布日期分布在约 400 天内'''
+    return [{
+        'id': str(7300000000000000000 + i),
+        'desc': f'作品描述 #话题{i % 50} 第 {i} 条\n转发/点赞\t谢谢 ',
+        'create_time_date': date.fromtimestamp(1700000000 - i * 3600),
+        'type': '图集' if i % 4 == 0 else '视频',
+    } for i in range(number)]
+
+
+def measure(name: str, function, number: int, rounds: int):
+    best = float('inf')
+    for _ in range(rounds):
+        start = perf_counter()
+        result = function()
+        best = min(best, perf_counter() - start)
+    print(f'{name:<20}{best * 1000:>10.1f} ms{number / best:>14.0f} 个/秒')
+    return result
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    items = generate_items(number)
+    cleaner = Cleaner()
+    settings = Settings()
+    settings.name_format = ['create_time', 'id', 'type', 'desc']
+    settings.split = '-'
+    settings.date_format = '%Y-%m-%d'
+    settings.compile_name()
+    rule = cleaner.rule
+
+    def old_desc():
+        return [' '.join(old_filter_name(rule, item['desc']).split())[:DESCRIPTION_LENGTH] for item in items]
+
+    def new_desc():
+        return [cleaner.clear_spaces(cleaner.filter_name(item['desc']))[:DESCRIPTION_LENGTH] for item in items]
+
+    old = measure('旧实现 作品描述', old_desc, number, 5)
+    new = measure('新实现 作品描述', new_desc, number, 5)
+    assert old == new
+    for item, desc in zip(items, new):
+        item['desc'] = desc
+
+    def old_date():
+        return [date.strftime(item['create_time_date'], settings.date_format) for item in items]
+
+    def new_date():
+        return [settings.format_date(item['create_time_date']) for item in items]
+
+    old = measure('旧实现 发布日期', old_date, number, 5)
+    new = measure('新实现 发布日期', new_date, number, 5)
+    assert old == new
+    for item, create_time in zip(items, new):
+        item['create_time'] = create_time
+
+    def old_name():
+        return [old_filter_name(rule, settings.split.join(item[key] for key in settings.name_format)) for item in items]
+
+    def new_name():
+        return [cleaner.filter_name(settings.render_name(item)) for item in items]
+
+    old = measure('旧实现 文件名', old_name, number, 5)
+    new = measure('新实现 文件名', new_name, number, 5)
+    assert old == new
+
+    table = str.maketrans({i: ' ' for i in rule if len(i) == 1})
+    measure('str.translate 替换表', lambda: [item['desc'].translate(table) for item in items], number, 5)
+    measure('str.replace 逐个替换', lambda: [cleaner.filter_name(item['desc']) for item in items], number, 5)
+
+
+if __name__ == '__main__':
+    main()
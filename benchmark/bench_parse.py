@@ -0,0 +1,151 @@
+'''Parse 微基准：使用合成的 aweme_list 数据（默认 10000 个作品），
+对比逐次解析属性路径的旧实现与预先解析属性路径的 Parse.extract_items
+
+运行方式：python benchmark/bench_parse.py [作品数量]'''
+import sys
+from os.path import dirname, abspath
+from datetime import date
+from time import perf_counter
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from src.config import Settings, DESCRIPTION_LENGTH  # noqa: E402
+from src.tool import Cleaner  # noqa: E402
+from src.download import Parse  # noqa: E402
+from src.download.parse import compile_path  # noqa: E402
+
+
+class OldParse(Parse):
+    '''基线版本 Parse 的提取逻辑，每次取值都重新解析属性路径'''
+
+    def extract_items(self, items: list[dict], earliest: date, latest: date):
+        results = []
+        for item in items:
+            result = {}
+            self._extract_common(item, result)
+            if (result['create_time_date'] <= latest) and (result['create_time_date'] >= earliest):
+                if (gallery := self._extract_value(item, 'images')):
+                    if self.settings.download_images:
+                        self._extract_gallery(gallery, result)
+                        results.append(result)
+                elif self.settings.download_videos:
+                    self._extract_video(self._extract_value(item, 'video'), result)
+                    results.append(result)
+        return results
+
+    def _extract_common(self, item: dict, result: dict):
+        result['id'] = self._extract_value(item, 'aweme_id')
+        if desc := self._extract_value(item, 'desc'):
+            result['desc'] = self.cleaner.clear_spaces(self.cleaner.filter_name(desc))[:DESCRIPTION_LENGTH]
+        else:
+            result['desc'] = '作品描述为空'
+        result['create_timestamp'] = self._extract_value(item, 'create_time')
+        result['create_time_date'] = date.fromtimestamp(int(result['create_timestamp']))
+        result['create_time'] = date.strftime(result['create_time_date'], self.settings.date_format)
+
+    def _extract_gallery(self, gallery: dict, result: dict):
+        result['type'] = '图集'
+        result['share_url'] = f'https://www.douyin.com/note/{result["id"]}'
+        result['downloads'] = []
+        for image in gallery:
+            url = self._extract_value(image, 'url_list[0]')
+            width = self._extract_value(image, 'width')
+            height = self._extract_value(image, 'height')
+            result['downloads'].append((url, width, height))
+
+    def _extract_video(self, video: dict, result: dict):
+        result['type'] = '视频'
+        result['share_url'] = f'https://www.douyin.com/video/{result["id"]}'
+        result['downloads'] = self._extract_value(video, 'play_addr.url_list[0]')
+        result['height'] = self._extract_value(video, 'height')
+        result['width'] = self._extract_value(video, 'width')
+
+    @staticmethod
+    def _extract_value(data: dict, attribute_chain: str):
+        attributes = attribute_chain.split('.')
+        for attribute in attributes:
+            if '[' in attribute:
+                parts = attribute.split('[', 1)
+                attribute = parts[0]
+                index = int(parts[1].split(']', 1)[0])
+                data = data[attribute][index]
+            else:
+                data = data[attribute]
+            if not data:
+                return
+        return data
+
+
+def generate_items(number: int):
+    '''合成 aweme_list：每 4 个作品中有 1 个图集（6 张图片）'''
+    items = []
+    for i in range(number):
+        item = {
+            'aweme_id': str(7300000000000000000 + i),
+            'desc': f'作品描述 #话题{i % 50} 第 {i} 条\n',
+            'create_time': 1700000000 - i * 3600,
+            'author': {'uid': '1234567890', 'nickname': '账号昵称'},
+            'images': None,
+            'video': {
+                'play_addr': {'url_list': [f'https://v.example.com/{i}.mp4', f'https://v2.example.com/{i}.mp4']},
+                'width': 1080,
+                'height': 1920,
+            },
+        }
+        if i % 4 == 0:
+            item['images'] = [{
+                'url_list': [f'https://p.example.com/{i}_{j}.jpeg'],
+                'width': 1080,
+                'height': 1440,
+            } for j in range(6)]
+        items.append(item)
+    return items
+
+
+def measure(name: str, parse: Parse, items: list[dict], rounds: int):
+    best = float('inf')
+    for _ in range(rounds):
+        start = perf_counter()
+        results = parse.extract_items(items, date(2000, 1, 1), date(2100, 1, 1))
+        best = min(best, perf_counter() - start)
+    print(f'{name:<16}{best * 1000:>10.1f} ms{len(items) / best:>14.0f} 作品/秒')
+    return results
+
+
+def measure_values(items: list[dict], rounds: int):
+    '''只比较属性取值：每个作品提取 5 个字段'''
+    chains = ('aweme_id', 'desc', 'create_time', 'images', 'video.play_addr.url_list[0]')
+    getters = [compile_path(chain) for chain in chains]
+    for name, function in (
+        ('旧实现取值', lambda: [[OldParse._extract_value(item, chain) for chain in chains] for item in items]),
+        ('预解析取值', lambda: [[getter(item) for getter in getters] for item in items]),
+    ):
+        best = float('inf')
+        for _ in range(rounds):
+            start = perf_counter()
+            function()
+            best = min(best, perf_counter() - start)
+        print(f'{name:<16}{best * 1000:>10.1f} ms{len(items) * len(chains) / best:>14.0f} 次/秒')
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    items = generate_items(number)
+    settings = Settings()
+    settings.download_images = True
+    settings.download_videos = True
+    settings.date_format = '%Y-%m-%d'
+    settings.name_format = ['create_time', 'id', 'type', 'desc']
+    settings.split = '-'
+    settings.compile_name()
+    cleaner = Cleaner()
+
+    old = measure('旧实现', OldParse(cleaner, settings), items, 5)
+    new = measure('预解析属性路径', Parse(cleaner, settings), items, 5)
+    # name 由新实现预先生成，size（下载前去重使用的文件大小）为旧实现之后添加的字段，比较时排除
+    assert old == [{k: v for k, v in result.items() if k not in ('name', 'size')} for result in new]
+    measure_values(items, 5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+'''下载顺序与带宽限制基准：在全局带宽限制（BANDWIDTH_LIMIT）下，对比按作品顺序下载（FIFO）与 FairQueue（小文件优先、账号公平分配），
+输出 总用时、实际下载速度、文件/秒、平均完成时间、完成一半文件的时间；
+两个账号（只有图片与只有视频）的任务同时放入队列，另外输出每个账号完成一半文件的时间；
+最后模拟守护进程两个工作线程同时下载两个账号（共用带宽限速器，各自的下载队列）：
+一个账号有大量视频、另一个账号只有两个视频，对比不区分账号的共用令牌桶与按账号公平分配（BandwidthLimiter）时，
+视频少的账号完成下载的时间
+
+运行方式：python benchmark/bench_schedule.py [--limit 带宽限制(字节/秒)] [其他模拟服务器参数见 --help]'''
+import sys
+from os import makedirs
+from os.path import dirname, abspath
+from argparse import ArgumentParser
+from asyncio import Queue
+from contextlib import redirect_stdout
+from io import StringIO
+from statistics import mean
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from threading import Thread
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_e2e import start_server, prepare, configure  # noqa: E402
+from fake_server import add_arguments  # noqa: E402
+from src.config import TEXT_REPLACEMENT  # noqa: E402
+from src.tool import Cleaner, RateLimiter, BandwidthLimiter, FairQueue  # noqa: E402
+from src.download import Acquire, Parse, Download  # noqa: E402
+from src.backup import DownloadRecorder, DownloadIndex  # noqa: E402
+from src.config import Settings, Cookie  # noqa: E402
+import src.download.download as download_module  # noqa: E402
+
+
+class SharedBucket(RateLimiter):
+    '''不区分账号的共用令牌桶，每个账号获得的带宽与其同时下载的文件数量成正比'''
+
+    def __init__(self, rate: float, burst: float):
+        super().__init__(rate, burst, rate, rate)
+
+    async def acquire_async(self, amount: float = 1, account: str = ''):
+        await super().acquire_async(amount)
+
+
+class TimedRecorder(DownloadRecorder):
+    '''记录每个文件完成的时间'''
+
+    def __init__(self):
+        super().__init__()
+        self.finished = []
+
+    def save(self, id: str):
+        self.finished.append((id, perf_counter()))
+
+
+def generate_tasks(download: Download, accounts: list[dict], settings: Settings, cleaner: Cleaner):
+    acquirer = Acquire(settings)
+    parse = Parse(cleaner, settings)
+    tasks = []
+    for account in accounts:
+        items = acquirer.request_items(account['sec_user_id'], account['earliest_date'], show_progress=False)
+        parse.extract_account(account, items[0])
+        items = parse.extract_items(items, account['earliest_date'], account['latest_date'])
+        tasks.append(download._generate_task(items, download._create_save_folder(account['id'], ''), account['id']))
+    # 按作品顺序交替排列两个账号的任务，作为 FIFO 的下载顺序
+    return [task for pair in zip(*tasks) for task in pair] + [task for i in tasks for task in i[min(map(len, tasks)):]]
+
+
+def bench(args, base_url: str, queue: type):
+    download_module.FairQueue = queue
+    with TemporaryDirectory() as folder:
+        _, accounts = prepare(args, folder, base_url)
+        accounts[0]['sec_user_id'] += 'images'
+        accounts[1]['sec_user_id'] += 'videos'
+        settings = Settings()
+        cleaner = Cleaner()
+        cleaner.set_rule(TEXT_REPLACEMENT)
+        configure(settings, folder, accounts)
+        makedirs(settings.save_folder)
+        recorder = TimedRecorder()
+        index = DownloadIndex()
+        index.open_()
+        download = Download(settings, cleaner, Cookie(settings), recorder, index)
+        download.bandwidth = BandwidthLimiter(args.limit, args.limit / 10)
+        with redirect_stdout(StringIO()):
+            tasks = generate_tasks(download, accounts, settings, cleaner)
+            # 模拟服务器中每个账号都包含图集与视频作品，这里第一个账号只保留图片，第二个账号只保留视频
+            tasks = [task for task in tasks
+                     if (task['index'] > 0) == (task['account'] == accounts[0]['id'])]
+            owner = {download._record_key(task): task['account'] for task in tasks}
+            size = sum(args.image_size if task['index'] else args.video_size for task in tasks)
+            start = perf_counter()
+            with download._progress_object() as progress:
+                download.runner.run(download._download_files(tasks, progress))
+        elapsed = perf_counter() - start
+        download.close()
+        index.close()
+    times = sorted(t - start for _, t in recorder.finished)
+    per_account = {}
+    for id, t in recorder.finished:
+        per_account.setdefault(owner[id], []).append(t - start)
+    return {
+        'files': len(times),
+        'elapsed': elapsed,
+        'mb_per_sec': size / 1024 / 1024 / elapsed,
+        'files_per_sec': len(times) / elapsed,
+        'mean_done': mean(times),
+        'half_done': times[len(times) // 2],
+        'half_done_accounts': [sorted(per_account[account['id']])[len(per_account[account['id']]) // 2]
+                               for account in accounts],
+    }
+
+
+def run_download(download: Download, tasks: list[dict]):
+    with download._progress_object() as progress:
+        download.runner.run(download._download_files(tasks, progress))
+
+
+def bench_workers(args, base_url: str, limiter: type):
+    '''两个工作线程（各自的 Download 与事件循环）同时下载两个账号的视频，共用一个带宽限速器；
+    返回 (视频少的账号完成下载的时间, 全部下载完成的时间)'''
+    download_module.FairQueue = FairQueue
+    with TemporaryDirectory() as folder:
+        _, accounts = prepare(args, folder, base_url)
+        settings = Settings()
+        cleaner = Cleaner()
+        cleaner.set_rule(TEXT_REPLACEMENT)
+        configure(settings, folder, accounts)
+        makedirs(settings.save_folder)
+        index = DownloadIndex()
+        index.open_()
+        bandwidth = limiter(args.limit, args.limit / 10)
+        downloads = [Download(settings, cleaner, Cookie(settings), TimedRecorder(), index, bandwidth)
+                     for _ in accounts]
+        with redirect_stdout(StringIO()):
+            tasks = generate_tasks(downloads[0], accounts, settings, cleaner)
+            videos = [[task for task in tasks if not task['index'] and task['account'] == account['id']]
+                      for account in accounts]
+            videos[1] = videos[1][:2]
+            start = perf_counter()
+            threads = [Thread(target=run_download, args=(download, videos[i])) for i, download in enumerate(downloads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        for download in downloads:
+            download.close()
+        index.close()
+    finished = [max(t for _, t in download.download_recorder.finished) - start for download in downloads]
+    return finished[1], max(finished)
+
+
+def main():
+    parser = ArgumentParser(description='下载顺序与带宽限制基准')
+    parser.add_argument('--limit', type=int, default=10 * 1024 * 1024, help='全局带宽限制（字节/秒）')
+    add_arguments(parser)
+    parser.set_defaults(items=40, image_ratio=0.5, images=4, video_size=4 * 1024 * 1024, image_size=200 * 1024)
+    args = parser.parse_args()
+    args.accounts, args.sign, args.rate = 2, 'stub', 100
+    process, base_url = start_server(args)
+    try:
+        results = {name: bench(args, base_url, queue) for name, queue in (('FIFO', Queue), ('FairQueue', FairQueue))}
+        workers = {name: bench_workers(args, base_url, limiter)
+                   for name, limiter in (('共用令牌桶', SharedBucket), ('按账号公平分配', BandwidthLimiter))}
+    finally:
+        process.terminate()
+        process.wait()
+    print(f'带宽限制 {args.limit / 1024 / 1024:.1f} MB/秒')
+    for name, result in results.items():
+        print(f'{name:<10}文件 {result["files"]:>4}  总用时 {result["elapsed"]:>6.2f} 秒  '
+              f'{result["mb_per_sec"]:>6.2f} MB/秒  {result["files_per_sec"]:>6.2f} 文件/秒  '
+              f'平均完成时间 {result["mean_done"]:>6.2f} 秒  完成一半文件 {result["half_done"]:>6.2f} 秒  '
+              f'各账号完成一半文件 {" / ".join(f"{i:.2f}" for i in result["half_done_accounts"])} 秒')
+    print('\n两个工作线程同时下载两个账号（视频数量 多 / 2）：')
+    for name, (few, total) in workers.items():
+        print(f'{name:<14}视频少的账号完成 {few:>6.2f} 秒  全部完成 {total:>6.2f} 秒')
+
+
+if __name__ == '__main__':
+    main()
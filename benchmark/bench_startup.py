@@ -0,0 +1,113 @@
+'''启动时间基准：在子进程中使用 python -X importtime 导入 src.scheduler 并创建 Scheduler（显示菜单之前的工作），重复多次取中位数；
+输出 导入用时、创建 Scheduler 用时、自身导入用时最长的模块，以及启动时不应导入的模块（aiohttp、requests、py_mini_racer 等）中已导入的模块；
+结果追加保存到 JSON 文件，与上一次结果对比；导入用时超过 --budget 毫秒或者导入了不应导入的模块时以状态码 1 退出，可以在持续集成中跟踪
+
+运行方式：python benchmark/bench_startup.py [--runs 次数] [--budget 毫秒] [--top 模块数量]'''
+import sys
+from os import makedirs
+from os.path import dirname, abspath, join as join_path, exists
+from argparse import ArgumentParser
+from datetime import datetime
+from json import dump, load, loads
+from statistics import median
+from subprocess import run
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+HEAVY_MODULES = ('aiohttp', 'requests', 'yarl', 'py_mini_racer', 'rich.progress', 'asyncio')
+
+SCRIPT = f'''
+import sys
+from json import dumps
+from time import perf_counter
+start = perf_counter()
+from src.scheduler import Scheduler
+imported = perf_counter()
+Scheduler()
+created = perf_counter()
+print(dumps({{
+    'import': imported - start,
+    'create': created - imported,
+    'loaded': [i for i in {HEAVY_MODULES!r} if i in sys.modules],
+}}))
+'''
+
+
+def measure() -> tuple[dict, dict[str, int]]:
+    '''运行一次，返回 子进程输出的用时，以及 src.scheduler 导入过程中每个模块的自身导入用时（微秒）'''
+    result = run([sys.executable, '-X', 'importtime', '-c', SCRIPT], cwd=ROOT, capture_output=True, text=True, check=True)
+    # 每个模块在其依赖的模块之后输出，src.scheduler 之前、上一个顶层模块之后的模块都是 src.scheduler 导入的
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, _, name = line.removeprefix('import time:').split('|')
+        modules[name.strip()] = int(own)
+        if name.strip() == 'src.scheduler':
+            break
+        if not name.startswith('  '):
+            modules = {}
+    return loads(result.stdout.splitlines()[-1]), modules
+
+
+def git_commit():
+    result = run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def save_result(path: str, result: dict):
+    '''追加保存本次结果，返回上一次结果'''
+    results = []
+    if exists(path):
+        with open(path, encoding='utf-8') as f:
+            results = load(f)
+    previous = results[-1] if results else None
+    results.append(result)
+    makedirs(dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        dump(results, f, ensure_ascii=False, indent=4)
+    return previous
+
+
+def main():
+    parser = ArgumentParser(description='启动时间基准')
+    parser.add_argument('--runs', type=int, default=10, help='运行次数')
+    parser.add_argument('--budget', type=float, default=100, help='导入 src.scheduler 用时上限（毫秒，中位数）')
+    parser.add_argument('--top', type=int, default=10, help='显示自身导入用时最长的模块数量')
+    parser.add_argument('--output', default=join_path(ROOT, 'benchmark/results/startup.json'), help='结果文件')
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    import_ms = round(median(i['import'] for i, _ in runs) * 1000, 1)
+    create_ms = round(median(i['create'] for i, _ in runs) * 1000, 1)
+    loaded = sorted({module for i, _ in runs for module in i['loaded']})
+    modules = {name: median(i[name] for _, i in runs if name in i) / 1000 for name in runs[-1][1]}
+
+    previous = save_result(args.output, {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'import_ms': import_ms,
+        'create_ms': create_ms,
+        'loaded': loaded,
+    })
+    for key, value in (('import_ms', import_ms), ('create_ms', create_ms)):
+        line = f'{key:<12}{value}'
+        if previous and (old := previous.get(key)):
+            line += f'（上次 {old}，{(value - old) / old:+.1%}）'
+        print(line)
+    print(f'\n自身导入用时最长的 {args.top} 个模块（毫秒）：')
+    for name, ms in sorted(modules.items(), key=lambda i: i[1], reverse=True)[:args.top]:
+        print(f'  {ms:>7.2f}  {name}')
+
+    failed = False
+    if import_ms > args.budget:
+        print(f'\n导入用时 {import_ms} 毫秒，超过上限 {args.budget} 毫秒')
+        failed = True
+    if loaded:
+        print(f'\n启动时导入了不应导入的模块：{", ".join(loaded)}')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
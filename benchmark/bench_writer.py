@@ -0,0 +1,105 @@
+'''文件写入基准：模拟较慢的磁盘（NAS、USB），对比在事件循环中直接写入文件与使用 FileWriter（写入线程池、可重复使用的缓冲区）；
+磁盘按串行设备模拟：每次写入先等待 --disk-latency 秒，再按 --disk-rate 字节/秒写入，同一时间只能进行一次写入；
+网络按每个连接 --net-rate 字节/秒、每次接收 --net-chunk 字节模拟，多个文件同时下载；
+输出 总用时、MB/秒、写入次数、事件循环最大延迟（其他下载协程被阻塞的最长时间）
+
+运行方式：python benchmark/bench_writer.py [--files 文件数量] [--size 文件大小] [其他参数见 --help]'''
+import sys
+from os.path import dirname, abspath, join as join_path, getsize
+from argparse import ArgumentParser
+from asyncio import run, sleep, gather, create_task
+from tempfile import TemporaryDirectory
+from threading import Lock
+from time import perf_counter, sleep as blocking_sleep
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import src.config  # noqa: E402,F401
+from src.tool import FileWriter  # noqa: E402
+import src.tool.writer as writer_module  # noqa: E402
+
+
+class SlowDisk:
+    def __init__(self, latency: float, rate: float):
+        self.latency = latency
+        self.rate = rate
+        self.lock = Lock()
+        self.writes = 0
+
+    def wait(self, size: int):
+        with self.lock:
+            self.writes += 1
+            blocking_sleep(self.latency + size / self.rate)
+
+
+async def receive(args):
+    '''模拟从网络接收文件内容'''
+    data = b'x' * args.net_chunk
+    for _ in range(args.size // args.net_chunk):
+        await sleep(args.net_chunk / args.net_rate)
+        yield data
+
+
+async def save_blocking(path: str, args, disk: SlowDisk):
+    with open(path, 'wb') as f:
+        async for chunk in receive(args):
+            disk.wait(len(chunk))
+            f.write(chunk)
+
+
+async def save_writer(path: str, args, disk: SlowDisk):
+    async with FileWriter(path, truncate=True, preallocate=args.size) as f:
+        async for chunk in receive(args):
+            await f.write(chunk)
+
+
+async def monitor(lag: list):
+    '''每 10 毫秒唤醒一次，记录事件循环最大延迟'''
+    while True:
+        start = perf_counter()
+        await sleep(0.01)
+        lag[0] = max(lag[0], perf_counter() - start - 0.01)
+
+
+async def bench(save, folder: str, args, disk: SlowDisk):
+    lag = [0]
+    watcher = create_task(monitor(lag))
+    start = perf_counter()
+    await gather(*(save(join_path(folder, f'{i}.part'), args, disk) for i in range(args.files)))
+    elapsed = perf_counter() - start
+    watcher.cancel()
+    return elapsed, lag[0]
+
+
+def main():
+    parser = ArgumentParser(description='文件写入基准')
+    parser.add_argument('--files', type=int, default=8, help='同时下载的文件数量')
+    parser.add_argument('--size', type=int, default=16 * 1024 * 1024, help='每个文件大小（字节）')
+    parser.add_argument('--net-rate', type=float, default=4 * 1024 * 1024, help='每个连接下载速度（字节/秒）')
+    parser.add_argument('--net-chunk', type=int, default=256 * 1024, help='每次接收的字节数')
+    parser.add_argument('--disk-latency', type=float, default=0.005, help='每次写入的延迟（秒）')
+    parser.add_argument('--disk-rate', type=float, default=60 * 1024 * 1024, help='磁盘写入速度（字节/秒）')
+    args = parser.parse_args()
+
+    pwrite = writer_module.pwrite
+    for name, save in (('事件循环中写入', save_blocking), ('FileWriter', save_writer)):
+        disk = SlowDisk(args.disk_latency, args.disk_rate)
+
+        def slow_pwrite(fd, data, offset):
+            disk.wait(len(data))
+            return pwrite(fd, data, offset)
+
+        writer_module.pwrite = slow_pwrite
+        with TemporaryDirectory() as folder:
+            elapsed, lag = run(bench(save, folder, args, disk))
+            assert all(getsize(join_path(folder, f'{i}.part')) == args.size // args.net_chunk * args.net_chunk
+                       for i in range(args.files))
+        total = args.files * (args.size // args.net_chunk * args.net_chunk)
+        print(f'{name:<14}总用时 {elapsed:>6.2f} 秒  {total / 1024 / 1024 / elapsed:>7.2f} MB/秒  '
+              f'写入 {disk.writes:>5} 次  事件循环最大延迟 {lag * 1000:>7.1f} 毫秒')
+    writer_module.pwrite = pwrite
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+'''下载记录日志崩溃演练：子进程不断模拟完成文件下载（写入 .part 文件后重命名，再保存下载记录），
+父进程在随机时间强制结束（SIGKILL）或者正常终止（SIGTERM）子进程，然后按 DownloadRecorder 的崩溃安全约定检查日志：
+1. 日志中的每条记录都对应已完成的文件
+2. SIGKILL 时丢失的记录不超过 2 × JOURNAL_BATCH_SIZE 条（缓冲区中的一批与正在写入的一批）；SIGTERM 时不丢失记录
+3. 重新打开日志后不存在不完整的行
+
+运行方式：python benchmark/crash_drill.py [演练次数]（仅支持 POSIX 系统）'''
+import sys
+from os import makedirs, listdir, replace, kill
+from os.path import dirname, abspath, join as join_path
+from random import uniform
+from signal import SIGKILL, SIGTERM
+from subprocess import Popen, PIPE
+from tempfile import TemporaryDirectory
+from time import sleep
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import JOURNAL_BATCH_SIZE  # noqa: E402
+from src.backup import DownloadRecorder  # noqa: E402
+
+
+def child(folder: str):
+    from signal import signal
+    from src.scheduler import Scheduler
+    from src.tool import deferred_interrupt
+
+    signal(SIGTERM, Scheduler._terminate)
+    recorder = DownloadRecorder()
+    recorder.path = join_path(folder, 'IDRecorder.txt')
+    recorder.open_()
+    files = join_path(folder, 'files')
+    makedirs(files)
+    print('ready', flush=True)
+    try:
+        i = 0
+        while True:
+            path = join_path(files, f'{i}.mp4')
+            with open(f'{path}.part', 'wb') as f:
+                f.write(b'x' * 1024)
+            # 与 Download._finish_file 相同，重命名与保存记录之间推迟处理 SIGTERM
+            with deferred_interrupt.critical():
+                replace(f'{path}.part', path)
+                recorder.save(str(i))
+            i += 1
+    except KeyboardInterrupt:
+        pass
+
+
+def drill(signal_: int):
+    with TemporaryDirectory() as folder:
+        process = Popen([sys.executable, __file__, '--child', folder], stdout=PIPE, text=True)
+        assert process.stdout.readline().strip() == 'ready'
+        sleep(uniform(0.2, 1.5))
+        kill(process.pid, signal_)
+        process.wait()
+
+        finished = {name.removesuffix('.mp4') for name in listdir(join_path(folder, 'files')) if name.endswith('.mp4')}
+        recorder = DownloadRecorder()
+        recorder.path = join_path(folder, 'IDRecorder.txt')
+        recorder.read()
+        with open(recorder.path, 'rb') as f:
+            torn = not f.read().endswith(b'\n')
+        lost = len(finished - recorder.records)
+        assert recorder.records <= finished, '日志中存在未完成文件的记录'
+        if signal_ == SIGKILL:
+            assert lost <= 2 * JOURNAL_BATCH_SIZE, f'丢失 {lost} 条记录'
+        else:
+            assert lost == 0, f'SIGTERM 后丢失 {lost} 条记录'
+
+        recorder.open_()
+        recorder.close()
+        with open(recorder.path, 'rb') as f:
+            data = f.read()
+        assert not data or data.endswith(b'\n'), '重新打开后日志仍有不完整的行'
+        assert len(data.splitlines()) == len(recorder.records)
+        return len(finished), lost, torn
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for i in range(rounds):
+        signal_ = SIGKILL if i % 2 == 0 else SIGTERM
+        finished, lost, torn = drill(signal_)
+        print(f'第 {i + 1} 次演练 {signal_.name:<8}完成文件 {finished:>7}，丢失记录 {lost:>4}，'
+              f'日志末行{"不完整" if torn else "完整"}')
+    print('全部演练通过')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        child(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,195 @@
+'''本地模拟抖音服务器：模拟账号作品接口 /aweme/v1/web/aweme/post/ 的分页数据，以及作品文件下载地址 /media/
+
+作品数据、文件内容由账号与作品序号确定，多次运行结果一致；可以设置：
+每个账号作品数量、每页作品数量、图集比例与每个图集图片数量、视频/图片文件大小、
+每次请求的响应延迟、每个连接的下载带宽、请求失败比例、请求限速（429）比例
+
+运行方式：python benchmark/fake_server.py [--port 端口] [其他参数见 --help]
+启动后输出服务器地址；GET /stats 返回服务器统计数据，POST /stats/reset 清空统计数据'''
+import sys
+from argparse import ArgumentParser
+from asyncio import sleep, run as run_
+from random import Random
+from time import time
+from zlib import crc32
+from aiohttp import web
+
+POST_API = '/aweme/v1/web/aweme/post/'
+BASE_TIME = 1700000000
+PATTERN = bytes(range(256)) * 256
+
+
+class FakeDouyin:
+    def __init__(self, items: int = 200, page_size: int = 18, image_ratio: float = 0.25, images: int = 4,
+                 video_size: int = 2 * 1024 * 1024, image_size: int = 200 * 1024,
+                 latency: float = 0.0, bandwidth: int = 0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 seed: int = 0):
+        self.items = items
+        self.page_size = page_size
+        self.image_ratio = image_ratio
+        self.images = images
+        self.video_size = video_size
+        self.image_size = image_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = Random(seed)
+        self.base_url = ''
+        self.reset()
+
+    def reset(self):
+        self.stats = {
+            'pages': 0, 'items': 0, 'media_requests': 0, 'media_bytes': 0,
+            'errors': 0, 'throttled': 0, 'first_page': None, 'first_byte': None,
+        }
+
+    def application(self):
+        app = web.Application()
+        app.router.add_get(POST_API, self.post)
+        app.router.add_get('/media/{name}', self.media)
+        app.router.add_get('/stats', self.get_stats)
+        app.router.add_post('/stats/reset', self.reset_stats)
+        return app
+
+    async def post(self, request: web.Request):
+        '''按 max_cursor 返回一页作品数据，cursor 为当前页最早作品的发布时间（毫秒）'''
+        await sleep(self.latency)
+        if (response := self._fail()) is not None:
+            return response
+        sec_user_id = request.query['sec_user_id']
+        cursor = int(request.query.get('max_cursor', 0))
+        start = 0 if not cursor else (BASE_TIME - cursor // 1000) // 3600 + 1
+        end = min(start + self.page_size, self.items)
+        aweme_list = [self._item(sec_user_id, k) for k in range(start, end)]
+        self.stats['pages'] += 1
+        self.stats['items'] += len(aweme_list)
+        self.stats['first_page'] = self.stats['first_page'] or time()
+        return web.json_response({
+            'aweme_list': aweme_list,
+            'max_cursor': (BASE_TIME - (end - 1) * 3600) * 1000 if aweme_list else cursor,
+            'has_more': end < self.items,
+        })
+
+    async def media(self, request: web.Request):
+        '''返回文件内容，支持 Range 请求；按设置的带宽分块发送'''
+        await sleep(self.latency)
+        if (response := self._fail()) is not None:
+            return response
+        name = request.match_info['name']
+        total = self.video_size if name.endswith('.mp4') else self.image_size
+        start, end, status = 0, total - 1, 200
+        if range_ := request.headers.get('Range', '').removeprefix('bytes='):
+            first, _, last = range_.partition('-')
+            start = int(first or 0)
+            end = min(int(last), total - 1) if last else total - 1
+            if start >= total:
+                return web.Response(status=416, headers={'Content-Range': f'bytes */{total}'})
+            status = 206
+        headers = {'Content-Length': str(end - start + 1), 'Accept-Ranges': 'bytes'}
+        if status == 206:
+            headers['Content-Range'] = f'bytes {start}-{end}/{total}'
+        response = web.StreamResponse(status=status, headers=headers)
+        await response.prepare(request)
+        self.stats['media_requests'] += 1
+        self.stats['first_byte'] = self.stats['first_byte'] or time()
+        chunk = 64 * 1024
+        position = start
+        while position <= end:
+            size = min(chunk, end - position + 1)
+            offset = position % len(PATTERN)
+            data = (PATTERN[offset:] + PATTERN[:offset])[:size]
+            await response.write(data)
+            self.stats['media_bytes'] += size
+            position += size
+            if self.bandwidth:
+                await sleep(size / self.bandwidth)
+        await response.write_eof()
+        return response
+
+    async def get_stats(self, request: web.Request):
+        return web.json_response(self.stats)
+
+    async def reset_stats(self, request: web.Request):
+        self.reset()
+        return web.json_response(self.stats)
+
+    def _fail(self):
+        '''按设置的比例返回限速响应（429）或者服务器错误（503），与实际 CDN 相同，响应内容为空'''
+        if self.throttle_rate and self.random.random() < self.throttle_rate:
+            self.stats['throttled'] += 1
+            return web.Response(status=429, body=b'', headers={'Retry-After': '1'})
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.stats['errors'] += 1
+            return web.Response(status=503, body=b'')
+
+    def _item(self, sec_user_id: str, k: int):
+        '''生成第 k 个作品数据，发布时间每个作品间隔 1 小时'''
+        aweme_id = f'{crc32(sec_user_id.encode()) % 10 ** 6:06d}{k:013d}'
+        item = {
+            'aweme_id': aweme_id,
+            'desc': f'模拟作品描述 {k} #话题{k % 20}',
+            'create_time': BASE_TIME - k * 3600,
+            'author': {'uid': sec_user_id, 'nickname': f'模拟账号{sec_user_id}'},
+            'images': None,
+            'video': {
+                'play_addr': {'url_list': [f'{self.base_url}/media/{aweme_id}.mp4'], 'data_size': self.video_size},
+                'width': 1080,
+                'height': 1920,
+            },
+        }
+        if self.image_ratio and k % round(1 / self.image_ratio) == 0:
+            item['images'] = [{
+                'url_list': [f'{self.base_url}/media/{aweme_id}_{i}.jpeg'],
+                'width': 1080,
+                'height': 1440,
+            } for i in range(self.images)]
+        return item
+
+
+def add_arguments(parser: ArgumentParser):
+    parser.add_argument('--items', type=int, default=200, help='每个账号作品数量')
+    parser.add_argument('--page-size', type=int, default=18, help='每页作品数量')
+    parser.add_argument('--image-ratio', type=float, default=0.25, help='图集作品比例')
+    parser.add_argument('--images', type=int, default=4, help='每个图集图片数量')
+    parser.add_argument('--video-size', type=int, default=2 * 1024 * 1024, help='视频文件大小（字节）')
+    parser.add_argument('--image-size', type=int, default=200 * 1024, help='图片文件大小（字节）')
+    parser.add_argument('--latency', type=float, default=0.0, help='每次请求响应延迟（秒）')
+    parser.add_argument('--bandwidth', type=int, default=0, help='每个连接下载带宽（字节/秒），0 表示不限制')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='请求返回 503 的比例')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='请求返回 429 的比例')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def create_server(args) -> FakeDouyin:
+    return FakeDouyin(args.items, args.page_size, args.image_ratio, args.images, args.video_size, args.image_size,
+                      args.latency, args.bandwidth, args.error_rate, args.throttle_rate, args.seed)
+
+
+def main():
+    parser = ArgumentParser(description='本地模拟抖音作品接口与文件下载服务器')
+    parser.add_argument('--port', type=int, default=0, help='监听端口，0 表示自动选择')
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = create_server(args)
+
+    runner = web.AppRunner(server.application())
+
+    async def run():
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', args.port)
+        await site.start()
+        port = runner.addresses[0][1]
+        server.base_url = f'http://127.0.0.1:{port}'
+        print(server.base_url, flush=True)
+        while True:
+            await sleep(3600)
+
+    try:
+        run_(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,10 @@
-from src.scheduler import Scheduler
-
-if __name__ == '__main__':
-    Scheduler().run()
+import sys
+
+from src.scheduler import Scheduler
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['daemon']:
+        from src.daemon import Daemon
+        Daemon().run()
+    else:
+        Scheduler().run()
@@ -1,2 +1,4 @@
-from .recorder import DownloadRecorder
-from .items import DownloadItems
\ No newline at end of file
+from .recorder import DownloadRecorder
+from .items import DownloadItems
+from .index import DownloadIndex
+from .jobs import JobQueue
@@ -0,0 +1,162 @@
+from os.path import join as join_path, getsize
+from sqlite3 import connect
+from threading import Lock
+from time import time
+
+from ..config import PROJECT_ROOT, INDEX_BATCH_SIZE
+
+
+class DownloadIndex:
+    '''全局下载记录索引（SQLite），跨运行、跨账号保存已下载文件信息；
+    以 (作品 id, 文件序号) 为主键，视频文件序号为 0，图集图片文件序号从 1 开始；
+    新记录先缓存在内存中，达到 INDEX_BATCH_SIZE 条或调用 commit() 时在一个事务中批量写入；
+    contents 表为内容寻址索引（内容哈希 → 文件路径），sources 表记录文件地址与大小对应的内容哈希，用于重复文件去重'''
+    path = join_path(PROJECT_ROOT, 'DownloadIndex.db')
+
+    def __init__(self, path: str = None):
+        self.path = path or self.path
+        self.connection = None
+        self.pending = {}
+        self.pending_contents = {}
+        self.pending_sources = {}
+        self._lock = Lock()
+
+    def open_(self):
+        if self.connection is not None:
+            return
+        self.connection = connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS downloads (
+                aweme_id TEXT NOT NULL,
+                asset INTEGER NOT NULL,
+                account TEXT,
+                path TEXT,
+                size INTEGER,
+                width INTEGER,
+                height INTEGER,
+                completed REAL,
+                PRIMARY KEY (aweme_id, asset)
+            ) WITHOUT ROWID''')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS contents (
+                hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                PRIMARY KEY (hash, size)
+            ) WITHOUT ROWID''')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS sources (
+                uri TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (uri, size)
+            ) WITHOUT ROWID''')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                sec_user_id TEXT PRIMARY KEY,
+                create_time INTEGER NOT NULL,
+                cursor INTEGER,
+                updated REAL
+            )''')
+        self.connection.commit()
+
+    def contains(self, aweme_id: str, asset: int) -> bool:
+        '''判断单个文件是否存在下载记录'''
+        if (aweme_id, asset) in self.pending:
+            return True
+        with self._lock:
+            return self.connection.execute(
+                'SELECT 1 FROM downloads WHERE aweme_id = ? AND asset = ?', (aweme_id, asset)).fetchone() is not None
+
+    def downloaded(self, aweme_ids: set[str]) -> set[tuple[str, int]]:
+        '''批量查询作品的下载记录，返回已下载的 (作品 id, 文件序号) 集合'''
+        result = {key for key in list(self.pending) if key[0] in aweme_ids}
+        aweme_ids = list(aweme_ids)
+        with self._lock:
+            for i in range(0, len(aweme_ids), 500):
+                batch = aweme_ids[i:i + 500]
+                result.update(self.connection.execute(
+                    f'SELECT aweme_id, asset FROM downloads WHERE aweme_id IN ({",".join("?" * len(batch))})',
+                    batch))
+        return result
+
+    def add(self, aweme_id: str, asset: int, account: str, path: str, size: int, width: int, height: int):
+        '''添加下载记录，达到 INDEX_BATCH_SIZE 条时批量写入数据库；守护进程多个工作线程共用同一个索引'''
+        with self._lock:
+            self.pending[(aweme_id, asset)] = (aweme_id, asset, account, path, size, width, height, time())
+            full = len(self.pending) >= INDEX_BATCH_SIZE
+        if full:
+            self.commit()
+
+    def find_content(self, hash: str, size: int) -> str | None:
+        '''返回内容哈希与大小相同的已下载文件路径；文件已被删除或者大小改变时返回 None'''
+        if (path := self.pending_contents.get((hash, size))) is None:
+            with self._lock:
+                row = self.connection.execute(
+                    'SELECT path FROM contents WHERE hash = ? AND size = ?', (hash, size)).fetchone()
+            path = row and row[0]
+        try:
+            return path if path and getsize(path) == size else None
+        except OSError:
+            return
+
+    def add_content(self, hash: str, size: int, path: str):
+        with self._lock:
+            self.pending_contents[(hash, size)] = path
+
+    def find_source(self, uri: str, size: int) -> str | None:
+        '''返回文件地址与大小对应的内容哈希'''
+        if (hash := self.pending_sources.get((uri, size))) is not None:
+            return hash
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT hash FROM sources WHERE uri = ? AND size = ?', (uri, size)).fetchone()
+        return row and row[0]
+
+    def add_source(self, uri: str, size: int, hash: str):
+        with self._lock:
+            self.pending_sources[(uri, size)] = hash
+
+    def commit(self):
+        '''将缓存的下载记录、内容与来源记录在一个事务中写入数据库'''
+        with self._lock:
+            if not (self.pending or self.pending_contents or self.pending_sources) or self.connection is None:
+                return
+            records, self.pending = list(self.pending.values()), {}
+            contents, self.pending_contents = self.pending_contents, {}
+            sources, self.pending_sources = self.pending_sources, {}
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?, ?)', records)
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO contents VALUES (?, ?, ?)',
+                    ((hash, size, path) for (hash, size), path in contents.items()))
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO sources VALUES (?, ?, ?)',
+                    ((uri, size, hash) for (uri, size), hash in sources.items()))
+
+    def read_sync(self, sec_user_id: str) -> int | None:
+        '''返回账号已同步的最新作品发布时间戳（秒），没有同步记录时返回 None'''
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT create_time FROM sync_state WHERE sec_user_id = ?', (sec_user_id,)).fetchone()
+        return row[0] if row else None
+
+    def save_sync(self, sec_user_id: str, create_time: int, cursor: int):
+        '''保存账号同步位置：create_time 为已同步的最新作品发布时间戳，
+        cursor 为本次同步获取到的最早位置；已有更新的同步记录时不会回退'''
+        with self._lock, self.connection:
+            self.connection.execute('''
+                INSERT INTO sync_state VALUES (?, ?, ?, ?)
+                ON CONFLICT (sec_user_id) DO UPDATE SET
+                    create_time = max(create_time, excluded.create_time),
+                    cursor = excluded.cursor,
+                    updated = excluded.updated''', (sec_user_id, create_time, cursor, time()))
+
+    def close(self):
+        if self.connection is not None:
+            self.commit()
+            self.connection.close()
+            self.connection = None
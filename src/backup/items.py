@@ -1,40 +1,95 @@
-from os.path import (
-    join as join_path,
-    exists
-)
-from os import remove
-from json import dump, load
-from rich import print
-
-from ..config import (
-    PROJECT_ROOT,
-    ENCODE,
-    YELLOW
-)
-
-
-class DownloadItems:
-    path = join_path(PROJECT_ROOT, 'cache/ItemsInfo.json')
-
-    def read(self):
-        '''获取账号信息、作品信息并返回'''
-        if exists(self.path):
-            with open(self.path, encoding=ENCODE) as f:
-                data = load(f)
-                return (data[0], data[1:])
-        else:
-            print(f'[{YELLOW}]账号信息、作品信息数据已丢失！\n数据文件路径：{self.path}')
-            return (None, None)
-
-    def save(self, account: dict, items: list[dict]):
-        '''将账号信息及作品信息覆写到文件'''
-        with open(self.path, 'w', encoding=ENCODE) as f:
-            data = []
-            data.append(account)
-            data.extend(items)
-            dump(data, f, ensure_ascii=False, indent=4, default=lambda x: str(x))
-
-    def delete(self):
-        '''删除账号信息、作品信息信息文件'''
-        if exists(self.path):
-            remove(self.path)
+from os.path import (
+    join as join_path,
+    exists
+)
+from os import remove
+from json import dumps, loads, load
+from json.decoder import JSONDecodeError
+from rich import print
+
+from ..config import (
+    PROJECT_ROOT,
+    ENCODE,
+    YELLOW,
+    ITEMS_PAGE_SIZE
+)
+
+
+class DownloadItems:
+    '''断点数据（JSON Lines 格式）：第一行为账号信息，之后每行为一个作品信息；
+    作品信息在每页提取后追加写入，继续下载时逐行读取，不需要一次解析整个文件'''
+    path = join_path(PROJECT_ROOT, 'cache/ItemsInfo.jsonl')
+    legacy_path = join_path(PROJECT_ROOT, 'cache/ItemsInfo.json')
+
+    def __init__(self, folder: str = None):
+        '''folder 为断点数据文件夹，默认使用 cache 文件夹'''
+        if folder:
+            self.path = join_path(folder, 'ItemsInfo.jsonl')
+            self.legacy_path = join_path(folder, 'ItemsInfo.json')
+        self.f_obj = None
+
+    def read(self):
+        '''获取账号信息并返回 (账号信息, 作品信息迭代器)，迭代器每次返回最多 ITEMS_PAGE_SIZE 个作品信息'''
+        if exists(self.path):
+            f = open(self.path, encoding=ENCODE)
+            try:
+                account = loads(f.readline())
+            except JSONDecodeError:
+                f.close()
+            else:
+                return (account, self._read_pages(f))
+        elif exists(self.legacy_path):
+            with open(self.legacy_path, encoding=ENCODE) as f:
+                data = load(f)
+                return (data[0], iter((data[1:],)))
+        print(f'[{YELLOW}]账号信息、作品信息数据已丢失！\n数据文件路径：{self.path}')
+        return (None, None)
+
+    def open_(self, account: dict):
+        '''新建断点数据文件并写入账号信息'''
+        self.close()
+        self.f_obj = open(self.path, 'w', encoding=ENCODE)
+        self.f_obj.write(self._dumps(account))
+
+    def append(self, items: list[dict]):
+        '''追加写入一页作品信息'''
+        self.f_obj.write(''.join(self._dumps(item) for item in items))
+        self.f_obj.flush()
+
+    def close(self):
+        if self.f_obj is not None:
+            self.f_obj.close()
+            self.f_obj = None
+
+    def save(self, account: dict, items: list[dict]):
+        '''将账号信息及作品信息覆写到文件'''
+        self.open_(account)
+        self.append(items)
+        self.close()
+
+    def delete(self):
+        '''删除账号信息、作品信息信息文件'''
+        self.close()
+        for path in (self.path, self.legacy_path):
+            if exists(path):
+                remove(path)
+
+    @staticmethod
+    def _dumps(data: dict):
+        return dumps(data, ensure_ascii=False, separators=(',', ':'), default=lambda x: str(x)) + '\n'
+
+    @staticmethod
+    def _read_pages(f):
+        '''逐行读取作品信息；写入中断产生的不完整末行直接忽略'''
+        with f:
+            page = []
+            for line in f:
+                try:
+                    page.append(loads(line))
+                except JSONDecodeError:
+                    break
+                if len(page) >= ITEMS_PAGE_SIZE:
+                    yield page
+                    page = []
+            if page:
+                yield page
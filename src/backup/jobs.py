@@ -0,0 +1,127 @@
+from os.path import join as join_path
+from json import dumps, loads
+from sqlite3 import connect
+from threading import Lock
+from time import time
+
+from ..config import PROJECT_ROOT, JOB_RETRY, JOB_RETRY_DELAY
+
+
+class JobQueue:
+    '''守护进程账号同步任务队列（SQLite），菜单与守护进程可以同时打开；
+    任务内容为配置文件格式的账号信息（mark、url、earliest、latest），
+    priority 越大越先执行，相同优先级按计划执行时间先后执行；interval 为重复执行间隔（秒），为空时只执行一次；
+    执行失败时按 JOB_RETRY_DELAY × 2^(失败次数-1) 秒后重试，连续失败 JOB_RETRY 次后，
+    重复任务等待下一个执行间隔，一次性任务标记为 failed'''
+    path = join_path(PROJECT_ROOT, 'JobQueue.db')
+
+    def __init__(self, path: str = None):
+        self.path = path or self.path
+        self.connection = None
+        self._lock = Lock()
+
+    def open_(self):
+        if self.connection is not None:
+            return
+        self.connection = connect(self.path, check_same_thread=False, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                account TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                interval REAL,
+                next_run REAL NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                failures INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated REAL
+            )''')
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS jobs_due ON jobs (state, priority DESC, next_run)')
+        self.connection.commit()
+
+    def add(self, account: dict, priority: int = 0, interval: float = None, start: float = None) -> int:
+        '''添加任务并返回任务 id；start 为首次执行时间戳，默认立即执行'''
+        account = {key: account.get(key, '') for key in ('mark', 'url', 'earliest', 'latest')}
+        now = time()
+        with self._lock, self.connection:
+            return self.connection.execute(
+                'INSERT INTO jobs (account, priority, interval, next_run, updated) VALUES (?, ?, ?, ?, ?)',
+                (dumps(account, ensure_ascii=False), priority, interval or None, start or now, now)).lastrowid
+
+    def remove(self, id: int) -> bool:
+        with self._lock, self.connection:
+            return self.connection.execute('DELETE FROM jobs WHERE id = ?', (id,)).rowcount > 0
+
+    def jobs(self) -> list[dict]:
+        '''返回全部任务，按添加顺序排列'''
+        with self._lock:
+            rows = self.connection.execute('SELECT * FROM jobs ORDER BY id').fetchall()
+        return [self._job(row) for row in rows]
+
+    # 同一账号（url 相同）已有任务正在执行
+    _account_running = ("EXISTS (SELECT 1 FROM jobs AS running WHERE running.state = 'running' "
+                        "AND json_extract(running.account, '$.url') = json_extract(jobs.account, '$.url'))")
+
+    def claim(self) -> dict | None:
+        '''取出一个已到执行时间的任务并标记为 running；多个守护进程或者工作线程同时取出时，同一个任务只会被取出一次；
+        同一账号已有任务正在执行时跳过该账号的其他任务，避免同时下载到同一文件夹'''
+        now = time()
+        with self._lock, self.connection:
+            while row := self.connection.execute(
+                    f"SELECT * FROM jobs WHERE state = 'pending' AND next_run <= ? AND NOT {self._account_running} "
+                    'ORDER BY priority DESC, next_run LIMIT 1', (now,)).fetchone():
+                # 检查与标记在同一条语句中完成，多个守护进程同时取出时同样有效
+                if self.connection.execute(
+                        "UPDATE jobs SET state = 'running', updated = ? "
+                        f"WHERE id = ? AND state = 'pending' AND NOT {self._account_running}",
+                        (now, row[0])).rowcount:
+                    return self._job(row)
+
+    def next_run(self) -> float | None:
+        '''返回最早的待执行任务的计划执行时间'''
+        with self._lock:
+            return self.connection.execute(
+                "SELECT MIN(next_run) FROM jobs WHERE state = 'pending'").fetchone()[0]
+
+    def finish(self, job: dict, success: bool, error: str = None):
+        '''记录任务执行结果，并按执行间隔与失败次数计算下次执行时间'''
+        now = time()
+        failures = 0 if success else job['failures'] + 1
+        if 0 < failures < JOB_RETRY:
+            state, next_run = 'pending', now + JOB_RETRY_DELAY * 2 ** (failures - 1)
+        elif job['interval']:
+            # 重复任务成功或者重试次数用完后，等待下一个执行间隔，失败次数重新计算
+            state, next_run, failures = 'pending', now + job['interval'], 0
+        else:
+            state, next_run = 'done' if success else 'failed', job['next_run']
+        with self._lock, self.connection:
+            self.connection.execute(
+                'UPDATE jobs SET state = ?, next_run = ?, failures = ?, error = ?, updated = ? WHERE id = ?',
+                (state, next_run, failures, error, now, job['id']))
+
+    def recover(self) -> int:
+        '''守护进程启动时，将上次未正常结束的任务恢复为待执行（继续使用任务自己的断点数据），返回任务数量'''
+        with self._lock, self.connection:
+            return self.connection.execute(
+                "UPDATE jobs SET state = 'pending', updated = ? WHERE state = 'running'", (time(),)).rowcount
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    @staticmethod
+    def _job(row: tuple) -> dict:
+        id, account, priority, interval, next_run, state, failures, error, updated = row
+        return {
+            'id': id,
+            'account': loads(account),
+            'priority': priority,
+            'interval': interval,
+            'next_run': next_run,
+            'state': state,
+            'failures': failures,
+            'error': error,
+        }
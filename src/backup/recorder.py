@@ -1,40 +1,133 @@
-from os.path import (
-    join as join_path,
-    exists,
-)
-from os import remove
-from rich import print
-
-from ..config import (
-    YELLOW,
-    PROJECT_ROOT,
-    ENCODE
-)
-
-
-class DownloadRecorder:
-    path = join_path(PROJECT_ROOT, 'cache/IDRecorder.txt')
-
-    def __init__(self):
-        self.records = set()
-
-    def read(self):
-        '''获取下载记录，保存到 self.records'''
-        if exists(self.path):
-            with open(self.path, encoding=ENCODE) as f:
-                self.records = {line.strip() for line in f}
-        else:
-            print(f'[{YELLOW}]作品下载记录数据已丢失！\n数据文件路径：{self.path}')
-
-    def open_(self):
-        self.f_obj = open(self.path, 'a', encoding=ENCODE)
-
-    def save(self, id: str):
-        '''将已下载 id 添加到文件'''
-        self.f_obj.write(f'{id}\n')
-        self.f_obj.flush()
-
-    def delete(self):
-        '''删除下载记录文件'''
-        if exists(self.path):
-            remove(self.path)
\ No newline at end of file
+from os.path import (
+    join as join_path,
+    exists,
+)
+from os import remove, replace, fsync
+from threading import Thread, Lock, Condition
+from atexit import register, unregister
+from rich import print
+
+from ..config import (
+    YELLOW,
+    PROJECT_ROOT,
+    ENCODE,
+    JOURNAL_BATCH_SIZE, JOURNAL_INTERVAL, JOURNAL_COMPACT_SIZE
+)
+
+
+class DownloadRecorder:
+    '''本次运行的下载记录日志（只追加写入），程序异常退出后继续下载时用于跳过已下载文件；
+    save() 只将记录放入内存缓冲区，后台线程在缓冲记录达到 JOURNAL_BATCH_SIZE 条
+    或者等待超过 JOURNAL_INTERVAL 秒时，将缓冲记录一次写入文件并 fsync（组提交）；
+    close()、程序退出（包括 Ctrl+C 与 SIGTERM）时立即写入剩余记录
+
+    崩溃安全约定：
+    1. 文件下载完成并重命名为目标文件后才保存记录，日志中的记录一定对应已完成的文件
+       重命名与保存记录之间推迟处理 Ctrl+C 与 SIGTERM（deferred_interrupt），正常终止时已完成的文件一定有记录
+    2. 进程被强制结束（SIGKILL）或系统断电时，只丢失尚未完成 fsync 的记录：缓冲区中的一批与正在写入的一批，
+       即最近 JOURNAL_INTERVAL 秒内、最多 2 × JOURNAL_BATCH_SIZE 条记录；这些文件在继续下载时按文件已存在跳过
+    3. 写入中断产生的不完整末行在读取时丢弃，并在下次打开日志时通过压缩日志清除
+    4. 只保证记录本身落盘，不对下载文件执行 fsync，系统断电后文件内容是否完整由文件系统决定'''
+    path = join_path(PROJECT_ROOT, 'cache/IDRecorder.txt')
+
+    def __init__(self, folder: str = None):
+        '''folder 为断点数据文件夹，默认使用 cache 文件夹'''
+        if folder:
+            self.path = join_path(folder, 'IDRecorder.txt')
+        self.records = set()
+        self.lines = 0
+        self.f_obj = None
+        self._buffer = []
+        self._closing = False
+        self._thread = None
+        self._lock = Lock()
+        self._condition = Condition(self._lock)
+        self._write_lock = Lock()
+
+    def read(self):
+        '''获取下载记录，保存到 self.records'''
+        if exists(self.path):
+            with open(self.path, encoding=ENCODE) as f:
+                self.records = {line.strip() for line in f if line.endswith('\n')}
+        else:
+            print(f'[{YELLOW}]作品下载记录数据已丢失！\n数据文件路径：{self.path}')
+
+    def open_(self):
+        '''打开日志文件并启动后台写入线程；日志末尾存在不完整的行或者重复记录过多时先压缩日志'''
+        if exists(self.path):
+            self._compact()
+        self.f_obj = open(self.path, 'a', encoding=ENCODE)
+        self._closing = False
+        self._thread = Thread(target=self._commit_loop, daemon=True)
+        self._thread.start()
+        register(self.flush)
+
+    def save(self, id: str):
+        '''将已下载 id 放入缓冲区，由后台线程批量写入文件'''
+        with self._condition:
+            self.records.add(id)
+            self._buffer.append(id)
+            if len(self._buffer) >= JOURNAL_BATCH_SIZE:
+                self._condition.notify()
+
+    def flush(self):
+        '''立即将缓冲区中的记录写入文件并 fsync'''
+        self._commit()
+
+    def close(self):
+        '''写入剩余记录，停止后台写入线程并关闭日志文件；重复记录过多时压缩日志'''
+        if self.f_obj is None:
+            return
+        with self._condition:
+            self._closing = True
+            self._condition.notify()
+        self._thread.join()
+        unregister(self.flush)
+        self._commit()
+        self.f_obj.close()
+        self.f_obj = None
+        if self.lines - len(self.records) >= JOURNAL_COMPACT_SIZE:
+            self._compact()
+
+    def delete(self):
+        '''删除下载记录文件'''
+        if exists(self.path):
+            remove(self.path)
+
+    def _commit_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closing or len(self._buffer) >= JOURNAL_BATCH_SIZE, JOURNAL_INTERVAL)
+                closing = self._closing
+            self._commit()
+            if closing:
+                return
+
+    def _commit(self):
+        '''取出缓冲区中的全部记录，一次写入文件并 fsync；写入文件时不占用缓冲区的锁，不阻塞 save()'''
+        with self._write_lock:
+            with self._lock:
+                buffer, self._buffer = self._buffer, []
+            if not buffer or self.f_obj is None:
+                return
+            self.f_obj.write(''.join(f'{id}\n' for id in buffer))
+            self.f_obj.flush()
+            fsync(self.f_obj.fileno())
+            self.lines += len(buffer)
+
+    def _compact(self):
+        '''压缩日志：丢弃不完整的末行与重复记录，写入临时文件并 fsync 后原子替换日志文件'''
+        with open(self.path, encoding=ENCODE, errors='replace') as f:
+            lines = f.readlines()
+        records = dict.fromkeys(line for line in lines if line.endswith('\n'))
+        self.lines = len(records)
+        if (lines and not lines[-1].endswith('\n')) or len(lines) - len(records) >= JOURNAL_COMPACT_SIZE:
+            temp = f'{self.path}.tmp'
+            with open(temp, 'w', encoding=ENCODE) as f:
+                f.writelines(records)
+                f.flush()
+                fsync(f.fileno())
+            replace(temp, self.path)
+        else:
+            self.lines = len(lines)
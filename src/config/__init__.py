@@ -1,14 +1,36 @@
-from .constant import (
-    PROJECT_ROOT,
-    ENCODE,
-    USER_AGENT, PHONE_USER_AGENT,
-    RETRY_ACCOUNT, RETRY_FILE,
-    TEXT_REPLACEMENT,
-    DESCRIPTION_LENGTH,
-    WHITE, YELLOW, GREEN, RED, CYAN, MAGENTA,
-    CHUNK,
-    TIMEOUT,
-    CONCURRENCY
-)
-from .cookie import Cookie
-from .settings import Settings
+from .constant import (
+    PROJECT_ROOT,
+    ENCODE,
+    USER_AGENT, PHONE_USER_AGENT,
+    RETRY_ACCOUNT, RETRY_FILE,
+    TEXT_REPLACEMENT,
+    DESCRIPTION_LENGTH,
+    WHITE, YELLOW, GREEN, RED, CYAN, MAGENTA,
+    CHUNK,
+    TIMEOUT,
+    CONCURRENCY, CONCURRENCY_MIN, CONCURRENCY_MAX, CONCURRENCY_PER_HOST,
+    CONCURRENCY_INTERVAL, CONCURRENCY_GAIN, CONCURRENCY_DECREASE,
+    BANDWIDTH_LIMIT, BANDWIDTH_BURST,
+    SIZE_PROBE, SIZE_ESTIMATE_IMAGE, SIZE_ESTIMATE_VIDEO,
+    WRITER_THREADS, WRITE_BUFFERS, WRITE_BUFFER_SIZE,
+    DEDUP, DEDUP_PRECHECK, DEDUP_REFLINK, DEDUP_HASH,
+    MS_TOKEN_TTL, TTWID_TTL, TOKEN_REFRESH_MARGIN, TOKEN_RETRY_INTERVAL,
+    CONNECTION_LIMIT, CONNECTION_LIMIT_PER_HOST, DNS_CACHE_TTL, KEEPALIVE_TIMEOUT,
+    SIGN_POOL_SIZE, SIGN_WARM_UP,
+    SEGMENT_DOWNLOAD, SEGMENT_THRESHOLD, SEGMENT_NUMBER,
+    PIPELINE_ACCOUNTS, PIPELINE_DEPTH,
+    ACQUIRE_ACCOUNTS, ACQUIRE_CONCURRENCY,
+    RATE_LIMIT, RATE_BURST, RATE_MIN, RATE_MAX,
+    RATE_INCREASE, RATE_DECREASE, RATE_SUCCESS_THRESHOLD,
+    STREAM_DOWNLOAD, STREAM_QUEUE_SIZE,
+    INDEX_BATCH_SIZE,
+    INCREMENTAL_SYNC,
+    DATE_CACHE_SIZE,
+    JOURNAL_BATCH_SIZE, JOURNAL_INTERVAL, JOURNAL_COMPACT_SIZE,
+    ITEMS_PAGE_SIZE,
+    METRICS_TEXTFILE, METRICS_SUMMARY,
+    PROGRESS_MODE, PROGRESS_INTERVAL, PROGRESS_REFRESH,
+    DAEMON_WORKERS, DAEMON_POLL_INTERVAL, JOB_RETRY, JOB_RETRY_DELAY
+)
+from .cookie import Cookie
+from .settings import Settings
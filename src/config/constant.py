@@ -1,36 +1,145 @@
-from os.path import dirname
-from os import name
-
-PROJECT_ROOT = dirname(dirname(dirname(__file__)))
-
-ENCODE = 'UTF-8-SIG' if name == 'nt' else 'UTF-8'
-
-USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-PHONE_USER_AGENT = 'com.ss.android.ugc.trill/494+Mozilla/5.0+(Linux;+Android+12;+2112123G+Build/SKQ1.211006.001;+wv)+AppleWebKit/537.36+(KHTML,+like+Gecko)+Version/4.0+Chrome/107.0.5304.105+Mobile+Safari/537.36'
-
-# 颜色设置，支持标准颜色名称、Hex、RGB 格式
-WHITE = '#aaaaaa'
-CYAN = 'bright_cyan'
-RED = 'bright_red'
-YELLOW = 'bright_yellow'
-GREEN = 'bright_green'
-MAGENTA = 'bright_magenta'
-
-# 文件 desc 最大长度限制
-DESCRIPTION_LENGTH = 64
-
-# 重新执行的最大次数
-RETRY_ACCOUNT = 3
-RETRY_FILE = 2
-
-# 非法字符集合
-TEXT_REPLACEMENT = frozenset()
-
-# 每次从服务器接收的数据块大小
-CHUNK = 1024 * 1024
-
-# 请求超时时间
-TIMEOUT = 60 * 5
-
-# 文件下载最大协程数
-CONCURRENCY = 5
+from os.path import dirname, join as join_path
+from os import name
+
+PROJECT_ROOT = dirname(dirname(dirname(__file__)))
+
+ENCODE = 'UTF-8-SIG' if name == 'nt' else 'UTF-8'
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+PHONE_USER_AGENT = 'com.ss.android.ugc.trill/494+Mozilla/5.0+(Linux;+Android+12;+2112123G+Build/SKQ1.211006.001;+wv)+AppleWebKit/537.36+(KHTML,+like+Gecko)+Version/4.0+Chrome/107.0.5304.105+Mobile+Safari/537.36'
+
+# 颜色设置，支持标准颜色名称、Hex、RGB 格式
+WHITE = '#aaaaaa'
+CYAN = 'bright_cyan'
+RED = 'bright_red'
+YELLOW = 'bright_yellow'
+GREEN = 'bright_green'
+MAGENTA = 'bright_magenta'
+
+# 文件 desc 最大长度限制
+DESCRIPTION_LENGTH = 64
+
+# 重新执行的最大次数
+RETRY_ACCOUNT = 3
+RETRY_FILE = 2
+
+# 非法字符集合
+TEXT_REPLACEMENT = frozenset()
+
+# 每次从服务器接收的数据块大小
+CHUNK = 1024 * 1024
+
+# 请求超时时间
+TIMEOUT = 60 * 5
+
+# 自适应文件下载并发：同时下载文件数量的初始值、最小值、最大值、每个主机的最大值（不超过 CONNECTION_LIMIT_PER_HOST）；
+# 每 CONCURRENCY_INTERVAL 秒按总下载速度调整一次，速度变化超过 CONCURRENCY_GAIN 视为有效变化，
+# 出现超时、网络异常、限速或者服务器错误响应时乘以 CONCURRENCY_DECREASE
+CONCURRENCY = 5
+CONCURRENCY_MIN = 1
+CONCURRENCY_MAX = 20
+CONCURRENCY_PER_HOST = 10
+CONCURRENCY_INTERVAL = 1
+CONCURRENCY_GAIN = 0.05
+CONCURRENCY_DECREASE = 0.5
+
+# 全局下载带宽限制(字节/秒)，0 表示不限制；令牌桶容量(字节)
+BANDWIDTH_LIMIT = 0
+BANDWIDTH_BURST = CHUNK * 2
+
+# 下载顺序：小文件优先。视频大小优先使用作品数据中的 data_size；
+# 开启 SIZE_PROBE 时，下载前对大小未知的文件发送 HEAD 请求获取 content-length，否则按类型使用估计大小(字节)
+SIZE_PROBE = False
+SIZE_ESTIMATE_IMAGE = 1024 * 512
+SIZE_ESTIMATE_VIDEO = 1024 * 1024 * 16
+
+# 文件写入：写入线程数量、每个文件最多等待写入的缓冲区数量、缓冲区大小(字节)
+WRITER_THREADS = 4
+WRITE_BUFFERS = 2
+WRITE_BUFFER_SIZE = CHUNK
+
+# 重复文件去重：下载时计算文件内容哈希，内容与已下载文件相同时替换为硬链接（DEDUP_REFLINK 为 True 且文件系统支持时使用 reflink）；
+# 开启 DEDUP_PRECHECK 时，下载前按文件地址与大小查询已下载的内容，相同则直接创建链接，不再下载
+DEDUP = False
+DEDUP_PRECHECK = False
+DEDUP_REFLINK = True
+DEDUP_HASH = 'sha256'
+
+# 守护进程（python run.py daemon）：同时执行的任务数量、没有任务时检查任务队列的间隔(秒)、
+# 任务连续失败的重试次数、首次重试等待时间(秒，之后每次翻倍)
+DAEMON_WORKERS = 2
+DAEMON_POLL_INTERVAL = 5
+JOB_RETRY = 3
+JOB_RETRY_DELAY = 60
+
+# msToken、ttwid 参数缓存（保存到 TokenCache.json）：有效期(秒)、过期前提前在后台更新的时间(秒)、获取失败后重试间隔(秒)
+MS_TOKEN_TTL = 60 * 60 * 4
+TTWID_TTL = 60 * 60 * 24 * 7
+TOKEN_REFRESH_MARGIN = 60 * 10
+TOKEN_RETRY_INTERVAL = 60
+
+# 文件下载共享连接池：总连接数上限、单个主机连接数上限、DNS 缓存时间(秒)、空闲连接保持时间(秒)
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 10
+DNS_CACHE_TTL = 60 * 5
+KEEPALIVE_TIMEOUT = 30
+
+# a_bogus 签名引擎上下文池大小；是否在程序启动时后台预先创建上下文
+SIGN_POOL_SIZE = 2
+SIGN_WARM_UP = True
+
+# 分段下载：是否开启、文件大小超过该值(字节)时分段、分段数量
+SEGMENT_DOWNLOAD = False
+SEGMENT_THRESHOLD = 1024 * 1024 * 64
+SEGMENT_NUMBER = 4
+
+# 多账号流水线：下载当前账号作品文件时，后台获取后续账号作品数据；等待下载的账号数量上限
+PIPELINE_ACCOUNTS = True
+PIPELINE_DEPTH = 1
+
+# 异步获取账号作品数据：同时翻页的账号数量、所有账号共享的同时请求数量
+ACQUIRE_ACCOUNTS = 3
+ACQUIRE_CONCURRENCY = 2
+
+# 请求限速：初始速率(次/秒)、令牌桶容量、最低与最高速率、
+# 连续成功 RATE_SUCCESS_THRESHOLD 次后速率增加值、失败后速率乘数
+RATE_LIMIT = 0.4
+RATE_BURST = 2
+RATE_MIN = 0.1
+RATE_MAX = 2
+RATE_INCREASE = 0.1
+RATE_DECREASE = 0.5
+RATE_SUCCESS_THRESHOLD = 5
+
+# 单账号边获取边下载：是否开启、等待下载的任务数量上限
+STREAM_DOWNLOAD = False
+STREAM_QUEUE_SIZE = 100
+
+# 增量同步：记录每个账号已同步的最新作品，之后只获取新发布的作品
+INCREMENTAL_SYNC = False
+
+# 全局下载记录索引每次批量写入的记录数量
+INDEX_BATCH_SIZE = 200
+
+# 文件名日期格式化结果的缓存数量
+DATE_CACHE_SIZE = 4096
+
+# 下载记录日志组提交：缓冲记录数量、最长等待时间(秒)；重复记录达到 JOURNAL_COMPACT_SIZE 条时压缩日志
+JOURNAL_BATCH_SIZE = 64
+JOURNAL_INTERVAL = 1
+JOURNAL_COMPACT_SIZE = 1000
+
+# 继续上次下载时每次从断点数据中读取的作品数量
+ITEMS_PAGE_SIZE = 100
+
+# 运行结束时写入的指标文件：Prometheus textfile（可设置为 node exporter textfile collector 目录下的文件）与 JSON 汇总
+METRICS_TEXTFILE = join_path(PROJECT_ROOT, 'metrics', 'douyin.prom')
+METRICS_SUMMARY = join_path(PROJECT_ROOT, 'metrics', 'summary.json')
+
+# 下载进度显示方式：rich 为每个文件显示进度条并逐个输出下载结果；
+# headless 为无界面模式，汇总全部文件进度并每隔 PROGRESS_INTERVAL 秒输出一行，跳过的文件按批次汇总数量；
+# auto 时标准输出为终端则使用 rich，否则（cron、容器、重定向到文件）使用 headless
+PROGRESS_MODE = 'auto'
+PROGRESS_INTERVAL = 10
+# rich 进度条每秒刷新次数
+PROGRESS_REFRESH = 4
@@ -0,0 +1,107 @@
+from os import replace
+from os.path import join as join_path, exists
+from json import dump, load
+from json.decoder import JSONDecodeError
+from time import time
+from threading import Lock, Event, Thread
+from concurrent.futures import ThreadPoolExecutor
+
+from .constant import (
+    PROJECT_ROOT,
+    ENCODE,
+    MS_TOKEN_TTL, TTWID_TTL,
+    TOKEN_REFRESH_MARGIN, TOKEN_RETRY_INTERVAL
+)
+from .. import encrypt_params
+
+
+class TokenCache:
+    '''msToken、ttwid 参数缓存：每个参数按 TTL 保存到文件，跨运行复用；
+    缺少或者已过期的参数同时请求获取，需要等待；即将过期（不足 TOKEN_REFRESH_MARGIN 秒）的参数由后台线程提前更新，不阻塞下载；
+    获取失败时继续使用旧值，TOKEN_RETRY_INTERVAL 秒后重试'''
+    path = join_path(PROJECT_ROOT, 'TokenCache.json')
+
+    def __init__(self):
+        # 首次获取参数时才导入 encrypt_params 子模块
+        self.fetchers = {
+            'msToken': (lambda: encrypt_params.MsToken.get_real_ms_token(), MS_TOKEN_TTL),
+            'ttwid': (lambda: encrypt_params.TtWid.get_tt_wid(), TTWID_TTL),
+        }
+        self.tokens = self._read()
+        self.retry = {}
+        self.thread = None
+        self._lock = Lock()
+        # 同一时间只有一个线程获取参数（get() 与后台更新线程）
+        self._fetching = Lock()
+        self._wake = Event()
+        self._closed = False
+
+    def get(self) -> dict:
+        '''返回全部参数合并后的 dict；没有有效值的参数先同时获取，并启动后台更新线程；
+        后台线程正在获取参数时等待其完成，不重复获取'''
+        if self._missing():
+            with self._fetching:
+                if missing := self._missing():
+                    self._fetch(missing)
+        if self.thread is None:
+            self.thread = Thread(target=self._refresh_loop, daemon=True)
+            self.thread.start()
+        result = {}
+        with self._lock:
+            for token in self.tokens.values():
+                result |= token['value']
+        return result
+
+    def close(self):
+        '''停止后台更新线程；正在进行的更新不等待完成（守护线程，文件先写入临时文件再替换，不会损坏）'''
+        self._closed = True
+        self._wake.set()
+
+    def _missing(self) -> list[str]:
+        '''没有有效值且不在重试等待时间内的参数'''
+        now = time()
+        return [name for name in self.fetchers if self._expires(name) <= now and self.retry.get(name, 0) <= now]
+
+    def _expires(self, name: str) -> float:
+        return token['expires'] if (token := self.tokens.get(name)) else 0
+
+    def _fetch(self, names: list[str]):
+        '''同时获取多个参数，成功的参数保存到文件；调用时需要持有 self._fetching'''
+        with ThreadPoolExecutor(len(names)) as executor:
+            values = list(executor.map(lambda name: self.fetchers[name][0](), names))
+        now = time()
+        with self._lock:
+            for name, value in zip(names, values):
+                if isinstance(value, dict):
+                    self.tokens[name] = {'value': value, 'expires': now + self.fetchers[name][1]}
+                    self.retry.pop(name, None)
+                else:
+                    self.retry[name] = now + TOKEN_RETRY_INTERVAL
+            if any(isinstance(value, dict) for value in values):
+                self._save()
+
+    def _refresh_loop(self):
+        '''在参数过期前 TOKEN_REFRESH_MARGIN 秒更新参数'''
+        while not self._closed:
+            with self._fetching:
+                now = time()
+                due = {name: max(self._expires(name) - TOKEN_REFRESH_MARGIN, self.retry.get(name, 0))
+                       for name in self.fetchers}
+                if names := [name for name, at in due.items() if at <= now]:
+                    self._fetch(names)
+                    continue
+            self._wake.wait(min(due.values()) - now)
+
+    def _read(self):
+        if exists(self.path):
+            try:
+                with open(self.path, encoding=ENCODE) as f:
+                    return {name: token for name, token in load(f).items() if name in self.fetchers}
+            except (JSONDecodeError, AttributeError):
+                pass
+        return {}
+
+    def _save(self):
+        with open(temp := f'{self.path}.tmp', 'w', encoding=ENCODE) as f:
+            dump(self.tokens, f, ensure_ascii=False, indent=4)
+        replace(temp, self.path)
@@ -0,0 +1,126 @@
+from os.path import join as join_path
+from threading import Thread, Event, Lock
+from signal import signal, SIGINT, SIGTERM
+from time import time, sleep
+from rich import print
+
+from .config import (
+    PROJECT_ROOT,
+    TEXT_REPLACEMENT,
+    WHITE, YELLOW, GREEN, CYAN,
+    METRICS_TEXTFILE, METRICS_SUMMARY,
+    SIGN_WARM_UP,
+    DAEMON_WORKERS, DAEMON_POLL_INTERVAL
+)
+from .config import Settings, Cookie
+from .tool import Cleaner, metrics
+from .backup import DownloadIndex, JobQueue
+from .scheduler import Scheduler
+
+
+class Daemon:
+    '''守护进程：从任务队列（JobQueue）取出账号同步任务，由 DAEMON_WORKERS 个工作线程同时执行，
+    单个账号获取缓慢或者失败不影响其他任务；签名引擎、带宽限速器（全部工作线程共用）、每个工作线程的下载连接池与事件循环、
+    msToken/ttwid 缓存在整个运行期间保持，不会在每个任务中重新创建；
+    每个任务的断点数据保存在 jobs/<任务 id> 文件夹，任务失败或者中断时保留，下次执行时继续下载；
+    收到 Ctrl+C 或者 SIGTERM 后不再取出新任务，等待正在执行的任务结束，再次收到时立即退出，
+    未结束的任务在下次启动时恢复为待执行'''
+    folder = join_path(PROJECT_ROOT, 'jobs')
+
+    def __init__(self, workers: int = DAEMON_WORKERS):
+        self.settings = Settings()
+        self.cleaner = Cleaner()
+        self.cookie = Cookie(self.settings)
+        self.download_index = DownloadIndex()
+        self.job_queue = JobQueue()
+        # 带宽限速器由全部工作线程共用，总下载速度不超过 BANDWIDTH_LIMIT
+        from .download import Download
+        bandwidth = Download.create_bandwidth_limiter()
+        self.workers = [Scheduler(self.settings, self.cookie, self.download_index, self.cleaner, bandwidth)
+                        for _ in range(max(workers, 1))]
+        self.stopping = Event()
+        self.active = 0
+        self._lock = Lock()
+
+    def run(self):
+        signal(SIGINT, Scheduler._terminate)
+        signal(SIGTERM, Scheduler._terminate)
+        if SIGN_WARM_UP:
+            Thread(target=Scheduler._warm_up, daemon=True).start()
+        self.cleaner.set_rule(TEXT_REPLACEMENT)
+        self.settings.load_settings()
+        self.download_index.open_()
+        self.job_queue.open_()
+        if recovered := self.job_queue.recover():
+            print(f'[{YELLOW}]{recovered} 个任务上次未正常结束，将从断点继续执行')
+        self.active = len(self.workers)
+        for worker in self.workers:
+            Thread(target=self._work, args=(worker,), daemon=True).start()
+        print(f'[{CYAN}]守护进程已启动，同时执行 {len(self.workers)} 个任务，按 Ctrl+C 停止')
+        try:
+            self._wait()
+        except KeyboardInterrupt:
+            print(f'[{YELLOW}]\n不再取出新任务，等待正在执行的任务结束；再次按 Ctrl+C 立即退出')
+            self.stopping.set()
+            try:
+                self._wait()
+            except KeyboardInterrupt:
+                # 工作线程仍在使用下载索引与连接池，不关闭；下载记录日志在退出时写入
+                metrics.write(METRICS_TEXTFILE, METRICS_SUMMARY)
+                print(f'[{WHITE}]守护进程立即退出，未结束的任务下次启动时继续执行')
+                return
+        self.close()
+
+    def close(self):
+        try:
+            for worker in self.workers:
+                if 'download' in worker.__dict__:
+                    worker.download.close()
+            self.cookie.close()
+            self.download_index.close()
+            self.job_queue.close()
+            metrics.write(METRICS_TEXTFILE, METRICS_SUMMARY)
+        finally:
+            print(f'[{WHITE}]守护进程结束运行')
+
+    def _wait(self):
+        '''等待全部工作线程结束；不使用 Thread.join()，Ctrl+C 中断 join() 后线程状态可能错误'''
+        while self.active:
+            sleep(1)
+
+    def _work(self, worker: Scheduler):
+        try:
+            while not self.stopping.is_set():
+                if (job := self.job_queue.claim()) is None:
+                    self.stopping.wait(self._idle_time())
+                else:
+                    self._run_job(worker, job)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _idle_time(self):
+        '''没有可执行的任务时等待的时间：不超过 DAEMON_POLL_INTERVAL 秒，以便发现菜单新添加的任务'''
+        if (next_run := self.job_queue.next_run()) is None:
+            return DAEMON_POLL_INTERVAL
+        return min(max(next_run - time(), 0), DAEMON_POLL_INTERVAL)
+
+    def _run_job(self, worker: Scheduler, job: dict):
+        account = job['account']
+        name = account['mark'] or account['url']
+        print(f'[{CYAN}]\n开始执行任务 {job["id"]}：{name}')
+        try:
+            success = worker.run_job(self.settings.load_account(account), join_path(self.folder, str(job['id'])))
+            error = None if success else '作品数据获取不完整或者部分文件下载失败'
+        except Exception as e:
+            # 单个任务出错不影响工作线程继续执行其他任务
+            success, error = False, repr(e)
+        self.job_queue.finish(job, success, error)
+        metrics.inc('jobs_total', result='success' if success else 'failed')
+        # 守护进程长时间运行，每个任务结束后更新指标文件
+        with self._lock:
+            metrics.write(METRICS_TEXTFILE, METRICS_SUMMARY)
+        if success:
+            print(f'[{GREEN}]任务 {job["id"]}：{name} 执行成功')
+        else:
+            print(f'[{YELLOW}]任务 {job["id"]}：{name} 执行失败：{error}')
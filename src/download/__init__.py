@@ -1,3 +1,24 @@
-from .acquire import Acquire
-from .parse import Parse
-from .download import Download
\ No newline at end of file
+'''作品数据获取、提取与文件下载；子模块在首次使用对应名称时才导入（aiohttp、requests、rich.progress 导入耗时较长，不影响程序启动）'''
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .acquire import Acquire
+    from .acquire_async import AsyncAcquire
+    from .parse import Parse
+    from .download import Download
+
+_exports = {
+    'Acquire': '.acquire',
+    'AsyncAcquire': '.acquire_async',
+    'Parse': '.parse',
+    'Download': '.download',
+}
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    if (module := _exports.get(name)) is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = globals()[name] = getattr(import_module(module, __name__), name)
+    return value
@@ -1,133 +1,179 @@
-from datetime import date
-from urllib.parse import urlencode
-from requests import exceptions, get
-from rich.progress import (
-    BarColumn,
-    Progress,
-    TextColumn,
-    TimeElapsedColumn,
-)
-from random import randint
-from time import sleep
-from rich import print
-
-from ..config import MAGENTA, YELLOW, TIMEOUT
-from ..encrypt_params import get_a_bogus
-from ..tool import retry
-from ..config import Settings
-
-
-class Acquire():
-    post_api = 'https://www.douyin.com/aweme/v1/web/aweme/post/'
-
-    def __init__(self, settings: Settings):
-        self.settings = settings
-
-    def request_items(self, sec_user_id: str, earliest: date):
-        '''获取账号作品数据并返回'''
-        items = []
-        with self._progress_object() as progress:
-            task_id = progress.add_task('正在获取账号主页数据', total=None)
-            self.cursor = 0
-            self.finished = False
-            while not self.finished:
-                progress.update(task_id)
-                if (items_page := self._request_items_page(sec_user_id)):
-                    if not items_page == [None]:
-                        items.extend(items_page)
-                    self._early_stop(earliest)
-        return items
-
-    def _progress_object(self):
-        return Progress(
-            TextColumn('[progress.description]{task.description}', style=MAGENTA, justify='left'),
-            '•',
-            BarColumn(bar_width=20),
-            '•',
-            TimeElapsedColumn(),
-            transient=True,
-        )
-
-    @retry
-    def _request_items_page(self, sec_user_id: str):
-        '''获取单页作品数据，更新 self.cursor'''
-        params = {
-            'device_platform': 'webapp',
-            'aid': '6383',
-            'channel': 'channel_pc_web',
-            'sec_user_id': sec_user_id,
-            'max_cursor': self.cursor,
-            'locate_query': 'false',
-            'show_live_replay_strategy': '1',
-            'need_time_list': '0' if self.cursor else '1',
-            'time_list_query': '0',
-            'whale_cut_token': '',
-            'cut_version': '1',
-            'count': '18',
-            'publish_video_strategy_type': '2',
-            'pc_client_type': '1',
-            'version_code': '170400',
-            'version_name': '17.4.0',
-            'cookie_enabled': 'true',
-            'platform': 'PC',
-            'downlink': '10',
-        }
-        self._deal_url_params(params)
-        if not (data := self._send_get(params=params)):
-            print(f'[{YELLOW}]获取账号作品数据失败')
-            self.finished = True
-        else:
-            try:
-                if (items_page := data['aweme_list']) is None:
-                    print(f'[{YELLOW}]该账号为私密账号，需要使用登录后的 Cookie，且登录的账号需要关注该私密账号')
-                    self.finished = True
-                else:
-                    self.cursor = data['max_cursor']
-                    self.finished = not data['has_more']
-                    return items_page or [None]
-            except KeyError:
-                print(f'[{YELLOW}]账号作品数据响应内容异常: {data}')
-                self.finished = True
-
-    def _send_get(self, params):
-        '''返回 json 格式数据'''
-        try:
-            response = get(
-                self.post_api,
-                params=params,
-                timeout=TIMEOUT,
-                headers=self.settings.headers)
-            self._wait()
-        except (
-                exceptions.ProxyError,
-                exceptions.SSLError,
-                exceptions.ChunkedEncodingError,
-                exceptions.ConnectionError,
-        ):
-            print(f'[{YELLOW}]网络异常，请求 {self.post_api}?{urlencode(params)} 失败')
-            return
-        except exceptions.ReadTimeout:
-            print(f'[{YELLOW}]网络异常，请求 {self.post_api}?{urlencode(params)} 超时')
-            return
-        try:
-            return response.json()
-        except exceptions.JSONDecodeError:
-            if response.text:
-                print(f'[{YELLOW}]响应内容不是有效的 JSON 格式：{response.text}')
-            else:
-                print(f'[{YELLOW}]响应内容为空，可能是接口失效或者 Cookie 失效，请尝试更新 Cookie')
-
-    @staticmethod
-    def _wait():
-        sleep(randint(15, 45)/10)
-
-    def _deal_url_params(self, params: dict, number: int = 8):
-        '''添加 msToken、X-Bogus'''
-        if 'msToken' in self.settings.cookies:
-            params['msToken'] = self.settings.cookies['msToken']
-        params['a_bogus'] = get_a_bogus(params)
-
-    def _early_stop(self, earliest: date):
-        '''如果获取数据的发布日期已经早于限制日期，就不需要再获取下一页的数据了'''
-        if earliest > date.fromtimestamp(self.cursor / 1000):
-            self.finished = True
+from datetime import date
+from time import perf_counter
+from urllib.parse import urlencode
+from requests import exceptions, get
+from rich.progress import (
+    BarColumn,
+    Progress,
+    TextColumn,
+    TimeElapsedColumn,
+)
+from rich import print
+
+from ..config import MAGENTA, YELLOW, TIMEOUT
+from ..encrypt_params import get_a_bogus
+from ..tool import retry, RateLimiter, rate_limiter, metrics, headless_mode
+from ..config import Settings
+
+
+class Acquire():
+    post_api = 'https://www.douyin.com/aweme/v1/web/aweme/post/'
+
+    def __init__(self, settings: Settings, limiter: RateLimiter = rate_limiter):
+        self.settings = settings
+        self.limiter = limiter
+
+    def request_items(self, sec_user_id: str, earliest: date, show_progress: bool = True, synced: int = None):
+        '''获取账号作品数据并返回；show_progress 为 False 或者使用无界面进度时不显示进度条，
+        用于与下载进度条同时运行的场景；synced 为已同步的最新作品发布时间戳，
+        翻页到该时间之前的作品时停止获取'''
+        items = []
+        for items_page in self.iter_pages(sec_user_id, earliest, show_progress, synced):
+            items.extend(items_page)
+        return items
+
+    def iter_pages(self, sec_user_id: str, earliest: date, show_progress: bool = True, synced: int = None):
+        '''逐页获取账号作品数据，每次返回一页非空的作品数据；
+        结束后 self.complete 表示是否正常获取到最后一页（未因请求失败而中断）'''
+        with self._progress_object(not show_progress or headless_mode()) as progress:
+            task_id = progress.add_task('正在获取账号主页数据', total=None)
+            self.cursor = 0
+            self.finished = False
+            self.complete = False
+            while not self.finished:
+                progress.update(task_id, description=f'正在获取账号主页数据（{self.limiter.rate:.2f} 次/秒）')
+                items_page = self._request_items_page(sec_user_id)
+                self.complete = bool(items_page)
+                if items_page:
+                    self._early_stop(earliest, synced)
+                    if not items_page == [None]:
+                        yield items_page
+
+    def _progress_object(self, disable: bool = False):
+        return Progress(
+            TextColumn('[progress.description]{task.description}', style=MAGENTA, justify='left'),
+            '•',
+            BarColumn(bar_width=20),
+            '•',
+            TimeElapsedColumn(),
+            transient=True,
+            disable=disable,
+        )
+
+    @retry
+    def _request_items_page(self, sec_user_id: str):
+        '''获取单页作品数据，更新 self.cursor'''
+        params = self._generate_params(sec_user_id, self.cursor)
+        self._deal_url_params(params)
+        items_page, self.cursor, self.finished = self._deal_items_page(self._send_get(params=params), self.cursor)
+        return items_page
+
+    @staticmethod
+    def _generate_params(sec_user_id: str, cursor: int):
+        '''生成单页作品数据请求参数'''
+        return {
+            'device_platform': 'webapp',
+            'aid': '6383',
+            'channel': 'channel_pc_web',
+            'sec_user_id': sec_user_id,
+            'max_cursor': cursor,
+            'locate_query': 'false',
+            'show_live_replay_strategy': '1',
+            'need_time_list': '0' if cursor else '1',
+            'time_list_query': '0',
+            'whale_cut_token': '',
+            'cut_version': '1',
+            'count': '18',
+            'publish_video_strategy_type': '2',
+            'pc_client_type': '1',
+            'version_code': '170400',
+            'version_name': '17.4.0',
+            'cookie_enabled': 'true',
+            'platform': 'PC',
+            'downlink': '10',
+        }
+
+    @staticmethod
+    def _deal_items_page(data: dict | None, cursor: int):
+        '''解析单页作品数据响应内容，返回 (作品数据, 下一页 cursor, 是否结束)'''
+        if not data:
+            print(f'[{YELLOW}]获取账号作品数据失败')
+            return None, cursor, True
+        try:
+            if (items_page := data['aweme_list']) is None:
+                print(f'[{YELLOW}]该账号为私密账号，需要使用登录后的 Cookie，且登录的账号需要关注该私密账号')
+                return None, cursor, True
+            return items_page or [None], data['max_cursor'], not data['has_more']
+        except KeyError:
+            print(f'[{YELLOW}]账号作品数据响应内容异常: {data}')
+            return None, cursor, True
+
+    def _send_get(self, params):
+        '''返回 json 格式数据；请求前从限速器获取令牌，并根据响应结果调整速率'''
+        self.limiter.acquire()
+        start = perf_counter()
+        try:
+            response = get(
+                self.post_api,
+                params=params,
+                timeout=TIMEOUT,
+                headers=self.settings.headers)
+        except (
+                exceptions.ProxyError,
+                exceptions.SSLError,
+                exceptions.ChunkedEncodingError,
+                exceptions.ConnectionError,
+        ):
+            print(f'[{YELLOW}]网络异常，请求 {self.post_api}?{urlencode(params)} 失败')
+            self._record_page(start, 'error')
+            self.limiter.failure()
+            return
+        except exceptions.ReadTimeout:
+            print(f'[{YELLOW}]网络异常，请求 {self.post_api}?{urlencode(params)} 超时')
+            self._record_page(start, 'timeout')
+            self.limiter.failure()
+            return
+        if response.status_code == 429 or 'Retry-After' in response.headers:
+            print(f'[{YELLOW}]请求过于频繁，响应状态码 {response.status_code}')
+            self._record_page(start, 'throttled')
+            self.limiter.failure(self.limiter.parse_retry_after(response.headers.get('Retry-After')))
+            return
+        try:
+            data = response.json()
+        except exceptions.JSONDecodeError:
+            if response.text:
+                print(f'[{YELLOW}]响应内容不是有效的 JSON 格式：{response.text}')
+            else:
+                print(f'[{YELLOW}]响应内容为空，可能是接口失效或者 Cookie 失效，请尝试更新 Cookie')
+            self._record_page(start, 'invalid')
+            self.limiter.failure()
+            return
+        self._record_page(start, 'ok')
+        self.limiter.success()
+        return data
+
+    @staticmethod
+    def _record_page(start: float, result: str):
+        '''记录单页请求耗时与结果：ok、error、timeout、throttled、invalid'''
+        metrics.observe('page_request_seconds', perf_counter() - start, result=result)
+        metrics.inc('page_requests_total', result=result)
+
+    def _deal_url_params(self, params: dict, number: int = 8):
+        '''添加 msToken、X-Bogus'''
+        if 'msToken' in self.settings.cookies:
+            params['msToken'] = self.settings.cookies['msToken']
+        params['a_bogus'] = get_a_bogus(params)
+
+    def _early_stop(self, earliest: date, synced: int = None):
+        '''如果获取数据的发布日期已经早于限制日期，或者已经到达上次同步的位置，就不需要再获取下一页的数据了'''
+        if self._reach_earliest(earliest, self.cursor) or self._reach_synced(synced, self.cursor):
+            self.finished = True
+
+    @staticmethod
+    def _reach_earliest(earliest: date, cursor: int):
+        return earliest > date.fromtimestamp(cursor / 1000)
+
+    @staticmethod
+    def _reach_synced(synced: int | None, cursor: int):
+        '''cursor 为当前页最早作品的发布时间（毫秒），不晚于已同步的最新作品时，后续页均已同步'''
+        return synced is not None and cursor <= synced * 1000
@@ -0,0 +1,127 @@
+from datetime import date
+from urllib.parse import urlencode
+from json import loads, JSONDecodeError
+from time import perf_counter
+from asyncio import Semaphore, Queue, TimeoutError, create_task, gather, to_thread
+from aiohttp import ClientSession, ClientTimeout, ClientError
+from rich import print
+
+from ..config import YELLOW, TIMEOUT, RETRY_ACCOUNT, ACQUIRE_ACCOUNTS, ACQUIRE_CONCURRENCY
+from .acquire import Acquire
+
+
+class AsyncAcquire(Acquire):
+    '''异步获取账号作品数据：每个账号单独保存分页状态，
+    最多 ACQUIRE_ACCOUNTS 个账号同时翻页，所有账号共享 ACQUIRE_CONCURRENCY 个请求名额与同一个限速器'''
+
+    async def request_accounts(self, accounts: list[dict]):
+        '''异步迭代器：多个账号同时获取作品数据，按获取完成的顺序返回 (账号信息, 作品数据)；
+        最多缓存 ACQUIRE_ACCOUNTS 个已获取的账号，调用方未取出时暂停获取后续账号'''
+        results = Queue(ACQUIRE_ACCOUNTS)
+        pending = Queue()
+        for account in accounts:
+            pending.put_nowait(account)
+        async with ClientSession(timeout=ClientTimeout(TIMEOUT)) as session:
+            sem = Semaphore(ACQUIRE_CONCURRENCY)
+            workers = [create_task(self._worker(session, sem, pending, results))
+                       for _ in range(min(ACQUIRE_ACCOUNTS, len(accounts)))]
+            finished = create_task(self._close_results(workers, results))
+            try:
+                while (result := await results.get()) is not None:
+                    yield result
+            finally:
+                # 调用方提前结束时 results 可能已满，_close_results 无法放入结束标记，一并取消
+                for task in (*workers, finished):
+                    task.cancel()
+                await gather(finished, return_exceptions=True)
+
+    async def request_items_async(self, session: ClientSession, sem: Semaphore,
+                                  sec_user_id: str, earliest: date, synced: int = None, state: dict = None):
+        '''获取单个账号作品数据并返回，分页状态保存在 state 中；
+        结束后 state['complete'] 表示是否正常获取到最后一页'''
+        items = []
+        state = {'cursor': 0, 'finished': False, 'complete': False} if state is None else state
+        while not state['finished']:
+            items_page = await self._request_items_page_async(session, sem, sec_user_id, state)
+            state['complete'] = bool(items_page)
+            if items_page:
+                if not items_page == [None]:
+                    items.extend(items_page)
+                if self._reach_earliest(earliest, state['cursor']) or self._reach_synced(synced, state['cursor']):
+                    state['finished'] = True
+        return items
+
+    async def _worker(self, session: ClientSession, sem: Semaphore, pending: Queue, results: Queue):
+        while not pending.empty():
+            account = pending.get_nowait()
+            state = {'cursor': 0, 'finished': False, 'complete': False}
+            try:
+                items = await self.request_items_async(
+                    session, sem, account['sec_user_id'], account['earliest_date'], account.get('synced'), state)
+            except Exception as e:
+                # 单个账号出错不影响其他账号，该账号作品数据视为不完整
+                print(f'[{YELLOW}]获取账号 {account["mark"] or account["sec_user_id"]} 作品数据出错：{e!r}')
+                items, state['complete'] = [], False
+            account['complete'] = state['complete']
+            account['cursor'] = state['cursor']
+            await results.put((account, items))
+
+    @staticmethod
+    async def _close_results(workers: list, results: Queue):
+        '''全部获取协程结束后放入结束标记；协程异常退出时输出错误，不影响其他协程'''
+        try:
+            for result in await gather(*workers, return_exceptions=True):
+                if isinstance(result, Exception):
+                    print(f'[{YELLOW}]获取账号作品数据出错：{result!r}')
+        finally:
+            await results.put(None)
+
+    async def _request_items_page_async(self, session: ClientSession, sem: Semaphore,
+                                        sec_user_id: str, state: dict):
+        '''获取单页作品数据，更新 state；失败时最多重新执行 RETRY_ACCOUNT 次'''
+        for _ in range(RETRY_ACCOUNT + 1):
+            params = self._generate_params(sec_user_id, state['cursor'])
+            await to_thread(self._deal_url_params, params)
+            data = await self._send_get_async(session, sem, params)
+            items_page, state['cursor'], state['finished'] = self._deal_items_page(data, state['cursor'])
+            if items_page:
+                return items_page
+
+    async def _send_get_async(self, session: ClientSession, sem: Semaphore, params: dict):
+        '''返回 json 格式数据；请求前从共享限速器获取令牌，并根据响应结果调整速率'''
+        async with sem:
+            await self.limiter.acquire_async()
+            start = perf_counter()
+            try:
+                async with session.get(self.post_api, params=params, headers=self.settings.headers) as response:
+                    status = response.status
+                    retry_after = response.headers.get('Retry-After')
+                    text = await response.text()
+            except TimeoutError:
+                print(f'[{YELLOW}]网络异常，请求 {self.post_api}?{urlencode(params)} 超时')
+                self._record_page(start, 'timeout')
+                self.limiter.failure()
+                return
+            except ClientError:
+                print(f'[{YELLOW}]网络异常，请求 {self.post_api}?{urlencode(params)} 失败')
+                self._record_page(start, 'error')
+                self.limiter.failure()
+                return
+        if status == 429 or retry_after is not None:
+            print(f'[{YELLOW}]请求过于频繁，响应状态码 {status}')
+            self._record_page(start, 'throttled')
+            self.limiter.failure(self.limiter.parse_retry_after(retry_after))
+            return
+        try:
+            data = loads(text)
+        except JSONDecodeError:
+            if text:
+                print(f'[{YELLOW}]响应内容不是有效的 JSON 格式：{text}')
+            else:
+                print(f'[{YELLOW}]响应内容为空，可能是接口失效或者 Cookie 失效，请尝试更新 Cookie')
+            self._record_page(start, 'invalid')
+            self.limiter.failure()
+            return
+        self._record_page(start, 'ok')
+        self.limiter.success()
+        return data
@@ -1,142 +1,604 @@
-from os import makedirs
-from os.path import join as join_path, exists
-from rich.progress import (
-    SpinnerColumn,
-    BarColumn,
-    DownloadColumn,
-    Progress,
-    TextColumn,
-    TimeRemainingColumn,
-)
-from rich import print
-from yarl import URL
-from asyncio import Semaphore, gather, run, create_task, TimeoutError
-from aiohttp import ClientSession, ClientResponse, ClientTimeout
-
-from ..config import (
-    GREEN, CYAN, YELLOW, MAGENTA,
-    CHUNK, TIMEOUT, CONCURRENCY
-)
-from ..config import Settings, Cookie
-from ..tool import Cleaner, retry_async
-from ..backup import DownloadRecorder
-
-
-class Download:
-    def __init__(self, settings: Settings, cleaner: Cleaner, cookie: Cookie,
-                 download_recorder: DownloadRecorder):
-        self.download_recorder = download_recorder
-        self.settings = settings
-        self.cleaner = cleaner
-        self.cookie = cookie
-
-    def download_files(self, items: list[dict], account_id: str, account_mark: str):
-        '''下载作品文件'''
-        print(f'[{CYAN}]\n开始下载作品文件\n')
-        save_folder = self._create_save_folder(account_id, account_mark)
-        tasks_info = self._generate_task(items, save_folder)
-        with self._progress_object() as progress:
-            run(self._download_files(tasks_info, progress))
-
-    async def _download_file(self, task_info: tuple, progress: Progress, sem: Semaphore):
-        await self._request_file(*task_info, progress, sem)
-
-    async def _download_files(self, tasks_info: list, progress: Progress):
-        sem = Semaphore(CONCURRENCY)
-        tasks = []
-        for task_info in tasks_info:
-            task = create_task(self._download_file(task_info, progress, sem))
-            tasks.append(task)
-        await gather(*tasks)
-
-    def _generate_task(self, items: list[dict], save_folder: str):
-        '''生成下载任务信息列表并返回'''
-        tasks = []
-        for item in items:
-            id = item['id']
-            desc = item['desc']
-            name = self.cleaner.filter_name(self.settings.split.join(
-                item[key] for key in self.settings.name_format))
-            if (type := item['type']) == '图集':
-                for index, info in enumerate(item['downloads'], start=1):
-                    if (task := self._generate_task_image(id, desc, name, index, info[0], info[1], info[2], save_folder)) is not None:
-                        tasks.append(task)
-            elif type == '视频':
-                url = item['downloads']
-                width = item['width']
-                height = item['height']
-                if (task := self._generate_task_video(id, desc, name, url, width, height, save_folder)) is not None:
-                    tasks.append(task)
-        return tasks
-
-    def _generate_task_image(self, id: str, desc: str, name: str, index: int, url: str, width: int, height: int, save_folder: str):
-        '''生成图片下载任务信息'''
-        show = f'图集 {id} {desc[:15]}'
-        if id in self.download_recorder.records:
-            print(f'[{CYAN}]{show} 存在下载记录，跳过下载')
-        elif exists(path := join_path(save_folder, f'{name}_{index}.jpeg')):
-            print(f'[{CYAN}]{show} 文件已存在，跳过下载')
-        else:
-            return (url, path, show, id, width, height)
-
-    def _generate_task_video(self, id: str, desc: str, name: str, url: str, width: int, height: int, save_folder: str):
-        '''生成视频下载任务信息'''
-        show = f'视频 {id} {desc[:15]}'
-        if id in self.download_recorder.records:
-            print(f'[{CYAN}]{show} 存在下载记录，跳过下载')
-        elif exists(path := join_path(save_folder, f'{name}.mp4')):
-            print(f'[{CYAN}]{show} 文件已存在，跳过下载')
-        else:
-            return (url, path, show, id, width, height)
-
-    @retry_async
-    async def _request_file(self, url: str, path: str, show: str, id: str, width: int, height: int,
-                            progress: Progress, sem: Semaphore):
-        '''下载 url 对应文件'''
-        async with sem:
-            try:
-                async with ClientSession(headers=self.settings.headers, timeout=ClientTimeout(TIMEOUT)) as session:
-                    async with session.get(URL(url, encoded=True)) as response:
-                        if not (content_length := int(response.headers.get('content-length', 0))):
-                            print(f'[{YELLOW}]{show} {url} 响应内容为空')
-                        elif response.status != 200 and response.status != 206:
-                            print(f'[{YELLOW}]{show} {url} 响应状态码异常 {response.status}')
-                        else:
-                            await self._save_file(path, show, id, width, height, response, content_length, progress)
-                            return True
-            except TimeoutError:
-                print(f'[{YELLOW}]{show} {url} 响应超时')
-
-    async def _save_file(self, path: str, show: str, id: str, width: int, height: int,
-                         response: ClientResponse, content_length: int, progress: Progress):
-        task_id = progress.add_task(show, total=content_length or None)
-        with open(path, 'wb') as f:
-            async for chunk in response.content.iter_chunked(CHUNK):
-                f.write(chunk)
-                progress.update(task_id, advance=len(chunk))
-        progress.remove_task(task_id)
-        if max(width, height) < 1920:
-            color = YELLOW
-        else:
-            color = GREEN
-        print(f'[{GREEN}]{show} [{color}]清晰度：{width}×{height} [{GREEN}]下载成功')
-        self.download_recorder.save(id)
-
-    def _progress_object(self):
-        return Progress(
-            TextColumn('[progress.description]{task.description}', style=MAGENTA, justify='left'),
-            SpinnerColumn(),
-            BarColumn(bar_width=20),
-            '[progress.percentage]{task.percentage:>3.1f}%',
-            '•',
-            DownloadColumn(binary_units=True),
-            '•',
-            TimeRemainingColumn(),
-            transient=True,
-        )
-
-    def _create_save_folder(self, id: str, mark: str):
-        '''新建存储文件夹，返回文件夹路径'''
-        folder = join_path(self.settings.save_folder, f'UID{id}_{mark}_发布作品')
-        makedirs(folder, exist_ok=True)
-        return folder
+from os import makedirs, replace
+from os.path import join as join_path
+from json import dump, load
+from json.decoder import JSONDecodeError
+from typing import Iterator
+from time import perf_counter
+from contextlib import asynccontextmanager
+from rich.progress import (
+    SpinnerColumn,
+    BarColumn,
+    DownloadColumn,
+    Progress,
+    TextColumn,
+    TimeRemainingColumn,
+    TaskID,
+)
+from rich import print
+from yarl import URL
+from asyncio import (
+    Semaphore, Queue, Runner, Task, gather, wait, create_task, to_thread, TimeoutError, FIRST_COMPLETED
+)
+from aiohttp import ClientSession, ClientResponse, ClientTimeout, ClientError, TCPConnector
+
+from ..config import (
+    GREEN, CYAN, YELLOW, MAGENTA,
+    CHUNK, TIMEOUT,
+    CONCURRENCY, CONCURRENCY_MIN, CONCURRENCY_MAX, CONCURRENCY_PER_HOST,
+    CONCURRENCY_INTERVAL, CONCURRENCY_GAIN, CONCURRENCY_DECREASE,
+    BANDWIDTH_LIMIT, BANDWIDTH_BURST,
+    SIZE_PROBE, SIZE_ESTIMATE_IMAGE, SIZE_ESTIMATE_VIDEO,
+    DEDUP, DEDUP_PRECHECK, DEDUP_REFLINK,
+    SEGMENT_DOWNLOAD, SEGMENT_THRESHOLD, SEGMENT_NUMBER,
+    STREAM_QUEUE_SIZE,
+    CONNECTION_LIMIT, CONNECTION_LIMIT_PER_HOST, DNS_CACHE_TTL, KEEPALIVE_TIMEOUT,
+    PROGRESS_REFRESH
+)
+from ..config import Settings, Cookie
+from ..tool import (
+    Cleaner, FolderIndex, HeadlessProgress, ConcurrencyController, BandwidthLimiter, FairQueue, FileWriter,
+    retry_async, metrics, headless_mode, preallocate,
+    new_hasher, hash_file, uri_key, link_file, deferred_interrupt
+)
+from ..backup import DownloadRecorder, DownloadIndex
+
+
+class Download:
+    def __init__(self, settings: Settings, cleaner: Cleaner, cookie: Cookie,
+                 download_recorder: DownloadRecorder, download_index: DownloadIndex,
+                 bandwidth: BandwidthLimiter = None):
+        '''bandwidth 为共用的带宽限速器，守护进程的全部工作线程共用一个（按账号公平分配带宽），默认按 BANDWIDTH_LIMIT 创建'''
+        self.download_recorder = download_recorder
+        self.download_index = download_index
+        self.settings = settings
+        self.cleaner = cleaner
+        self.cookie = cookie
+        self.runner = Runner()
+        self.session = None
+        self.files = FolderIndex()
+        self.pending = 0
+        self.active = 0
+        self.headless = headless_mode()
+        self.concurrency = ConcurrencyController(
+            CONCURRENCY, CONCURRENCY_MIN, CONCURRENCY_MAX, CONCURRENCY_PER_HOST,
+            CONCURRENCY_INTERVAL, CONCURRENCY_GAIN, CONCURRENCY_DECREASE)
+        self.bandwidth = bandwidth or self.create_bandwidth_limiter()
+
+    @staticmethod
+    def create_bandwidth_limiter() -> BandwidthLimiter | None:
+        '''按 BANDWIDTH_LIMIT 创建带宽限速器，未设置限速时返回 None'''
+        return BandwidthLimiter(BANDWIDTH_LIMIT, BANDWIDTH_BURST) if BANDWIDTH_LIMIT else None
+
+    def download_files(self, items: list[dict], account_id: str, account_mark: str):
+        '''下载作品文件，全部文件下载成功时返回 True'''
+        print(f'[{CYAN}]\n开始下载作品文件\n')
+        save_folder = self._create_save_folder(account_id, account_mark)
+        tasks_info = self._generate_task(items, save_folder, account_id)
+        with self._progress_object() as progress:
+            success = self.runner.run(self._download_files(tasks_info, progress))
+        self.download_index.commit()
+        return success
+
+    def download_stream(self, pages: Iterator[list[dict]], account_id: str, account_mark: str):
+        '''边获取边下载作品文件：pages 每次返回一页作品信息，
+        逐页生成下载任务并交给 CONCURRENCY_MAX 个下载协程，
+        等待下载的任务数量超过 STREAM_QUEUE_SIZE 时暂停获取下一页；全部文件下载成功时返回 True'''
+        print(f'[{CYAN}]\n开始下载作品文件\n')
+        save_folder = self._create_save_folder(account_id, account_mark)
+        with self._progress_object() as progress:
+            success = self.runner.run(self._download_stream(pages, save_folder, account_id, progress))
+        self.download_index.commit()
+        return success
+
+    def close(self):
+        '''关闭共享的 ClientSession 与事件循环'''
+        if self.session is not None:
+            self.runner.run(self.session.close())
+            self.session = None
+        self.runner.close()
+
+    def _get_session(self):
+        '''返回整个运行期间共享的 ClientSession，首次调用时创建'''
+        if self.session is None or self.session.closed:
+            connector = TCPConnector(
+                limit=CONNECTION_LIMIT,
+                limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT)
+            self.session = ClientSession(connector=connector, timeout=ClientTimeout(TIMEOUT))
+        return self.session
+
+    async def _download_file(self, task_info: dict, progress: Progress):
+        '''下载单个文件，记录等待下载名额的文件数量与下载结果；
+        开启下载前去重且已下载过相同内容时，直接创建链接，不发送请求'''
+        if DEDUP and DEDUP_PRECHECK and self._link_known(task_info):
+            metrics.inc('files_total', result='linked')
+            return True
+        metrics.observe('download_queue_depth', self.pending - self.active)
+        self.pending += 1
+        try:
+            result = await self._request_file(task_info, progress)
+        finally:
+            self.pending -= 1
+        metrics.inc('files_total', result='success' if result else 'failed')
+        return result
+
+    @asynccontextmanager
+    async def _slot(self, host: str):
+        '''从自适应并发控制获取下载名额，并记录同时下载的文件数量与当前并发数量上限'''
+        async with self.concurrency.slot(host):
+            self.active += 1
+            metrics.observe('download_active', self.active)
+            metrics.observe('download_limit', self.concurrency.limit)
+            try:
+                yield
+            finally:
+                self.active -= 1
+
+    async def _download_files(self, tasks_info: list, progress: Progress):
+        '''由最多 CONCURRENCY_MAX 个下载协程按 FairQueue 的顺序（小文件优先）取出任务下载，
+        同时下载的文件数量由 self.concurrency 控制'''
+        queue = FairQueue()
+        for task_info in await self._size_tasks(tasks_info):
+            queue.put_nowait(task_info)
+        workers = [create_task(self._download_worker(queue, progress))
+                   for _ in range(min(CONCURRENCY_MAX, len(tasks_info)))]
+        for _ in workers:
+            queue.put_nowait(None)
+        return all(await self._wait_workers(workers))
+
+    async def _download_stream(self, pages: Iterator[list[dict]], save_folder: str, account_id: str,
+                               progress: Progress):
+        queue = FairQueue(STREAM_QUEUE_SIZE)
+        workers = [create_task(self._download_worker(queue, progress)) for _ in range(CONCURRENCY_MAX)]
+        try:
+            while (items := await to_thread(next, pages, None)) is not None:
+                for task_info in await self._size_tasks(self._generate_task(items, save_folder, account_id)):
+                    await self._put_task(queue, task_info, workers)
+            for _ in workers:
+                await self._put_task(queue, None, workers)
+        except BaseException:
+            # 获取作品出错、等待被取消或者下载协程出错时，不再等待队列空位，取消全部下载协程
+            await self._cancel_workers(workers)
+            raise
+        return all(await self._wait_workers(workers))
+
+    async def _download_worker(self, queue: Queue, progress: Progress):
+        success = True
+        while (task_info := await queue.get()) is not None:
+            success = bool(await self._download_file(task_info, progress)) and success
+        return success
+
+    @staticmethod
+    async def _put_task(queue: Queue, task_info: dict | None, workers: list[Task]):
+        '''将任务放入有界队列，同时等待下载协程：任一协程出错（例如磁盘空间不足）时抛出其异常，
+        不会因为队列已满且无人取出而一直等待'''
+        if not queue.full():
+            queue.put_nowait(task_info)
+            return
+        put = create_task(queue.put(task_info))
+        pending = {put, *workers}
+        try:
+            while not put.done():
+                done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+                for worker in done - {put}:
+                    # 取出结束标记的协程正常结束，出错或者被取消的协程抛出异常
+                    if worker.cancelled() or worker.exception() is not None:
+                        worker.result()
+        finally:
+            put.cancel()
+
+    @staticmethod
+    async def _wait_workers(workers: list[Task]) -> list[bool]:
+        '''等待全部下载协程结束并返回结果；任一协程出错或者等待被取消时，先取消其余协程并等待其结束再抛出异常，
+        事件循环（self.runner）在多次下载之间保持，未结束的协程会在下一个账号或者任务中继续执行'''
+        try:
+            return await gather(*workers)
+        except BaseException:
+            await Download._cancel_workers(workers)
+            raise
+
+    @staticmethod
+    async def _cancel_workers(workers: list[Task]):
+        for worker in workers:
+            worker.cancel()
+        await gather(*workers, return_exceptions=True)
+
+    def _generate_task(self, items: list[dict], save_folder: str, account_id: str):
+        '''生成下载任务信息列表并返回；先批量查询本页作品的下载记录'''
+        tasks = []
+        skipped = 0
+        downloaded = self.download_index.downloaded({item['id'] for item in items})
+        for item in items:
+            id = item['id']
+            desc = item['desc']
+            if (name := item.get('name')) is None:
+                name = self.cleaner.filter_name(self.settings.render_name(item))
+            if (type := item['type']) == '图集':
+                for index, info in enumerate(item['downloads'], start=1):
+                    if (task := self._generate_task_image(id, desc, name, index, info[0], info[1], info[2], save_folder, account_id, downloaded)) is not None:
+                        tasks.append(task)
+                    else:
+                        skipped += 1
+            elif type == '视频':
+                url = item['downloads']
+                width = item['width']
+                height = item['height']
+                if (task := self._generate_task_video(id, desc, name, url, width, height, item.get('size'), save_folder, account_id, downloaded)) is not None:
+                    tasks.append(task)
+                else:
+                    skipped += 1
+        if self.headless and skipped:
+            print(f'[{CYAN}]{skipped} 个文件存在下载记录或者已存在，跳过下载')
+        return tasks
+
+    def _generate_task_image(self, id: str, desc: str, name: str, index: int, url: str, width: int, height: int,
+                             save_folder: str, account_id: str, downloaded: set[tuple[str, int]]):
+        '''生成图片下载任务信息'''
+        task = {
+            'url': url,
+            'path': join_path(save_folder, f'{name}_{index}.jpeg'),
+            'show': f'图集 {id} {desc[:15]}',
+            'id': id,
+            'index': index,
+            'account': account_id,
+            'width': width,
+            'height': height,
+            'size': None,
+        }
+        if not self._skip_task(task, downloaded):
+            return task
+
+    def _generate_task_video(self, id: str, desc: str, name: str, url: str, width: int, height: int, size: int | None,
+                             save_folder: str, account_id: str, downloaded: set[tuple[str, int]]):
+        '''生成视频下载任务信息'''
+        task = {
+            'url': url,
+            'path': join_path(save_folder, f'{name}.mp4'),
+            'show': f'视频 {id} {desc[:15]}',
+            'id': id,
+            'index': 0,
+            'account': account_id,
+            'width': width,
+            'height': height,
+            'size': size,
+        }
+        if not self._skip_task(task, downloaded):
+            return task
+
+    async def _size_tasks(self, tasks: list[dict]):
+        '''补充大小未知的任务的文件大小，用于 FairQueue 排序：开启 SIZE_PROBE 时先发送 HEAD 请求获取，
+        仍然未知的按类型使用估计大小，并将 estimated 设置为 True；返回 tasks'''
+        if SIZE_PROBE:
+            sem = Semaphore(CONCURRENCY_MAX)
+            await gather(*(self._probe_size(task, sem) for task in tasks if task['size'] is None))
+        for task in tasks:
+            task['estimated'] = task['size'] is None
+            if task['estimated']:
+                task['size'] = SIZE_ESTIMATE_IMAGE if task['index'] else SIZE_ESTIMATE_VIDEO
+        return tasks
+
+    async def _probe_size(self, task: dict, sem: Semaphore):
+        '''发送 HEAD 请求，按 content-length 设置任务的文件大小'''
+        try:
+            async with sem, self._get_session().head(
+                    URL(task['url'], encoded=True), headers=self.settings.headers, allow_redirects=True) as response:
+                if response.status == 200 and (length := response.headers.get('content-length', '')).isdigit():
+                    task['size'] = int(length)
+        except (TimeoutError, ClientError):
+            pass
+
+    def _skip_task(self, task: dict, downloaded: set[tuple[str, int]]):
+        '''存在下载记录（全局索引或本次运行记录）时跳过下载；
+        索引建立前已下载的文件，按文件是否存在判断，并补充到索引中；无界面进度时不逐个输出，由 _generate_task 汇总数量'''
+        if (task['id'], task['index']) in downloaded or self._record_key(task) in self.download_recorder.records:
+            if not self.headless:
+                print(f'[{CYAN}]{task["show"]} 存在下载记录，跳过下载')
+        elif self.files.exists(task['path']):
+            if not self.headless:
+                print(f'[{CYAN}]{task["show"]} 文件已存在，跳过下载')
+            self._add_index(task)
+        else:
+            return False
+        return True
+
+    @staticmethod
+    def _record_key(task: dict):
+        '''本次运行下载记录中的文件标识：视频为作品 id，图片为 作品 id_序号'''
+        return f'{task["id"]}_{task["index"]}' if task['index'] else task['id']
+
+    @retry_async
+    async def _request_file(self, task: dict, progress: Progress):
+        '''下载 url 对应文件；存在未完成的 .part 文件时，从已下载的位置继续下载；
+        开启分段下载且文件大小超过 SEGMENT_THRESHOLD 时，分段并发下载；
+        服务器不支持分段下载时 task['segmented'] 为 False，重试时改为单线程下载；
+        存在分段记录文件时，即使已经关闭分段下载，也按分段继续下载（预分配的 .part 文件大小不是已下载的字节数）'''
+        url, path, show = task['url'], task['path'], task['show']
+        segment = SEGMENT_DOWNLOAD and task.get('segmented', True)
+        async with self._slot(URL(url, encoded=True).host):
+            try:
+                if segments := self._read_segments(path):
+                    return await self._save_segments(task, *segments, progress)
+                temp = f'{path}.part'
+                offset = self.files.size(temp)
+                # 已知文件大小（非估计值）小于 SEGMENT_THRESHOLD 时不需要探测
+                if segment and not offset and (task.get('estimated', True) or task['size'] >= SEGMENT_THRESHOLD) \
+                        and (total := await self._probe_segments(task)):
+                    self._create_segments(path, total)
+                    return await self._save_segments(task, total, set(), progress)
+                if offset:
+                    headers = self.settings.headers | {'Range': f'bytes={offset}-'}
+                else:
+                    headers = self.settings.headers
+                session = self._get_session()
+                start = perf_counter()
+                async with session.get(URL(url, encoded=True), headers=headers) as response:
+                    metrics.observe('file_ttfb_seconds', perf_counter() - start)
+                    metrics.inc('file_requests_total', status=response.status)
+                    # 限速与服务器错误响应通常没有内容，先检查状态码，再检查响应内容是否为空
+                    if response.status == 416:
+                        return self._deal_range_error(task, response, offset)
+                    elif response.status != 200 and response.status != 206:
+                        print(f'[{YELLOW}]{show} {url} 响应状态码异常 {response.status}')
+                        if response.status == 429 or response.status >= 500:
+                            self.concurrency.failure()
+                    elif not (content_length := int(response.headers.get('content-length', 0))):
+                        print(f'[{YELLOW}]{show} {url} 响应内容为空')
+                    elif response.status == 206 and not response.headers.get(
+                            'content-range', '').startswith(f'bytes {offset}-'):
+                        # 与 _request_segment 相同校验返回的字节范围，不一致时不能写入 offset 位置，删除 .part 文件后从头下载
+                        print(f'[{YELLOW}]{show} {url} 返回的字节范围与请求不一致，重新下载')
+                        if offset:
+                            self.files.remove(temp)
+                    else:
+                        if response.status == 200:
+                            offset = 0
+                        total = self._extract_total(response) or offset + content_length
+                        return await self._save_file(task, response, offset, total, progress)
+            except TimeoutError:
+                print(f'[{YELLOW}]{show} {url} 响应超时')
+                metrics.inc('file_requests_total', status='timeout')
+                self.concurrency.failure()
+            except ClientError:
+                print(f'[{YELLOW}]{show} {url} 网络异常，下载中断')
+                metrics.inc('file_requests_total', status='error')
+                self.concurrency.failure()
+
+    async def _probe_segments(self, task: dict):
+        '''请求第 1 个字节（Range: bytes=0-0）：服务器支持 Range 且文件大小达到 SEGMENT_THRESHOLD 时返回文件总字节数；
+        否则将 task['segmented'] 设置为 False，由调用方单线程下载；响应内容读取完整，连接可以继续使用'''
+        headers = self.settings.headers | {'Range': 'bytes=0-0'}
+        async with self._get_session().get(URL(task['url'], encoded=True), headers=headers) as response:
+            metrics.inc('file_requests_total', status=response.status)
+            if response.status == 206 and response.headers.get('content-range', '').startswith('bytes 0-'):
+                await response.read()
+                if (total := self._extract_total(response) or 0) >= SEGMENT_THRESHOLD:
+                    return total
+            elif response.status == 429 or response.status >= 500:
+                # 暂时的错误，下次重试时再次探测
+                self.concurrency.failure()
+                return
+        # 服务器忽略 Range 时返回完整文件，不读取响应内容，只在这一次探测中断开连接
+        task['segmented'] = False
+
+    async def _save_segments(self, task: dict, total: int, done: set[tuple[int, int]], progress: Progress):
+        '''并发下载未完成的分段，写入预分配的 .part 文件；全部分段完成且文件大小一致时才重命名为目标文件'''
+        path, show = task['path'], task['show']
+        segments = self._split_segments(total)
+        completed = sum(end - start + 1 for start, end in done)
+        task_id = progress.add_task(show, total=total, completed=completed)
+        began = perf_counter()
+        try:
+            results = await gather(*(
+                self._request_segment(task, start, end, total, done, task_id, progress)
+                for start, end in segments if (start, end) not in done), return_exceptions=True)
+        finally:
+            self._record_throughput(sum(end - start + 1 for start, end in done) - completed, began)
+            progress.remove_task(task_id)
+        if False in results:
+            print(f'[{YELLOW}]{show} 服务器不支持分段下载，改为单线程下载')
+            task['segmented'] = False
+            self._remove_segments(path)
+            return
+        if len(done) != len(segments) or self.files.size(f'{path}.part') != total:
+            print(f'[{YELLOW}]{show} 文件不完整（已完成 {len(done)}/{len(segments)} 段），等待继续下载')
+            return
+        self.files.remove(f'{path}.part.seg')
+        if DEDUP:
+            task['hash'] = await to_thread(hash_file, f'{path}.part')
+        self._finish_file(task)
+        return True
+
+    async def _request_segment(self, task: dict, start: int, end: int, total: int,
+                               done: set[tuple[int, int]], task_id: TaskID, progress: Progress):
+        '''下载 [start, end] 字节范围并写入 .part 文件对应位置；服务器忽略 Range 时返回 False'''
+        url, path = task['url'], task['path']
+        headers = self.settings.headers | {'Range': f'bytes={start}-{end}'}
+        session = self._get_session()
+        written = 0
+        try:
+            async with session.get(URL(url, encoded=True), headers=headers) as response:
+                if response.status != 206 or not response.headers.get('content-range', '').startswith(f'bytes {start}-'):
+                    return False
+                async with FileWriter(f'{path}.part', start) as f:
+                    async for chunk in response.content.iter_chunked(CHUNK):
+                        chunk = memoryview(chunk)[:end - start + 1 - written]
+                        if self.bandwidth:
+                            await self.bandwidth.acquire_async(len(chunk), task['account'])
+                        await f.write(chunk)
+                        written += len(chunk)
+                        self.concurrency.record(len(chunk))
+                        progress.update(task_id, advance=len(chunk))
+        finally:
+            if written != end - start + 1:
+                progress.update(task_id, advance=-written)
+        done.add((start, end))
+        self._write_segments(path, total, done)
+        return True
+
+    @staticmethod
+    def _split_segments(total: int):
+        '''将文件按 SEGMENT_NUMBER 均分为多个闭区间字节范围'''
+        size = -(-total // SEGMENT_NUMBER)
+        return [(start, min(start + size, total) - 1) for start in range(0, total, size)]
+
+    def _create_segments(self, path: str, total: int):
+        '''先新建分段记录文件，再预分配 .part 文件（文件大小为 total）；
+        预分配的 .part 文件大小不代表已下载的字节数，只能与分段记录文件一起使用'''
+        self._write_segments(path, total, set())
+        self.files.add(f'{path}.part.seg')
+        with open(f'{path}.part', 'wb') as f:
+            preallocate(f.fileno(), 0, total, keep_size=False)
+        self.files.add(f'{path}.part', total)
+
+    @staticmethod
+    def _write_segments(path: str, total: int, done: set[tuple[int, int]]):
+        '''写入临时文件后替换分段记录文件，程序中断时不会留下不完整的记录'''
+        with open(temp := f'{path}.part.seg.tmp', 'w') as f:
+            dump({'total': total, 'done': sorted(done)}, f)
+        replace(temp, f'{path}.part.seg')
+
+    def _read_segments(self, path: str):
+        '''读取分段记录文件，返回 (文件总字节数, 已完成分段集合)；
+        分段记录文件无效或者 .part 文件缺失时删除两者，从头下载，不按 .part 文件大小续传'''
+        if not self.files.exists(record := f'{path}.part.seg'):
+            return
+        try:
+            with open(record) as f:
+                data = load(f)
+            total, done = data['total'], {tuple(i) for i in data['done']}
+            if self.files.exists(f'{path}.part'):
+                return total, done
+        except (JSONDecodeError, KeyError, TypeError):
+            pass
+        self._remove_segments(path)
+
+    def _remove_segments(self, path: str):
+        for file in (f'{path}.part', f'{path}.part.seg'):
+            if self.files.exists(file):
+                self.files.remove(file)
+
+    async def _save_file(self, task: dict, response: ClientResponse, offset: int, total: int, progress: Progress):
+        '''将响应内容写入 .part 文件，字节数与 total 一致时才重命名为目标文件；
+        写入在 FileWriter 的线程池中进行，并按 total 预分配磁盘空间（不改变 .part 文件大小）；开启去重时同时计算内容哈希'''
+        show = task['show']
+        temp = f'{task["path"]}.part'
+        task_id = progress.add_task(show, total=total or None, completed=offset)
+        written = 0
+        hasher = new_hasher() if DEDUP else None
+        start = perf_counter()
+        try:
+            async with FileWriter(temp, offset, truncate=not offset, preallocate=total - offset, hasher=hasher) as f:
+                async for chunk in response.content.iter_chunked(CHUNK):
+                    if self.bandwidth:
+                        await self.bandwidth.acquire_async(len(chunk), task['account'])
+                    await f.write(chunk)
+                    written += len(chunk)
+                    self.concurrency.record(len(chunk))
+                    progress.update(task_id, advance=len(chunk))
+        finally:
+            self._record_throughput(written, start)
+            progress.remove_task(task_id)
+            self.files.add(temp)
+        if (size := self.files.size(temp)) != total:
+            print(f'[{YELLOW}]{show} 文件不完整（{size}/{total} 字节），等待继续下载')
+            return
+        if hasher is not None:
+            task['hash'] = hasher.hexdigest()
+        self._finish_file(task)
+        return True
+
+    @staticmethod
+    def _record_throughput(written: int, start: float):
+        '''记录本次请求写入的字节数与下载速度'''
+        metrics.inc('file_bytes_total', written)
+        if written and (elapsed := perf_counter() - start) > 0:
+            metrics.observe('file_throughput_bytes', written / elapsed)
+
+    def _finish_file(self, task: dict):
+        '''将 .part 文件重命名为目标文件，并添加下载记录；无界面进度时不逐个输出下载结果'''
+        # 重命名与保存下载记录之间不处理 Ctrl+C、SIGTERM，中断后不会出现已完成但没有记录的文件
+        with deferred_interrupt.critical():
+            self.files.replace(f'{task["path"]}.part', task['path'])
+            if DEDUP and (digest := task.get('hash')):
+                self._deduplicate(task, digest)
+            self.download_recorder.save(self._record_key(task))
+        if not self.headless:
+            width, height = task['width'], task['height']
+            if max(width, height) < 1920:
+                color = YELLOW
+            else:
+                color = GREEN
+            print(f'[{GREEN}]{task["show"]} [{color}]清晰度：{width}×{height} [{GREEN}]下载成功')
+        self._add_index(task)
+
+    def _deduplicate(self, task: dict, digest: str):
+        '''下载后去重：内容与已下载文件相同时，将新文件替换为已有文件的链接；否则记录为该内容的文件；
+        同时记录文件地址与大小对应的内容哈希，供下载前去重使用'''
+        path = task['path']
+        size = self.files.size(path)
+        if (source := self.download_index.find_content(digest, size)) not in (None, path) \
+                and link_file(source, path, DEDUP_REFLINK):
+            metrics.inc('dedup_bytes_total', size, stage='download')
+        else:
+            self.download_index.add_content(digest, size, path)
+        self.download_index.add_source(uri_key(task['url']), size, digest)
+
+    def _link_known(self, task: dict):
+        '''下载前去重：文件大小已知，且文件地址与大小对应的内容已下载过时，将目标文件创建为已有文件的链接'''
+        if task.get('estimated', True) or \
+                (digest := self.download_index.find_source(uri_key(task['url']), size := task['size'])) is None:
+            return False
+        if (source := self.download_index.find_content(digest, size)) is None \
+                or not link_file(source, task['path'], DEDUP_REFLINK):
+            return False
+        self.files.add(task['path'], size)
+        metrics.inc('dedup_bytes_total', size, stage='precheck')
+        if not self.headless:
+            print(f'[{CYAN}]{task["show"]} 与已下载文件内容相同，已创建链接')
+        self.download_recorder.save(self._record_key(task))
+        self._add_index(task)
+        return True
+
+    def _add_index(self, task: dict):
+        self.download_index.add(task['id'], task['index'], task['account'], task['path'],
+                                self.files.size(task['path']), task['width'], task['height'])
+
+    def _deal_range_error(self, task: dict, response: ClientResponse, offset: int):
+        '''续传位置超出文件大小：.part 文件已下载完整则直接完成，否则删除后重新下载'''
+        if self._extract_total(response) == offset:
+            self._finish_file(task)
+            return True
+        print(f'[{YELLOW}]{task["show"]} 未完成文件与服务器文件不一致，重新下载')
+        self.files.remove(f'{task["path"]}.part')
+
+    @staticmethod
+    def _extract_total(response: ClientResponse):
+        '''从 Content-Range 响应头中提取文件总字节数'''
+        content_range = response.headers.get('content-range', '')
+        if (total := content_range.rpartition('/')[2]).isdigit():
+            return int(total)
+
+    def _progress_object(self):
+        '''返回下载进度对象；无界面进度时返回汇总进度的 HeadlessProgress'''
+        if self.headless:
+            return HeadlessProgress()
+        return Progress(
+            TextColumn('[progress.description]{task.description}', style=MAGENTA, justify='left'),
+            SpinnerColumn(),
+            BarColumn(bar_width=20),
+            '[progress.percentage]{task.percentage:>3.1f}%',
+            '•',
+            DownloadColumn(binary_units=True),
+            '•',
+            TimeRemainingColumn(),
+            transient=True,
+            refresh_per_second=PROGRESS_REFRESH,
+        )
+
+    def _create_save_folder(self, id: str, mark: str):
+        '''新建存储文件夹，返回文件夹路径'''
+        folder = join_path(self.settings.save_folder, f'UID{id}_{mark}_发布作品')
+        makedirs(folder, exist_ok=True)
+        self.files.scan(folder)
+        return folder
@@ -1,82 +1,122 @@
-from datetime import date
-
-from ..tool import Cleaner
-from ..config import Settings, DESCRIPTION_LENGTH
-
-
-class Parse:
-    def __init__(self, cleaner: Cleaner, settings: Settings) -> None:
-        self.cleaner = cleaner
-        self.settings = settings
-
-    def extract_account(self, account: dict, item: dict):
-        '''提取账号 id、昵称，检查账号 mark'''
-        account['id'] = self._extract_value(item, 'author.uid')
-        account['name'] = self.cleaner.filter_name(
-            self._extract_value(item, 'author.nickname'),
-            default='无效账号昵称')
-        account['mark'] = self.cleaner.filter_name(
-            account['mark'], default=account['name'])
-
-    def extract_items(self, items: list[dict], earliest: date, latest: date):
-        '''提取发布作品信息并返回'''
-        results = []
-        for item in items:
-            result = {}
-            self._extract_common(item, result)
-            if (result['create_time_date'] <= latest) and (result['create_time_date'] >= earliest):
-                if (gallery := self._extract_value(item, 'images')):
-                    if self.settings.download_images:
-                        self._extract_gallery(gallery, result)
-                        results.append(result)
-                elif self.settings.download_videos:
-                    self._extract_video(self._extract_value(item, 'video'), result)
-                    results.append(result)
-        return results
-
-    def _extract_common(self, item: dict, result: dict):
-        '''提取图文/视频作品共有信息'''
-        result['id'] = self._extract_value(item, 'aweme_id')
-        if desc:=self._extract_value(item, 'desc'):
-            result['desc'] = self.cleaner.clear_spaces(self.cleaner.filter_name(desc))[:DESCRIPTION_LENGTH]
-        else:
-            result['desc'] = '作品描述为空'
-        result['create_timestamp'] = self._extract_value(item, 'create_time')
-        result['create_time_date'] = date.fromtimestamp(int(result['create_timestamp']))
-        result['create_time'] = date.strftime(result['create_time_date'], self.settings.date_format)
-
-    def _extract_gallery(self, gallery: dict, result: dict):
-        '''提取图文作品信息'''
-        result['type'] = '图集'
-        result['share_url'] = f'https://www.douyin.com/note/{result["id"]}'
-        result['downloads'] = []
-        for image in gallery:
-            url = self._extract_value(image, 'url_list[0]')
-            width = self._extract_value(image, 'width')
-            height = self._extract_value(image, 'height')
-            result['downloads'].append((url, width, height))
-
-    def _extract_video(self, video: dict, result: dict):
-        '''提取视频作品信息'''
-        result['type'] = '视频'
-        result['share_url'] = f'https://www.douyin.com/video/{result["id"]}'
-        result['downloads'] = self._extract_value(
-            video, 'play_addr.url_list[0]')
-        result['height'] = self._extract_value(video, 'height')
-        result['width'] = self._extract_value(video, 'width')
-
-    @staticmethod
-    def _extract_value(data: dict, attribute_chain: str):
-        '''根据 attribute_chain 从 dict 中提取值'''
-        attributes = attribute_chain.split('.')
-        for attribute in attributes:
-            if '[' in attribute:
-                parts = attribute.split('[', 1)
-                attribute = parts[0]
-                index = int(parts[1].split(']', 1)[0])
-                data = data[attribute][index]
-            else:
-                data = data[attribute]
-            if not data:
-                return
-        return data
+from datetime import date
+from functools import lru_cache
+
+from ..tool import Cleaner
+from ..config import Settings, DESCRIPTION_LENGTH
+
+
+@lru_cache(maxsize=None)
+def compile_path(attribute_chain: str):
+    '''将属性路径预先解析为取值函数，例如 'play_addr.url_list[0]' 解析为 (('play_addr',), ('url_list', 0))；
+    取值规则与 Parse._extract_value 相同：每一级取值后若为假值则返回 None'''
+    steps = []
+    for attribute in attribute_chain.split('.'):
+        if '[' in attribute:
+            parts = attribute.split('[', 1)
+            steps.append((parts[0], int(parts[1].split(']', 1)[0])))
+        else:
+            steps.append((attribute,))
+
+    if len(steps) == 1 and len(steps[0]) == 1:
+        key, = steps[0]
+
+        def getter(data):
+            return data[key] or None
+    elif len(steps) == 1:
+        key, index = steps[0]
+
+        def getter(data):
+            return data[key][index] or None
+    else:
+        def getter(data):
+            for step in steps:
+                for key in step:
+                    data = data[key]
+                if not data:
+                    return
+            return data
+    return getter
+
+
+class Parse:
+    author_uid = staticmethod(compile_path('author.uid'))
+    author_nickname = staticmethod(compile_path('author.nickname'))
+    common_fields = (
+        ('id', compile_path('aweme_id')),
+        ('desc', compile_path('desc')),
+        ('create_timestamp', compile_path('create_time')),
+    )
+    images = staticmethod(compile_path('images'))
+    video = staticmethod(compile_path('video'))
+    video_url = staticmethod(compile_path('play_addr.url_list[0]'))
+    image_fields = (compile_path('url_list[0]'), compile_path('width'), compile_path('height'))
+    height = staticmethod(compile_path('height'))
+    width = staticmethod(compile_path('width'))
+
+    def __init__(self, cleaner: Cleaner, settings: Settings) -> None:
+        self.cleaner = cleaner
+        self.settings = settings
+
+    def extract_account(self, account: dict, item: dict):
+        '''提取账号 id、昵称，检查账号 mark'''
+        account['id'] = self.author_uid(item)
+        account['name'] = self.cleaner.filter_name(
+            self.author_nickname(item),
+            default='无效账号昵称')
+        account['mark'] = self.cleaner.filter_name(
+            account['mark'], default=account['name'])
+
+    def extract_items(self, items: list[dict], earliest: date, latest: date):
+        '''提取发布作品信息并返回；各字段使用预先解析的属性路径，对整页作品一次性提取；
+        文件名在提取时按编译后的模板生成一次，保存在 name 字段中'''
+        results = []
+        download_images = self.settings.download_images
+        download_videos = self.settings.download_videos
+        images = self.images
+        for item in items:
+            result = {}
+            self._extract_common(item, result)
+            if (result['create_time_date'] <= latest) and (result['create_time_date'] >= earliest):
+                if (gallery := images(item)):
+                    if not download_images:
+                        continue
+                    self._extract_gallery(gallery, result)
+                elif download_videos:
+                    self._extract_video(self.video(item), result)
+                else:
+                    continue
+                result['name'] = self.cleaner.filter_name(self.settings.render_name(result))
+                results.append(result)
+        return results
+
+    def _extract_common(self, item: dict, result: dict):
+        '''提取图文/视频作品共有信息'''
+        for key, getter in self.common_fields:
+            result[key] = getter(item)
+        if desc := result['desc']:
+            result['desc'] = self.cleaner.clear_spaces(self.cleaner.filter_name(desc))[:DESCRIPTION_LENGTH]
+        else:
+            result['desc'] = '作品描述为空'
+        result['create_time_date'] = date.fromtimestamp(int(result['create_timestamp']))
+        result['create_time'] = self.settings.format_date(result['create_time_date'])
+
+    def _extract_gallery(self, gallery: dict, result: dict):
+        '''提取图文作品信息'''
+        result['type'] = '图集'
+        result['share_url'] = f'https://www.douyin.com/note/{result["id"]}'
+        url, width, height = self.image_fields
+        result['downloads'] = [(url(image), width(image), height(image)) for image in gallery]
+
+    def _extract_video(self, video: dict, result: dict):
+        '''提取视频作品信息'''
+        result['type'] = '视频'
+        result['share_url'] = f'https://www.douyin.com/video/{result["id"]}'
+        result['downloads'] = self.video_url(video)
+        result['size'] = video['play_addr'].get('data_size')
+        result['height'] = self.height(video)
+        result['width'] = self.width(video)
+
+    @staticmethod
+    def _extract_value(data: dict, attribute_chain: str):
+        '''根据 attribute_chain 从 dict 中提取值'''
+        return compile_path(attribute_chain)(data)
@@ -1,5 +1,29 @@
-from .msToken import MsToken
-from .ttWid import TtWid
-from .verifyfp import VerifyFp
-from .webid import WebID
-from .js_port import get_a_bogus
\ No newline at end of file
+'''请求参数生成；子模块在首次使用对应名称时才导入（requests、py_mini_racer 导入耗时较长，不影响程序启动）'''
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .msToken import MsToken
+    from .ttWid import TtWid
+    from .verifyfp import VerifyFp
+    from .webid import WebID
+    from .js_port import ABogus, a_bogus, get_a_bogus, get_a_bogus_batch
+
+_exports = {
+    'MsToken': '.msToken',
+    'TtWid': '.ttWid',
+    'VerifyFp': '.verifyfp',
+    'WebID': '.webid',
+    'ABogus': '.js_port',
+    'a_bogus': '.js_port',
+    'get_a_bogus': '.js_port',
+    'get_a_bogus_batch': '.js_port',
+}
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    if (module := _exports.get(name)) is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = globals()[name] = getattr(import_module(module, __name__), name)
+    return value
@@ -5,7 +5,7 @@ from requests import (
 from rich import print
 
 from ..config import USER_AGENT, RED
-from ..tool import retry
+from ..tool import retry, rate_limiter
 
 
 HEADERS = {'User-Agent': USER_AGENT}
@@ -14,8 +14,10 @@ HEADERS = {'User-Agent': USER_AGENT}
 
 @retry
 def send_post(url: str, headers: dict, data: str):
+    '''请求前从共享限速器获取令牌，并根据响应结果调整速率'''
+    rate_limiter.acquire()
     try:
-        return post(url, data=data, timeout=10, headers=headers)
+        response = post(url, data=data, timeout=10, headers=headers)
     except (
             exceptions.ProxyError,
             exceptions.SSLError,
@@ -23,7 +25,13 @@ def send_post(url: str, headers: dict, data: str):
             exceptions.ConnectionError,
             exceptions.ReadTimeout,
     ):
+        rate_limiter.failure()
         return
+    if response.status_code == 429 or 'Retry-After' in response.headers:
+        rate_limiter.failure(rate_limiter.parse_retry_after(response.headers.get('Retry-After')))
+        return
+    rate_limiter.success()
+    return response
 
 
 def extract_value(response_headers: dict, key: str):
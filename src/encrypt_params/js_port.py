@@ -1,15 +1,93 @@
 from os.path import join as join_path
 from urllib import parse
-from py_mini_racer import MiniRacer
+from queue import LifoQueue, Empty
+from threading import Lock
+from typing import TYPE_CHECKING
 
-from ..config import PROJECT_ROOT, USER_AGENT
+from ..config import PROJECT_ROOT, USER_AGENT, SIGN_POOL_SIZE
+from ..tool import metrics
 
-def get_a_bogus(query: dict):
+if TYPE_CHECKING:
+    from py_mini_racer import MiniRacer
+
+
+class ABogus:
+    '''a_bogus 签名引擎：脚本每个进程只读取一次，
+    并维护一个已执行脚本的 MiniRacer 上下文池，供多个调用方并发使用；
+    py_mini_racer（V8 引擎）在创建第一个上下文时才导入'''
     path = join_path(PROJECT_ROOT, 'src/encrypt_params/a_bogus.js')
-    with open(path, 'r', encoding='utf-8') as f:
-        a_bogus_js_code = f.read()
-    a_bogus_ctx = MiniRacer()
-    a_bogus_ctx.eval(a_bogus_js_code)
-    query = parse.unquote(parse.urlencode(query))
-    a_bogus = a_bogus_ctx.call('generate_a_bogus', query, USER_AGENT)
-    return a_bogus
+
+    def __init__(self, pool_size: int = SIGN_POOL_SIZE):
+        self.pool_size = max(pool_size, 1)
+        self._code = None
+        self._created = 0
+        self._lock = Lock()
+        self._pool = LifoQueue()
+
+    def sign(self, query: dict, user_agent: str = USER_AGENT) -> str:
+        '''生成单个查询参数的 a_bogus'''
+        with metrics.timer('sign_seconds'):
+            ctx = self._acquire()
+            try:
+                return self._call(ctx, query, user_agent)
+            finally:
+                self._pool.put(ctx)
+
+    def sign_batch(self, queries: list[dict], user_agent: str = USER_AGENT) -> list[str]:
+        '''使用同一个上下文批量生成 a_bogus，返回值与 queries 顺序一致'''
+        ctx = self._acquire()
+        try:
+            return [self._call(ctx, query, user_agent) for query in queries]
+        finally:
+            self._pool.put(ctx)
+
+    def warm_up(self):
+        '''预先创建一个上下文，避免首次签名时编译脚本'''
+        self._pool.put(self._acquire())
+
+    def _acquire(self) -> 'MiniRacer':
+        '''优先复用空闲上下文；池未满时新建，否则等待其他调用方归还'''
+        try:
+            return self._pool.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if not create:
+            return self._pool.get()
+        try:
+            return self._create()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _create(self) -> 'MiniRacer':
+        from py_mini_racer import MiniRacer
+
+        if self._code is None:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._code = f.read()
+        ctx = MiniRacer()
+        ctx.eval(self._code)
+        return ctx
+
+    @staticmethod
+    def _call(ctx: 'MiniRacer', query: dict, user_agent: str) -> str:
+        query = parse.unquote(parse.urlencode(query))
+        return ctx.call('generate_a_bogus', query, user_agent)
+
+
+a_bogus = ABogus()
+
+
+def get_a_bogus(query: dict):
+    return a_bogus.sign(query)
+
+
+def get_a_bogus_batch(queries: list[dict]):
+    return a_bogus.sign_batch(queries)
@@ -1,123 +1,372 @@
-from os.path import (
-    join as join_path,
-    exists,
-)
-from os import makedirs
-from shutil import rmtree
-from datetime import date
-from rich import print
-import subprocess
-
-from .config import (
-    PROJECT_ROOT,
-    TEXT_REPLACEMENT,
-    WHITE, CYAN
-)
-from .config import Settings, Cookie
-from .tool import Cleaner
-from .download import Acquire, Download, Parse
-from .backup import DownloadRecorder, DownloadItems
-
-
-class Scheduler:
-    def __init__(self) -> None:
-        self.download_recorder = DownloadRecorder()
-        self.download_items = DownloadItems()
-        self.cleaner = Cleaner()
-        self.settings = Settings()
-        self.cookie = Cookie(self.settings)
-        self.parse = Parse(self.cleaner, self.settings)
-        self.download = Download(self.settings, self.cleaner, self.cookie, self.download_recorder)
-        self.acquirer = Acquire(self.settings)
-
-    def run(self):
-        self.check_config()
-        self.main_menu()
-        self.close()
-
-    def check_config(self):
-        self.cleaner.set_rule(TEXT_REPLACEMENT)
-        self.cache_folder = join_path(PROJECT_ROOT, 'cache')
-        self.settings.load_settings()
-
-    def main_menu(self):
-        for i in (
-            '='*25,
-            '1. 复制粘贴写入 Cookie',
-            '2. 修改配置文件(Linux)',
-            '='*25,
-            '3. 批量下载账号作品(配置文件)',
-            '='*25,
-        ):
-            print(f'[{CYAN}]{i}')
-        while (mode := input('\n请选择运行模式：').strip()).lower() != 'q':
-            if mode == '1':
-                self.cookie.input_save()
-            elif mode == '2':
-                subprocess.run(['xdg-open', self.settings.file])
-                try:
-                    subprocess.run(['xdg-open', join_path(PROJECT_ROOT, '已下载账号信息.json')])
-                except:
-                    pass
-                input()
-                self.settings.load_settings()
-            elif mode == '3':
-                if exists(self.cache_folder):
-                    self._continue_last_download()
-                else:
-                    makedirs(self.cache_folder)
-                self._deal_accounts()
-
-    def close(self):
-        try:
-            rmtree(self.cache_folder)
-            self.download_recorder.delete()
-            self.download_items.delete()
-        finally:
-            print(f'[{WHITE}]程序结束运行')
-
-    def _continue_last_download(self):
-        if input('检测到程序上次未正常退出，是否提取上次下载信息：').lower() == 'y':
-            account, items = self.download_items.read()
-            if account and items:
-                self.cookie.update()
-                self.download_recorder.read()
-                print(f'[{CYAN}]\n开始提取上次未下载完作品数据')
-                account_id = account['id']
-                account_mark = account['mark']
-                print(f'[{CYAN}]账号标识：{account_mark}；账号 ID：{account_id}')
-                self.download_recorder.open_()
-                self.download.download_files(items, account_id, account_mark)
-                self.download_recorder.f_obj.close()
-        else:
-            self.download_recorder.delete()
-            self.download_items.delete()
-
-    def _deal_accounts(self):
-        accounts = self.settings.accounts
-        print(f'[{CYAN}]共有 {len(accounts)} 个账号的作品等待下载')
-        for num, account in enumerate(accounts, start=1):
-            self.cookie.update()
-            self._deal_account(num, account)
-
-    def _deal_account(self, num: int, account: dict[str, str | date]):
-        for i in (
-            f'\n开始处理第 {num} 个账号' if num else '开始处理账号',
-            f'账号标识：{account["mark"] or "空"}',
-            f'最早发布日期：{account["earliest"] or "空"}，最晚发布日期：{account["latest"] or "空"}'
-        ):
-            print(f'[{CYAN}]{i}')
-        items = self.acquirer.request_items(account['sec_user_id'], account['earliest_date'])
-        if items:
-            print(f'[{CYAN}]\n开始提取作品数据')
-            self.parse.extract_account(account, items[0])
-            account_id = account['id']
-            account_mark = account['mark']
-            print(f'[{CYAN}]账号标识：{account_mark}；账号 ID：{account_id}')
-            items = self.parse.extract_items(items, account['earliest_date'], account['latest_date'])
-            print(f'[{CYAN}]当前账号作品数量: {len(items)}')
-            self.download_items.save(account, items)
-            self.download_recorder.open_()
-            self.download.download_files(items, account_id, account_mark)
-            self.download_recorder.f_obj.close()
-            return True
+from os.path import (
+    join as join_path,
+    exists,
+)
+from os import makedirs
+from shutil import rmtree
+from datetime import date, datetime
+from functools import cached_property
+from rich import print
+import subprocess
+from queue import Queue
+from threading import Thread
+from itertools import chain
+from signal import signal, SIGINT, SIGTERM
+
+from .config import (
+    PROJECT_ROOT,
+    TEXT_REPLACEMENT,
+    WHITE, YELLOW, CYAN,
+    PIPELINE_ACCOUNTS, PIPELINE_DEPTH,
+    ACQUIRE_ACCOUNTS,
+    STREAM_DOWNLOAD,
+    INCREMENTAL_SYNC,
+    METRICS_TEXTFILE, METRICS_SUMMARY,
+    SIGN_WARM_UP
+)
+from .config import Settings, Cookie
+from .tool import Cleaner, metrics, deferred_interrupt
+from .backup import DownloadRecorder, DownloadItems, DownloadIndex, JobQueue
+
+
+class Scheduler:
+    def __init__(self, settings: Settings = None, cookie: Cookie = None,
+                 download_index: DownloadIndex = None, cleaner: Cleaner = None, bandwidth=None) -> None:
+        '''守护进程的工作线程传入共用的 Settings、Cookie、DownloadIndex、Cleaner 与带宽限速器（RateLimiter）'''
+        self.download_recorder = DownloadRecorder()
+        self.download_items = DownloadItems()
+        self.download_index = download_index or DownloadIndex()
+        self.cleaner = cleaner or Cleaner()
+        self.settings = settings or Settings()
+        self.cookie = cookie or Cookie(self.settings)
+        self.bandwidth = bandwidth
+
+    # 作品数据获取、提取与文件下载对象在首次使用时才创建（同时才导入 aiohttp、requests 等模块），
+    # 只写入 Cookie、修改配置文件时不需要等待
+    @cached_property
+    def parse(self):
+        from .download import Parse
+        return Parse(self.cleaner, self.settings)
+
+    @cached_property
+    def download(self):
+        from .download import Download
+        return Download(self.settings, self.cleaner, self.cookie, self.download_recorder, self.download_index,
+                        self.bandwidth)
+
+    @cached_property
+    def acquirer(self):
+        from .download import Acquire
+        return Acquire(self.settings)
+
+    @cached_property
+    def async_acquirer(self):
+        from .download import AsyncAcquire
+        return AsyncAcquire(self.settings)
+
+    def run(self):
+        signal(SIGINT, self._terminate)
+        signal(SIGTERM, self._terminate)
+        self.check_config()
+        self.main_menu()
+        self.close()
+
+    def check_config(self):
+        if SIGN_WARM_UP:
+            Thread(target=self._warm_up, daemon=True).start()
+        self.cleaner.set_rule(TEXT_REPLACEMENT)
+        self.cache_folder = join_path(PROJECT_ROOT, 'cache')
+        self.settings.load_settings()
+        self.download_index.open_()
+
+    def main_menu(self):
+        for i in (
+            '='*25,
+            '1. 复制粘贴写入 Cookie',
+            '2. 修改配置文件(Linux)',
+            '='*25,
+            '3. 批量下载账号作品(配置文件)',
+            '='*25,
+            '4. 添加账号同步任务(守护进程，配置文件)',
+            '5. 查看、删除账号同步任务',
+            '='*25,
+        ):
+            print(f'[{CYAN}]{i}')
+        while (mode := input('\n请选择运行模式：').strip()).lower() != 'q':
+            if mode == '1':
+                self.cookie.input_save()
+            elif mode == '2':
+                subprocess.run(['xdg-open', self.settings.file])
+                try:
+                    subprocess.run(['xdg-open', join_path(PROJECT_ROOT, '已下载账号信息.json')])
+                except:
+                    pass
+                input()
+                self.settings.load_settings()
+            elif mode == '3':
+                if exists(self.cache_folder):
+                    self._continue_last_download()
+                else:
+                    makedirs(self.cache_folder)
+                self._deal_accounts()
+            elif mode == '4':
+                self._add_jobs()
+            elif mode == '5':
+                self._manage_jobs()
+
+    def close(self):
+        try:
+            if 'download' in self.__dict__:
+                self.download.close()
+            self.cookie.close()
+            self.download_index.close()
+            metrics.write(METRICS_TEXTFILE, METRICS_SUMMARY)
+            rmtree(self.cache_folder)
+            self.download_recorder.delete()
+            self.download_items.delete()
+        finally:
+            print(f'[{WHITE}]程序结束运行')
+
+    @staticmethod
+    def _warm_up():
+        '''读取配置文件的同时在后台导入 V8 引擎并执行 a_bogus 签名脚本，首次签名时不再等待；
+        失败时忽略，首次签名时会再次创建并报告错误'''
+        try:
+            from .encrypt_params import a_bogus
+            a_bogus.warm_up()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _terminate(signum, frame):
+        '''收到 SIGTERM 时与 Ctrl+C 相同处理：保留断点数据，退出前写入缓冲的下载记录；
+        正在重命名文件并保存下载记录时，完成后再引发 KeyboardInterrupt'''
+        deferred_interrupt.handler(signum, frame)
+
+    def run_job(self, account: dict[str, str | date], folder: str):
+        '''执行守护进程的单个账号同步任务，断点数据保存在任务自己的文件夹 folder 中；
+        文件夹中存在上次未完成的断点数据时先继续下载，再同步账号；
+        返回是否完整获取作品数据且全部文件下载成功，成功后删除断点数据'''
+        self.download_recorder = self.download.download_recorder = DownloadRecorder(folder)
+        self.download_items = DownloadItems(folder)
+        try:
+            if exists(self.download_items.path) and not self._resume_download():
+                return False
+            makedirs(folder, exist_ok=True)
+            self.cookie.update()
+            success = (self._stream_account if STREAM_DOWNLOAD else self._deal_account)(0, account)
+        finally:
+            # 任务出错时同样关闭，避免工作线程执行后续任务时遗留打开的日志文件与后台写入线程
+            self.download_recorder.close()
+            self.download_items.close()
+        if success:
+            rmtree(folder)
+        return bool(success)
+
+    def _continue_last_download(self):
+        if input('检测到程序上次未正常退出，是否提取上次下载信息：').lower() == 'y':
+            self._resume_download()
+        else:
+            self.download_recorder.delete()
+            self.download_items.delete()
+
+    def _resume_download(self):
+        '''继续下载断点数据中的作品；断点数据已丢失时返回 True，否则返回全部文件是否下载成功'''
+        account, pages = self.download_items.read()
+        if not account:
+            return True
+        self.cookie.update()
+        self.download_recorder.read()
+        print(f'[{CYAN}]\n开始提取上次未下载完作品数据')
+        account_id = account['id']
+        account_mark = account['mark']
+        print(f'[{CYAN}]账号标识：{account_mark}；账号 ID：{account_id}')
+        self.download_recorder.open_()
+        success = self.download.download_stream(pages, account_id, account_mark)
+        self.download_recorder.close()
+        return success
+
+    def _add_jobs(self):
+        '''将配置文件中的全部账号加入守护进程任务队列'''
+        try:
+            priority = int(input('任务优先级（整数，越大越先执行，默认 0）：').strip() or 0)
+            interval = float(input('重复执行间隔（小时，留空只执行一次）：').strip() or 0) * 3600
+        except ValueError:
+            print(f'[{YELLOW}]输入格式错误')
+            return
+        job_queue = JobQueue()
+        job_queue.open_()
+        try:
+            for account in self.settings.settings['accounts']:
+                id = job_queue.add(account, priority, interval)
+                print(f'[{CYAN}]添加任务 {id}：{account["mark"] or account["url"]}')
+        finally:
+            job_queue.close()
+        print(f'[{CYAN}]运行 python run.py daemon 启动守护进程执行任务')
+
+    def _manage_jobs(self):
+        '''显示守护进程任务队列，删除输入的任务'''
+        job_queue = JobQueue()
+        job_queue.open_()
+        try:
+            if not (jobs := job_queue.jobs()):
+                print(f'[{CYAN}]任务队列为空')
+                return
+            for job in jobs:
+                interval = f'每 {job["interval"] / 3600:g} 小时' if job['interval'] else '一次性'
+                print(f'[{CYAN}]{job["id"]:>4}  {job["account"]["mark"] or job["account"]["url"]}  '
+                      f'优先级 {job["priority"]}  {interval}  {job["state"]}  '
+                      f'下次执行 {datetime.fromtimestamp(job["next_run"]):%Y-%m-%d %H:%M:%S}'
+                      + (f'  失败 {job["failures"]} 次：{job["error"]}' if job['error'] else ''))
+            for id in input('输入要删除的任务 id（多个使用空格分隔，留空返回）：').split():
+                if id.isdigit() and job_queue.remove(int(id)):
+                    print(f'[{CYAN}]已删除任务 {id}')
+        finally:
+            job_queue.close()
+
+    def _deal_accounts(self):
+        accounts = self.settings.accounts
+        print(f'[{CYAN}]共有 {len(accounts)} 个账号的作品等待下载')
+        if STREAM_DOWNLOAD:
+            for num, account in enumerate(accounts, start=1):
+                self.cookie.update()
+                self._stream_account(num, account)
+        elif PIPELINE_ACCOUNTS:
+            self._deal_accounts_pipeline(accounts)
+        else:
+            for num, account in enumerate(accounts, start=1):
+                self.cookie.update()
+                self._deal_account(num, account)
+
+    def _deal_accounts_pipeline(self, accounts: list[dict]):
+        '''获取账号作品数据与下载作品文件流水线执行：
+        主线程下载当前账号作品文件的同时，后台线程获取后续账号作品数据，
+        两者之间通过容量为 PIPELINE_DEPTH 的队列交接'''
+        queue = Queue(PIPELINE_DEPTH)
+        producer = Thread(target=self._produce_accounts, args=(accounts, queue), daemon=True)
+        producer.start()
+        while (data := queue.get()) is not None:
+            account, items = data
+            print(f'[{CYAN}]\n开始下载账号 {account["mark"]} 的作品文件')
+            self._download_account(account, items)
+        producer.join()
+
+    def _produce_accounts(self, accounts: list[dict], queue: Queue):
+        try:
+            if ACQUIRE_ACCOUNTS > 1:
+                from asyncio import run
+
+                self.cookie.update()
+                for account in accounts:
+                    account['synced'] = self._read_sync(account)
+                run(self._produce_accounts_async(accounts, queue))
+            else:
+                for num, account in enumerate(accounts, start=1):
+                    self.cookie.update()
+                    if (items := self._acquire_account(num, account, show_progress=False)) is not None:
+                        queue.put((account, items))
+        finally:
+            queue.put(None)
+
+    async def _produce_accounts_async(self, accounts: list[dict], queue: Queue):
+        '''多个账号同时获取作品数据，按获取完成的顺序交给下载线程'''
+        from asyncio import to_thread
+
+        print(f'[{CYAN}]\n开始同时获取 {min(ACQUIRE_ACCOUNTS, len(accounts))} 个账号的作品数据')
+        async for account, items in self.async_acquirer.request_accounts(accounts):
+            if (items := self._extract_account(account, items)) is not None:
+                await to_thread(queue.put, (account, items))
+
+    def _deal_account(self, num: int, account: dict[str, str | date]):
+        '''获取并下载账号作品，返回是否完整获取作品数据且全部文件下载成功'''
+        if (items := self._acquire_account(num, account)) is not None:
+            return self._download_account(account, items) and account['complete']
+        return account['complete']
+
+    def _stream_account(self, num: int, account: dict[str, str | date]):
+        '''逐页获取、提取并下载账号作品，原始作品数据提取后即释放；
+        每页作品信息提取后追加写入断点数据'''
+        self._show_account(num, account)
+        pages = self.acquirer.iter_pages(account['sec_user_id'], account['earliest_date'],
+                                         show_progress=False, synced=self._read_sync(account))
+        if not (first := next(pages, None)):
+            return self.acquirer.complete
+        self.parse.extract_account(account, first[0])
+        print(f'[{CYAN}]账号标识：{account["mark"]}；账号 ID：{account["id"]}')
+        # 只累计作品数量与最新发布时间戳，不保留已下载的作品信息
+        count = newest = 0
+        self.download_items.open_(account)
+
+        def extract_pages():
+            nonlocal count, newest
+            for page in chain((first,), pages):
+                items_page = self.parse.extract_items(page, account['earliest_date'], account['latest_date'])
+                count += len(items_page)
+                newest = max(newest, self._newest(items_page))
+                self.download_items.append(items_page)
+                yield items_page
+            print(f'[{CYAN}]当前账号作品数量: {count}')
+            self.download_items.close()
+            account['complete'] = self.acquirer.complete
+            account['cursor'] = self.acquirer.cursor
+
+        self.download_recorder.open_()
+        success = self.download.download_stream(extract_pages(), account['id'], account['mark'])
+        self.download_recorder.close()
+        self._save_sync(account, newest, success)
+        return success and account.get('complete')
+
+    def _show_account(self, num: int, account: dict[str, str | date]):
+        for i in (
+            f'\n开始处理第 {num} 个账号' if num else '开始处理账号',
+            f'账号标识：{account["mark"] or "空"}',
+            f'最早发布日期：{account["earliest"] or "空"}，最晚发布日期：{account["latest"] or "空"}'
+        ):
+            print(f'[{CYAN}]{i}')
+
+    def _acquire_account(self, num: int, account: dict[str, str | date], show_progress: bool = True):
+        '''获取并提取账号作品数据，返回作品信息列表'''
+        self._show_account(num, account)
+        items = self.acquirer.request_items(account['sec_user_id'], account['earliest_date'], show_progress,
+                                            self._read_sync(account))
+        account['complete'] = self.acquirer.complete
+        account['cursor'] = self.acquirer.cursor
+        return self._extract_account(account, items)
+
+    def _extract_account(self, account: dict[str, str | date], items: list[dict]):
+        '''提取账号信息及作品信息，返回作品信息列表'''
+        if items:
+            print(f'[{CYAN}]\n开始提取作品数据')
+            self.parse.extract_account(account, items[0])
+            print(f'[{CYAN}]账号标识：{account["mark"]}；账号 ID：{account["id"]}')
+            items = self.parse.extract_items(items, account['earliest_date'], account['latest_date'])
+            print(f'[{CYAN}]当前账号作品数量: {len(items)}')
+            return items
+
+    def _download_account(self, account: dict[str, str | date], items: list[dict]):
+        '''保存断点数据并下载账号作品文件'''
+        account_id = account['id']
+        account_mark = account['mark']
+        self.download_items.save(account, items)
+        self.download_recorder.open_()
+        success = self.download.download_files(items, account_id, account_mark)
+        self.download_recorder.close()
+        self._save_sync(account, self._newest(items), success)
+        return success
+
+    def _read_sync(self, account: dict[str, str | date]):
+        '''增量同步模式下返回账号已同步的最新作品发布时间戳'''
+        if INCREMENTAL_SYNC and (synced := self.download_index.read_sync(account['sec_user_id'])) is not None:
+            print(f'[{CYAN}]账号 {account["mark"] or account["sec_user_id"]} 已同步至 '
+                  f'{datetime.fromtimestamp(synced):%Y-%m-%d %H:%M:%S}，只获取之后发布的作品')
+            return synced
+
+    @staticmethod
+    def _newest(items: list[dict]) -> int:
+        '''返回作品的最新发布时间戳，没有作品时返回 0'''
+        return max((int(item['create_timestamp']) for item in items), default=0)
+
+    def _save_sync(self, account: dict[str, str | date], newest: int, success: bool):
+        '''账号作品数据完整获取且全部文件下载成功后，更新账号同步位置；newest 为本次作品的最新发布时间戳'''
+        if INCREMENTAL_SYNC and success and newest and account.get('complete'):
+            self.download_index.save_sync(account['sec_user_id'], newest, account.get('cursor'))
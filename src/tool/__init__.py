@@ -1,4 +1,47 @@
-from .function import (
-    retry, retry_async
-)
-from .cleaner import Cleaner
\ No newline at end of file
+'''通用工具；子模块在首次使用对应名称时才导入（asyncio 等导入耗时较长，不影响程序启动）'''
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .function import retry, retry_async
+    from .cleaner import Cleaner
+    from .limiter import RateLimiter, BandwidthLimiter, ConcurrencyController, rate_limiter
+    from .folder import FolderIndex
+    from .task_queue import FairQueue
+    from .writer import FileWriter, preallocate
+    from .dedup import new_hasher, hash_file, uri_key, link_file
+    from .metrics import Metrics, metrics
+    from .progress import HeadlessProgress, headless_mode
+    from .interrupt import DeferredInterrupt, deferred_interrupt
+
+_exports = {
+    'retry': '.function',
+    'retry_async': '.function',
+    'Cleaner': '.cleaner',
+    'RateLimiter': '.limiter',
+    'BandwidthLimiter': '.limiter',
+    'ConcurrencyController': '.limiter',
+    'rate_limiter': '.limiter',
+    'FolderIndex': '.folder',
+    'FairQueue': '.task_queue',
+    'FileWriter': '.writer',
+    'preallocate': '.writer',
+    'new_hasher': '.dedup',
+    'hash_file': '.dedup',
+    'uri_key': '.dedup',
+    'link_file': '.dedup',
+    'Metrics': '.metrics',
+    'metrics': '.metrics',
+    'HeadlessProgress': '.progress',
+    'headless_mode': '.progress',
+    'DeferredInterrupt': '.interrupt',
+    'deferred_interrupt': '.interrupt',
+}
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    if (module := _exports.get(name)) is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = globals()[name] = getattr(import_module(module, __name__), name)
+    return value
@@ -0,0 +1,62 @@
+import os
+from hashlib import new
+from urllib.parse import urlsplit, parse_qs
+
+from ..config import DEDUP_HASH, WRITE_BUFFER_SIZE
+
+try:
+    from fcntl import ioctl
+except ImportError:  # Windows
+    ioctl = None
+
+FICLONE = 0x40049409  # Linux ioctl：reflink（btrfs、XFS 等写时复制文件系统）
+
+
+def new_hasher():
+    return new(DEDUP_HASH)
+
+
+def hash_file(path: str) -> str:
+    '''读取文件并返回内容哈希（十六进制）'''
+    hasher = new_hasher()
+    with open(path, 'rb') as f:
+        while data := f.read(WRITE_BUFFER_SIZE):
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def uri_key(url: str) -> str:
+    '''返回文件地址中标识文件的部分，不包含主机与带有效期、签名的查询参数：
+    播放接口地址使用 video_id 参数，其他地址使用路径'''
+    parts = urlsplit(url)
+    if video_id := parse_qs(parts.query).get('video_id'):
+        return f'video_id:{video_id[0]}'
+    return parts.path
+
+
+def link_file(src: str, dst: str, reflink: bool = False) -> bool:
+    '''将 dst 替换为 src 的 reflink（reflink 为 True 且文件系统支持时）或者硬链接；
+    先创建临时文件再重命名，失败（跨文件系统、不支持链接等）时保留 dst 原有内容并返回 False'''
+    temp = f'{dst}.link'
+    try:
+        if not (reflink and _reflink(src, temp)):
+            os.link(src, temp)
+        os.replace(temp, dst)
+        return True
+    except OSError:
+        if os.path.exists(temp):
+            os.remove(temp)
+        return False
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if ioctl is None:
+        return False
+    try:
+        with open(src, 'rb') as source, open(dst, 'wb') as target:
+            ioctl(target.fileno(), FICLONE, source.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
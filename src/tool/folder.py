@@ -0,0 +1,58 @@
+from os import scandir, remove, replace
+from os.path import split, exists, getsize
+
+
+class FolderIndex:
+    '''文件夹快照索引：每个文件夹只使用 scandir 列出一次，在内存中记录 文件名 → 文件大小，
+    之后判断文件是否存在不再逐个访问文件系统；
+    scandir 在 POSIX 系统中不返回文件大小，文件大小在首次查询时才读取并缓存；
+    通过本对象删除、重命名文件，或者写入文件后调用 add()，索引才能与文件夹保持一致；
+    未扫描的文件夹直接访问文件系统'''
+
+    def __init__(self):
+        self.folders = {}
+
+    def scan(self, folder: str):
+        '''列出文件夹内容，替换该文件夹原有的快照'''
+        with scandir(folder) as entries:
+            self.folders[folder] = dict.fromkeys(entry.name for entry in entries)
+
+    def exists(self, path: str) -> bool:
+        folder, name = split(path)
+        if (entries := self.folders.get(folder)) is None:
+            return exists(path)
+        return name in entries
+
+    def size(self, path: str) -> int:
+        '''返回文件大小，文件不存在时返回 0'''
+        folder, name = split(path)
+        if (entries := self.folders.get(folder)) is None:
+            return getsize(path) if exists(path) else 0
+        if name not in entries:
+            return 0
+        if (size := entries[name]) is None:
+            size = entries[name] = getsize(path)
+        return size
+
+    def add(self, path: str, size: int = None):
+        '''记录新写入的文件；size 为 None 时在下次查询时读取文件大小'''
+        folder, name = split(path)
+        if (entries := self.folders.get(folder)) is not None:
+            entries[name] = size
+
+    def discard(self, path: str):
+        folder, name = split(path)
+        if (entries := self.folders.get(folder)) is not None:
+            entries.pop(name, None)
+
+    def remove(self, path: str):
+        '''删除文件并更新索引'''
+        remove(path)
+        self.discard(path)
+
+    def replace(self, src: str, dst: str):
+        '''重命名文件并更新索引，文件大小保持不变'''
+        replace(src, dst)
+        folder, name = split(src)
+        size = self.folders[folder].pop(name, None) if folder in self.folders else None
+        self.add(dst, size)
@@ -0,0 +1,35 @@
+from contextlib import contextmanager
+from threading import current_thread, main_thread
+
+
+class DeferredInterrupt:
+    '''Ctrl+C、SIGTERM 处理：主线程位于 critical() 代码块中时，推迟到代码块结束后再引发 KeyboardInterrupt，
+    用于重命名文件与保存下载记录等必须一起完成的操作；信号处理函数只在主线程执行，其他线程的代码块不受影响'''
+
+    def __init__(self):
+        self.depth = 0
+        self.pending = False
+
+    def handler(self, signum, frame):
+        '''SIGINT、SIGTERM 信号处理函数'''
+        if self.depth:
+            self.pending = True
+        else:
+            raise KeyboardInterrupt
+
+    @contextmanager
+    def critical(self):
+        if current_thread() is not main_thread():
+            yield
+            return
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if not self.depth and self.pending:
+                self.pending = False
+                raise KeyboardInterrupt
+
+
+deferred_interrupt = DeferredInterrupt()
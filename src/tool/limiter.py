@@ -0,0 +1,193 @@
+from time import monotonic, sleep, time
+from threading import Lock
+from email.utils import parsedate_to_datetime
+from collections import Counter
+from contextlib import asynccontextmanager
+import asyncio
+from rich import print
+
+from ..config import (
+    YELLOW,
+    RATE_LIMIT, RATE_BURST, RATE_MIN, RATE_MAX,
+    RATE_INCREASE, RATE_DECREASE, RATE_SUCCESS_THRESHOLD,
+    CONCURRENCY, CONCURRENCY_MIN, CONCURRENCY_MAX, CONCURRENCY_PER_HOST,
+    CONCURRENCY_INTERVAL, CONCURRENCY_GAIN, CONCURRENCY_DECREASE
+)
+
+
+class RateLimiter:
+    '''令牌桶限速器，按 AIMD 调整速率：
+    连续成功 success_threshold 次后速率增加 increase，失败时速率乘以 decrease；
+    rate 属性为当前速率（次/秒），可同时用于线程与协程'''
+
+    def __init__(self, rate: float = RATE_LIMIT, burst: float = RATE_BURST,
+                 min_rate: float = RATE_MIN, max_rate: float = RATE_MAX,
+                 increase: float = RATE_INCREASE, decrease: float = RATE_DECREASE,
+                 success_threshold: int = RATE_SUCCESS_THRESHOLD):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.success_threshold = success_threshold
+        self.tokens = burst
+        self.updated = monotonic()
+        self.blocked_until = 0
+        self.successes = 0
+        self._lock = Lock()
+
+    def acquire(self, amount: float = 1):
+        '''阻塞直到获得 amount 个令牌'''
+        if (wait := self._reserve(amount)) > 0:
+            sleep(wait)
+
+    async def acquire_async(self, amount: float = 1):
+        '''等待直到获得 amount 个令牌，不阻塞事件循环；用作带宽限速器时 amount 为字节数'''
+        if (wait := self._reserve(amount)) > 0:
+            await asyncio.sleep(wait)
+
+    def success(self):
+        '''记录一次成功的请求，连续成功达到阈值后提高速率'''
+        with self._lock:
+            self.successes += 1
+            if self.successes >= self.success_threshold:
+                self.successes = 0
+                self.rate = min(self.rate + self.increase, self.max_rate)
+
+    def failure(self, retry_after: float | None = None):
+        '''记录一次失败的请求并降低速率；retry_after 为服务器要求的等待秒数'''
+        with self._lock:
+            self.successes = 0
+            self.rate = max(self.rate * self.decrease, self.min_rate)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, monotonic() + retry_after)
+        print(f'[{YELLOW}]请求速率降低为 {self.rate:.2f} 次/秒' + (f'，暂停 {retry_after:.0f} 秒' if retry_after else ''))
+
+    def _reserve(self, amount: float = 1) -> float:
+        '''预占 amount 个令牌，返回需要等待的秒数；令牌不足时记为欠账，由后续请求依次等待'''
+        with self._lock:
+            now = monotonic()
+            self.tokens = min(self.tokens + (now - self.updated) * self.rate, self.burst)
+            self.updated = now
+            self.tokens -= amount
+            return max(-self.tokens / self.rate, self.blocked_until - now, 0)
+
+    @staticmethod
+    def parse_retry_after(value: str | None) -> float | None:
+        '''解析 Retry-After 响应头，支持秒数与 HTTP 日期两种格式'''
+        if not value:
+            return
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time(), 0)
+        except (TypeError, ValueError):
+            return
+
+
+class BandwidthLimiter:
+    '''带宽限速器（按字节数限速），按账号公平分配：正在使用带宽（已预占的带宽尚未用完）的账号平分总速率 rate，
+    每个账号的速率为 rate / 这些账号的数量，各账号速率之和不超过 rate；空闲账号不占用份额，只有一个账号下载时使用全部带宽；
+    可同时用于多个线程的事件循环，守护进程同时执行的任务共用一个'''
+
+    def __init__(self, rate: float, burst: float = 0):
+        self.rate = rate
+        self.burst = burst
+        # 账号 -> 该账号已预占带宽的结束时间，只保留尚未结束的账号
+        self.accounts = {}
+        self._lock = Lock()
+
+    async def acquire_async(self, amount: float, account: str = ''):
+        '''等待直到 account 可以下载 amount 字节，不阻塞事件循环'''
+        if (wait := self._reserve(amount, account)) > 0:
+            await asyncio.sleep(wait)
+
+    def _reserve(self, amount: float, account: str = '') -> float:
+        '''按账号当前份额顺延该账号已预占带宽的结束时间，返回需要等待的秒数；
+        每个账号最多可以提前下载 burst 字节'''
+        with self._lock:
+            now = monotonic()
+            self.accounts = {key: until for key, until in self.accounts.items() if until > now}
+            share = self.rate / (len(self.accounts) + (account not in self.accounts))
+            until = self.accounts[account] = max(self.accounts.get(account, now), now) + amount / share
+            return until - now - self.burst / share
+
+
+class ConcurrencyController:
+    '''自适应并发控制：限制同时下载的文件数量 limit，每个主机同时下载的文件数量不超过 per_host；
+    每隔 interval 秒按这段时间的总下载速度调整 limit（爬山法）：
+    有文件等待下载名额且速度比上一周期提高 gain 以上时 limit 加 1，
+    上一次增加后速度反而下降 gain 以上时 limit 减 1，失败（超时、网络异常、限速、服务器错误）时 limit 乘以 decrease；
+    limit 保持在 [min_limit, max_limit]；只能在同一个事件循环中使用'''
+
+    def __init__(self, limit: int = CONCURRENCY, min_limit: int = CONCURRENCY_MIN, max_limit: int = CONCURRENCY_MAX,
+                 per_host: int = CONCURRENCY_PER_HOST, interval: float = CONCURRENCY_INTERVAL,
+                 gain: float = CONCURRENCY_GAIN, decrease: float = CONCURRENCY_DECREASE):
+        self.limit = min(max(limit, min_limit), max_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.per_host = per_host
+        self.interval = interval
+        self.gain = gain
+        self.decrease = decrease
+        self.active = 0
+        self.waiting = 0
+        self.hosts = Counter()
+        self.condition = None
+        self.bytes = 0
+        self.failures = 0
+        self.started = monotonic()
+        self.throughput = None
+        self.increased = False
+
+    @asynccontextmanager
+    async def slot(self, host: str = ''):
+        '''等待并占用一个下载名额，退出时释放名额并按需调整 limit'''
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+        async with self.condition:
+            self.waiting += 1
+            try:
+                await self.condition.wait_for(lambda: self.active < self.limit and self.hosts[host] < self.per_host)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self.hosts[host] += 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.active -= 1
+                self.hosts[host] -= 1
+                self._adjust()
+                self.condition.notify_all()
+
+    def record(self, size: int):
+        '''记录下载的字节数'''
+        self.bytes += size
+
+    def failure(self):
+        '''记录一次失败的请求'''
+        self.failures += 1
+
+    def _adjust(self):
+        if (elapsed := (now := monotonic()) - self.started) < self.interval and not self.failures:
+            return
+        throughput = self.bytes / elapsed if elapsed else 0
+        if self.failures:
+            self.limit = max(int(self.limit * self.decrease), self.min_limit)
+            self.increased = False
+        elif self.increased and throughput < self.throughput * (1 - self.gain):
+            self.limit = max(self.limit - 1, self.min_limit)
+            self.increased = False
+        elif self.waiting and (self.throughput is None or throughput > self.throughput * (1 + self.gain)):
+            self.increased = self.limit < self.max_limit
+            self.limit = min(self.limit + 1, self.max_limit)
+        else:
+            self.increased = False
+        self.throughput = throughput
+        self.started, self.bytes, self.failures = now, 0, 0
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,170 @@
+from time import perf_counter, time
+from threading import Lock
+from contextlib import contextmanager
+from bisect import bisect_left
+from math import isinf, isnan
+from json import dump
+from os import makedirs, replace
+from os.path import dirname
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+THROUGHPUT_BUCKETS = tuple(2 ** i * 1024 for i in range(6, 21, 2))  # 64KiB/s ~ 1GiB/s
+DEPTH_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Metrics:
+    '''运行指标：计数器与直方图，可同时用于线程与协程；
+    运行结束时写入 Prometheus textfile（供 node exporter textfile collector 采集）与 JSON 汇总'''
+
+    def __init__(self, prefix: str = 'douyin'):
+        self.prefix = prefix
+        self.definitions = {}
+        self.reset()
+        self._lock = Lock()
+
+    def counter(self, name: str, help_: str):
+        self.definitions[name] = ('counter', help_, None)
+
+    def histogram(self, name: str, help_: str, buckets: tuple = LATENCY_BUCKETS):
+        self.definitions[name] = ('histogram', help_, buckets)
+
+    def reset(self):
+        self.started = time()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = self.definitions[name][2]
+        with self._lock:
+            if (histogram := self.histograms.get(key)) is None:
+                histogram = self.histograms[key] = [[0] * (len(buckets) + 1), 0, 0]
+            histogram[0][bisect_left(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        '''记录代码块耗时（秒）'''
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start, **labels)
+
+    def prometheus(self) -> str:
+        '''生成 Prometheus 文本格式指标'''
+        lines = []
+        now = time()
+        for name, value, help_ in (
+                ('run_start_timestamp_seconds', self.started, '本次运行开始时间'),
+                ('run_end_timestamp_seconds', now, '本次运行结束时间'),
+                ('run_duration_seconds', now - self.started, '本次运行耗时'),
+        ):
+            lines += [f'# HELP {self.prefix}_{name} {help_}', f'# TYPE {self.prefix}_{name} gauge',
+                      f'{self.prefix}_{name} {value:.3f}']
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: (list(value[0]), value[1], value[2]) for key, value in self.histograms.items()}
+        for name, (type_, help_, buckets) in self.definitions.items():
+            full_name = f'{self.prefix}_{name}'
+            lines += [f'# HELP {full_name} {help_}', f'# TYPE {full_name} {type_}']
+            if type_ == 'counter':
+                for (key, labels), value in counters.items():
+                    if key == name:
+                        lines.append(f'{full_name}{self._labels(labels)} {self._fmt(value)}')
+                continue
+            for (key, labels), (counts, sum_, count) in histograms.items():
+                if key != name:
+                    continue
+                cumulative = 0
+                for bound, bucket in zip(buckets + ('+Inf',), counts):
+                    cumulative += bucket
+                    lines.append(f'{full_name}_bucket{self._labels(labels + (("le", self._fmt(bound)),))} {cumulative}')
+                lines.append(f'{full_name}_sum{self._labels(labels)} {self._fmt(sum_)}')
+                lines.append(f'{full_name}_count{self._labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> dict:
+        '''生成 JSON 汇总：计数器数值，直方图的次数、总和、平均值与估计的 P50/P95/P99'''
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: (list(value[0]), value[1], value[2]) for key, value in self.histograms.items()}
+        duration = time() - self.started
+        result = {'started': self.started, 'duration': round(duration, 3), 'counters': [], 'histograms': []}
+        for (name, labels), value in counters.items():
+            result['counters'].append({'name': name, 'labels': dict(labels), 'value': value})
+        for (name, labels), (counts, sum_, count) in histograms.items():
+            buckets = self.definitions[name][2]
+            result['histograms'].append({
+                'name': name, 'labels': dict(labels), 'count': count, 'sum': round(sum_, 6),
+                'mean': round(sum_ / count, 6) if count else None,
+                **{f'p{int(q * 100)}': self._quantile(buckets, counts, count, q) for q in (0.5, 0.95, 0.99)},
+            })
+        downloaded = sum(value for (name, _), value in counters.items() if name == 'file_bytes_total')
+        result['throughput_bytes_per_second'] = round(downloaded / duration, 1) if duration else None
+        return result
+
+    def write(self, textfile: str, summary: str):
+        '''写入 Prometheus textfile 与 JSON 汇总；先写入临时文件再重命名，避免采集到写了一半的文件'''
+        for path, write in (
+                (textfile, lambda f: f.write(self.prometheus())),
+                (summary, lambda f: dump(self.summary(), f, ensure_ascii=False, indent=4)),
+        ):
+            makedirs(dirname(path), exist_ok=True)
+            with open(temp := f'{path}.tmp', 'w', encoding='UTF-8') as f:
+                write(f)
+            replace(temp, path)
+
+    @staticmethod
+    def _fmt(value: float | str) -> str:
+        '''Prometheus 数值格式：整数原样输出，浮点数使用 repr（不丢失精度），无穷大为 +Inf/-Inf'''
+        if isinstance(value, str):
+            return value
+        if isinstance(value, int):
+            return str(value)
+        if isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if isnan(value):
+            return 'NaN'
+        return repr(value)
+
+    @staticmethod
+    def _labels(labels: tuple) -> str:
+        if not labels:
+            return ''
+        values = ','.join(f'{key}="{str(value)}"' for key, value in labels)
+        return f'{{{values}}}'
+
+    @staticmethod
+    def _quantile(buckets: tuple, counts: list, count: int, q: float):
+        '''返回第 q 分位数所在桶的上界；落在最后一个桶（+Inf）时返回 None'''
+        if not count:
+            return
+        cumulative = 0
+        for bound, bucket in zip(buckets, counts):
+            cumulative += bucket
+            if cumulative >= q * count:
+                return bound
+
+
+metrics = Metrics()
+metrics.histogram('sign_seconds', 'a_bogus 签名耗时（秒）')
+metrics.histogram('page_request_seconds', '账号作品数据单页请求耗时（秒）')
+metrics.counter('page_requests_total', '账号作品数据请求次数，result 为请求结果；失败的请求会重新执行')
+metrics.histogram('file_ttfb_seconds', '文件请求发出到收到响应头的耗时（秒）')
+metrics.histogram('file_throughput_bytes', '单个文件下载速度（字节/秒）', THROUGHPUT_BUCKETS)
+metrics.counter('file_bytes_total', '下载文件字节数')
+metrics.counter('file_requests_total', '文件请求次数，status 为响应状态码或者异常类型')
+metrics.counter('files_total', '下载文件数量，result 为下载结果；linked 为下载前去重直接创建链接')
+metrics.counter('dedup_bytes_total', '去重节省的字节数，stage 为 precheck（未下载）或者 download（下载后替换为链接）')
+metrics.histogram('download_queue_depth', '开始下载文件时等待下载名额的文件数量', DEPTH_BUCKETS)
+metrics.histogram('download_active', '开始下载文件时同时下载的文件数量', DEPTH_BUCKETS)
+metrics.histogram('download_limit', '开始下载文件时自适应并发数量上限', DEPTH_BUCKETS)
+metrics.histogram('cookie_update_seconds', '更新 Cookie 参数（msToken、ttwid）耗时（秒）')
+metrics.counter('jobs_total', '守护进程执行的任务数量，result 为执行结果')
@@ -0,0 +1,68 @@
+import sys
+from time import monotonic
+from itertools import count
+from rich import print
+
+from ..config import CYAN, PROGRESS_MODE, PROGRESS_INTERVAL
+
+
+def headless_mode():
+    '''是否使用无界面进度；PROGRESS_MODE 为 auto 时，标准输出不是终端则使用无界面进度'''
+    if PROGRESS_MODE == 'auto':
+        return not sys.stdout.isatty()
+    return PROGRESS_MODE == 'headless'
+
+
+class HeadlessProgress:
+    '''无界面下载进度：不为每个文件显示进度条，汇总全部文件的下载进度，
+    每隔 interval 秒输出一行摘要，结束时输出最终摘要；
+    提供与 rich Progress 相同的 add_task、update、remove_task 接口，可以直接替换下载使用的 Progress'''
+
+    def __init__(self, interval: float = PROGRESS_INTERVAL):
+        self.interval = interval
+        self.ids = count()
+        self.tasks = {}
+        self.finished = 0
+        self.downloaded = 0
+
+    def __enter__(self):
+        self.started = self.reported = monotonic()
+        self.reported_bytes = 0
+        return self
+
+    def __exit__(self, *args):
+        if elapsed := monotonic() - self.started:
+            print(f'[{CYAN}]下载结束：完成 {self.finished} 个文件，共 {self._size(self.downloaded)}，'
+                  f'用时 {elapsed:.1f} 秒，平均 {self._size(self.downloaded / elapsed)}/s')
+
+    def add_task(self, description: str, total: int = None, completed: int = 0):
+        task_id = next(self.ids)
+        self.tasks[task_id] = [total, completed]
+        return task_id
+
+    def update(self, task_id: int, advance: int = 0):
+        '''更新任务进度；距离上次输出超过 interval 秒时输出一行摘要'''
+        self.tasks[task_id][1] += advance
+        self.downloaded += advance
+        if (now := monotonic()) - self.reported >= self.interval:
+            self._report(now)
+
+    def remove_task(self, task_id: int):
+        '''移除任务；已下载字节数达到文件大小时计为完成'''
+        total, completed = self.tasks.pop(task_id)
+        if total and completed >= total:
+            self.finished += 1
+
+    def _report(self, now: float):
+        speed = (self.downloaded - self.reported_bytes) / (now - self.reported)
+        self.reported, self.reported_bytes = now, self.downloaded
+        print(f'[{CYAN}]正在下载 {len(self.tasks)} 个文件，已完成 {self.finished} 个文件，'
+              f'已下载 {self._size(self.downloaded)}，当前速度 {self._size(speed)}/s')
+
+    @staticmethod
+    def _size(size: float):
+        for unit in ('B', 'KiB', 'MiB'):
+            if size < 1024:
+                return f'{size:.1f} {unit}'
+            size /= 1024
+        return f'{size:.2f} GiB'
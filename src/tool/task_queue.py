@@ -0,0 +1,55 @@
+from asyncio import Queue
+from collections import Counter
+from heapq import heappush, heappop
+from itertools import count
+
+
+class FairQueue(Queue):
+    '''下载任务队列：任务为包含 account 与 size 的字典，None 为结束标记；
+    每次取出时，先选择已取出任务总大小最小的账号（多个账号的任务同时等待下载时按字节数公平分配），
+    再取出该账号中 size 最小的任务（短作业优先，小文件先下载）；结束标记在全部任务取出后才会取出'''
+
+    def _init(self, maxsize: int):
+        self._queue = TaskHeap()
+
+    def _put(self, item: dict | None):
+        self._queue.push(item)
+
+    def _get(self):
+        return self._queue.pop()
+
+
+class TaskHeap:
+    def __init__(self):
+        self.heaps = {}
+        self.served = Counter()
+        self.order = count()
+        self.tasks = 0
+        self.sentinels = 0
+
+    def __len__(self):
+        return self.tasks + self.sentinels
+
+    def push(self, task: dict | None):
+        if task is None:
+            self.sentinels += 1
+            return
+        if (heap := self.heaps.get(account := task['account'])) is None:
+            # 新加入的账号从当前最少的已取出字节数开始计算，避免长时间独占下载名额
+            if self.heaps:
+                self.served[account] = max(self.served[account], min(self.served[i] for i in self.heaps))
+            heap = self.heaps[account] = []
+        heappush(heap, (task['size'], next(self.order), task))
+        self.tasks += 1
+
+    def pop(self):
+        if not self.tasks:
+            self.sentinels -= 1
+            return
+        account = min(self.heaps, key=self.served.__getitem__)
+        size, _, task = heappop(heap := self.heaps[account])
+        if not heap:
+            del self.heaps[account]
+        self.served[account] += size
+        self.tasks -= 1
+        return task
@@ -0,0 +1,174 @@
+import os
+from os import O_WRONLY, O_CREAT, O_TRUNC
+from threading import Lock
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from ctypes import CDLL, c_int, c_longlong, get_errno
+from errno import EOPNOTSUPP, EINVAL, ENOSYS
+from asyncio import get_running_loop, gather, wrap_future, shield
+
+from ..config import WRITER_THREADS, WRITE_BUFFERS, WRITE_BUFFER_SIZE
+
+executor = ThreadPoolExecutor(WRITER_THREADS, thread_name_prefix='writer')
+
+if hasattr(os, 'pwrite'):
+    pwrite = os.pwrite
+else:  # Windows
+    _seek_lock = Lock()
+
+    def pwrite(fd: int, data: memoryview, offset: int):
+        with _seek_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.write(fd, data)
+
+try:  # Linux：预分配磁盘空间但不改变文件大小（FALLOC_FL_KEEP_SIZE）
+    _fallocate = CDLL(None, use_errno=True).fallocate
+    _fallocate.argtypes = (c_int, c_int, c_longlong, c_longlong)
+except (OSError, AttributeError, TypeError):
+    _fallocate = None
+
+
+def preallocate(fd: int, offset: int, length: int, keep_size: bool = True):
+    '''为文件 [offset, offset + length) 预分配磁盘空间，减少碎片；
+    keep_size 为 True 时不改变文件大小，未完成文件的大小仍然等于已写入的字节数，不影响断点续传；
+    系统或者文件系统不支持时忽略'''
+    if length <= 0:
+        return
+    if keep_size:
+        if _fallocate is not None and _fallocate(fd, 1, offset, length) != 0 \
+                and (errno := get_errno()) not in (EOPNOTSUPP, EINVAL, ENOSYS):
+            raise OSError(errno, os.strerror(errno))
+    elif hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, offset, length)
+        except OSError:
+            os.ftruncate(fd, offset + length)
+    else:
+        os.ftruncate(fd, offset + length)
+
+
+class BufferPool:
+    '''可重复使用的写入缓冲区，最多保留 size 个空闲缓冲区；守护进程的多个工作线程（各自的事件循环）共用'''
+
+    def __init__(self, buffer_size: int = WRITE_BUFFER_SIZE, size: int = WRITER_THREADS * WRITE_BUFFERS * 4):
+        self.buffer_size = buffer_size
+        self.size = size
+        self.free = []
+        self._lock = Lock()
+
+    def get(self):
+        with self._lock:
+            if self.free:
+                return self.free.pop()
+        return bytearray(self.buffer_size)
+
+    def put(self, buffer: bytearray):
+        with self._lock:
+            if len(self.free) < self.size:
+                self.free.append(buffer)
+
+
+buffer_pool = BufferPool()
+
+
+class FileWriter:
+    '''异步文件写入：数据复制到可重复使用的缓冲区，写满后提交到写入线程池，按偏移量写入（pwrite），不阻塞事件循环；
+    每个文件最多 buffers 个缓冲区等待写入，全部占用时等待最早的写入完成（背压），内存占用不超过 buffers × 缓冲区大小；
+    退出 async with 时写入剩余数据并关闭文件，之后文件内容才完整；
+    传入 hasher（hashlib 对象）时在写入线程中按顺序计算文件内容哈希（每个文件同时只有一次写入），
+    offset 大于 0 时先读取已有内容计算哈希'''
+
+    def __init__(self, path: str, offset: int = 0, truncate: bool = False, preallocate: int = 0,
+                 buffers: int = WRITE_BUFFERS, pool: BufferPool = buffer_pool, hasher=None):
+        self.path = path
+        self.position = offset
+        self.truncate = truncate
+        self.preallocate = preallocate
+        self.buffers = buffers
+        self.pool = pool
+        self.hasher = hasher
+        self.pending = deque()
+        self.buffer = None
+        self.filled = 0
+        self.fd = None
+
+    async def __aenter__(self):
+        self.loop = get_running_loop()
+        self.fd = await self.loop.run_in_executor(executor, self._open)
+        self.buffer = self.pool.get()
+        return self
+
+    async def __aexit__(self, *args):
+        try:
+            if self.filled:
+                await self._submit()
+            else:
+                self.pool.put(self.buffer)
+            self.buffer = None
+        finally:
+            # 出错或者被取消时同样等待全部写入结束后再关闭文件，避免写入线程写入已关闭（或者编号已被重新使用）的文件描述符；
+            # 再次被取消时关闭操作在后台继续完成
+            results = await shield(self.loop.create_task(self._close()))
+        # async with 代码块中的异常（包括取消）优先，不被写入错误覆盖
+        for result in results if args[0] is None else ():
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _close(self):
+        '''等待全部写入完成，将缓冲区放回缓冲池并关闭文件，返回写入结果'''
+        results = await gather(*(wrap_future(future) for future, _ in self.pending), return_exceptions=True)
+        for _, buffer in self.pending:
+            self.pool.put(buffer)
+        self.pending.clear()
+        await self.loop.run_in_executor(executor, os.close, self.fd)
+        return results
+
+    async def write(self, data: bytes):
+        view = memoryview(data)
+        size = len(self.buffer)
+        while view:
+            length = min(len(view), size - self.filled)
+            self.buffer[self.filled:self.filled + length] = view[:length]
+            self.filled += length
+            view = view[length:]
+            if self.filled == size:
+                await self._submit()
+                self.buffer = await self._next_buffer()
+
+    def _open(self):
+        fd = os.open(self.path, O_WRONLY | O_CREAT | (O_TRUNC if self.truncate else 0) | getattr(os, 'O_BINARY', 0), 0o666)
+        preallocate(fd, self.position, self.preallocate)
+        if self.hasher is not None and self.position:
+            with open(self.path, 'rb') as f:
+                remaining = self.position
+                while remaining and (data := f.read(min(remaining, WRITE_BUFFER_SIZE))):
+                    self.hasher.update(data)
+                    remaining -= len(data)
+        return fd
+
+    async def _submit(self):
+        if self.hasher is not None and self.pending:
+            await wrap_future(self.pending[-1][0])
+        # 保存 concurrent.futures.Future：取消等待时写入线程仍在执行，关闭文件前需要等待其结束
+        future = executor.submit(self._write, memoryview(self.buffer)[:self.filled], self.position)
+        self.pending.append((future, self.buffer))
+        self.position += self.filled
+        self.filled = 0
+
+    async def _next_buffer(self):
+        '''返回下一个可用的缓冲区；等待写入的缓冲区达到 buffers 个时，等待最早的写入完成并重复使用其缓冲区'''
+        if len(self.pending) < self.buffers and not self.pending[0][0].done():
+            return self.pool.get()
+        future, buffer = self.pending[0]
+        await wrap_future(future)
+        self.pending.popleft()
+        return buffer
+
+    def _write(self, data: memoryview, offset: int):
+        view = data
+        while data:
+            written = pwrite(self.fd, data, offset)
+            data = data[written:]
+            offset += written
+        if self.hasher is not None:
+            self.hasher.update(view)